@@ -0,0 +1,110 @@
+# Standard library imports
+import logging
+from dataclasses import dataclass, fields
+
+@dataclass
+class IwlsApiConfig:
+    """
+    Class to store IWLS connector settings.
+    Values can be set from the 'options' section of a pygeoapi provider definition.
+    """
+    # IWLS API root url, e.g. a local stand-in (see provider_iwls.iwls_stand_in)
+    base_url: str = 'https://api-iwls.dfo-mpo.gc.ca/api/'
+
+    # HTTP connection pool
+    pool_size: int = 16
+    keep_alive: bool = True
+    connect_timeout: float = 3.05
+    read_timeout: float = 30.0
+
+    # Retries of failed calls (connection errors, 429 and 5xx), with jittered exponential backoff
+    max_retries: int = 3
+    retry_backoff: float = 0.5
+    retry_backoff_max: float = 10.0
+    # Send a duplicate time series request when a call is slower than the hedge_quantile latency
+    hedge: bool = False
+    hedge_quantile: float = 0.95
+    hedge_min_delay: float = 0.05
+
+    # requests_cache backend of summary and metadata responses: 'filesystem', 'sqlite', 'memory' or 'redis'
+    http_cache_backend: str = 'filesystem'
+    # Cache folder, SQLite file or redis url, relative paths start from the worker working folder
+    http_cache_location: str = 'http_cache'
+    # Responses kept by the sqlite and memory backends, least recently used dropped first, no limit if None
+    http_cache_max_entries: int = None
+
+    # Seconds between background refreshes of the shared station summary
+    summary_ttl: float = 86400.0
+
+    # In-memory station metadata, least recently used stations dropped above metadata_cache_size
+    metadata_cache_size: int = 4096
+    metadata_ttl: float = 2629746.0
+    # JSON snapshot the metadata cache is loaded from and saved to after a warm-up, not saved if None
+    metadata_snapshot_path: str = None
+    # Fetch the metadata of every station in a background thread at startup
+    metadata_warm_up: bool = False
+    max_metadata_workers: int = 16
+
+    # Request planner, maximum number of days per API request for every series or for specific series codes
+    max_window_days: int = 7
+    series_window_days: dict = None
+
+    # Concurrency
+    max_chunk_workers: int = 4
+    max_series_workers: int = 4
+    max_station_workers: int = 4
+    # Seconds allowed to fetch every series of a station, no limit if None.
+    # A station late for this deadline fails the request instead of returning partial series
+    station_deadline: float = 60.0
+
+    # Default of the resample and agg query parameters of the providers, e.g. 1h and mean,
+    # series are not resampled if None
+    resample: str = None
+    resample_agg: str = 'mean'
+
+    # Latest value collections, seconds between two polls of every station,
+    # seconds of observations requested for a station without a recent value
+    # and seconds a request waits for the first poll of the worker process
+    latest_poll_interval: float = 60.0
+    latest_lookback: float = 10800.0
+    latest_ready_timeout: float = 30.0
+
+    # Local time series store, e.g. iwls_timeseries.sqlite, disabled if None
+    timeseries_cache_path: str = None
+    # Seconds before recent or forecast buckets are requested again
+    timeseries_recent_ttl: float = 300.0
+    # Seconds after the end of a day before its observations and predictions stop expiring
+    timeseries_settle_time: float = 86400.0
+    # Days of buckets kept in the store and maximum number of buckets, no limit if None,
+    # expired and old buckets are purged every timeseries_purge_interval seconds
+    timeseries_retention_days: float = 30.0
+    timeseries_max_buckets: int = None
+    timeseries_purge_interval: float = 3600.0
+
+    # Time series requests of the same days running at the same time in the process share a single API
+    # call, requests then cover whole UTC days
+    single_flight: bool = True
+    # Lock folder shared by the worker processes of a host, a worker waiting for another one fetching
+    # the same request reads the local time series store instead (requires timeseries_cache_path),
+    # disabled if None (POSIX only)
+    single_flight_lock_dir: str = None
+
+    # Asyncio connector (requires aiohttp)
+    use_async: bool = False
+    max_in_flight: int = 32
+
+    @classmethod
+    def from_dict(cls, options: dict):
+        """
+        Build connector settings from a dictionary, ignoring unknown keys.
+
+        :param options: connector settings, usually provider_def['options'] (dict)
+        :returns: connector settings (IwlsApiConfig)
+        """
+        options = options or {}
+        known_fields = {field.name for field in fields(cls)}
+
+        for key in options.keys() - known_fields:
+            logging.warning(f'Unknown IWLS connector option ignored: {key}')
+
+        return cls(**{k: v for k, v in options.items() if k in known_fields})
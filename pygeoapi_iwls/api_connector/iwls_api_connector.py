@@ -1,39 +1,138 @@
 # Standard library imports
-import requests
-import json
-import datetime
+import time
 import logging
-import requests_cache
-import dateutil.parser
+import contextlib
+from concurrent.futures import ThreadPoolExecutor, wait
 
 # Packages imports
+import numpy as np
 import pandas as pd
+import requests
 
-class IwlsApiConnector():
+# Local imports
+from provider_iwls.api_connector.iwls_api_config import IwlsApiConfig
+from provider_iwls.api_connector.iwls_http_session import IwlsHttpSession
+from provider_iwls.api_connector.iwls_http_cache import HttpCache
+from provider_iwls.api_connector.iwls_request_policy import RetryPolicy, LatencyTracker, InFlightGauge
+from provider_iwls.api_connector.iwls_station_index import StationRegistry
+from provider_iwls.api_connector.iwls_shared import Shared
+from provider_iwls.api_connector.iwls_metadata_cache import MetadataCache
+from provider_iwls.api_connector.iwls_latest_values import LatestValues
+from provider_iwls.api_connector.iwls_station_series import StationSeries, SeriesAccumulator
+from provider_iwls.api_connector.iwls_timeseries_cache import TimeSeriesCache
+from provider_iwls.api_connector.iwls_request_planner import RequestPlanner, days_between
+from provider_iwls.api_connector.iwls_series_decoder import decode_records, parse_event_dates
+from provider_iwls.api_connector.iwls_single_flight import SingleFlight, FileLock
+
+class IwlsApiConnector(Shared):
     """
     Provider abstract base class for iwls data
     Used as parent by ProviderIwlsWaterLevels and ProviderIwlsCurrents
     """
-    def __init__(self):
+    # Time series a station must publish to be returned by bbox queries, any station if None
+    required_series = None
+
+    @classmethod
+    def shared(cls, config: IwlsApiConfig = None):
+        """
+        Return the connector of this class matching the connector settings, create it on first use.
+        pygeoapi creates a provider per request, providers reuse the connector (session, caches,
+        station index) built by the first request instead of building their own.
+
+        :param config: connector settings, defaults used if None (IwlsApiConfig)
+        :returns: shared connector (IwlsApiConnector)
+        """
+        config = config or IwlsApiConfig()
+        return cls._shared(repr(config), lambda: cls(config))
+
+    def __init__(self, config: IwlsApiConfig = None):
         """
         Init function that provides summary data (from cached sessions if available)
+
+        :param config: connector settings, defaults used if None (IwlsApiConfig)
+        """
+        self.config = config or IwlsApiConfig()
+
+        # Every endpoint is under the stations url of the configured IWLS API
+        self.summary_url = f'{self.config.base_url.rstrip("/")}/v1/stations/'
+
+        # Pooled keep-alive session shared by every call made by this connector
+        self.session = IwlsHttpSession(
+            pool_size=self.config.pool_size,
+            connect_timeout=self.config.connect_timeout,
+            read_timeout=self.config.read_timeout,
+            keep_alive=self.config.keep_alive,
+            retry_policy=RetryPolicy(
+                self.config.max_retries, self.config.retry_backoff, self.config.retry_backoff_max),
+            latency_tracker=LatencyTracker.shared(
+                self.config.base_url,
+                quantile=self.config.hedge_quantile,
+                min_delay=self.config.hedge_min_delay),
+            http_cache=HttpCache.shared(
+                self.config.http_cache_backend,
+                self.config.http_cache_location,
+                self.config.http_cache_max_entries))
+
+        # Stations being fetched right now by every request using this connector and highest value reached
+        self.stations_in_flight = InFlightGauge()
+
+        # Station summary shared by every connector of the process, refreshed in the background
+        self.registry = StationRegistry.shared(
+            self.summary_url, self._get_summary_info, self.config.summary_ttl)
+
+        # Station metadata kept in memory, shared by every connector of the process
+        self.metadata_cache = MetadataCache.shared(
+            self.summary_url,
+            max_entries=self.config.metadata_cache_size,
+            ttl=self.config.metadata_ttl,
+            snapshot_path=self.config.metadata_snapshot_path)
+        if self.config.metadata_warm_up:
+            self.metadata_cache.start_warm_up(self.warm_up_metadata)
+
+        # Splits every time series request in the fewest day-aligned API requests
+        self.planner = RequestPlanner(self.config.max_window_days, self.config.series_window_days)
+
+        # Time series buckets already downloaded, shared by every connector using the same file
+        self.timeseries_cache = None
+        if self.config.timeseries_cache_path:
+            self.timeseries_cache = TimeSeriesCache.shared(
+                self.config.timeseries_cache_path,
+                recent_ttl=self.config.timeseries_recent_ttl,
+                settle_time=self.config.timeseries_settle_time,
+                retention_days=self.config.timeseries_retention_days,
+                max_buckets=self.config.timeseries_max_buckets,
+                purge_interval=self.config.timeseries_purge_interval)
+
+        # Identical time series requests running at the same time share a single API call
+        self.single_flight = SingleFlight.shared(self.summary_url) if self.config.single_flight else None
+
+    @property
+    def info(self) -> pd.core.frame.DataFrame:
         """
-        self.info = self._get_summary_info()
+        Summary information for all stations, from the shared station registry.
+        """
+        return self.registry.index.info
+
+    @property
+    def cache_stats(self) -> dict:
+        """
+        Hit and miss counters of the HTTP cache and station metadata cache, for the whole process.
+        """
+        return {'http': self.session.http_cache.stats(),
+                'metadata': {'hits': self.metadata_cache.hits, 'misses': self.metadata_cache.misses,
+                             'entries': len(self.metadata_cache)}}
 
     def _get_summary_info(self) -> pd.core.frame.DataFrame:
         """
-        Get summary information for all stations.Runs on class instantiation.
+        Get summary information for all stations. Runs once per process to load the
+        shared station registry, then every summary_ttl seconds to refresh it.
         Output is used to match station codes and names to unique IWLS database id.
 
         :returns: Pandas dataframe containing summary information for all stations (pd.DataFrame)
         """
 
-        # Set up requests_cache session
-        s_summary_info = requests_cache.CachedSession('http_cache', backend='filesystem',expire_after=86400)
-
         # Request data from cache or trought get request
-        url = 'https://api-iwls.dfo-mpo.gc.ca/api/v1/stations/'
-        r = s_summary_info.get(url=url, params={})
+        r = self.session.get(url=self.summary_url, params={}, expire_after=self.config.summary_ttl)
 
         logging.info(f'From cache: {r.from_cache}')
         logging.info(f'Created: {r.created_at}')
@@ -49,99 +148,174 @@ class IwlsApiConnector():
         Return unique id for a station from five digits identifier
 
         :param station_code: five digits station identifier (string)
-        :returns: unique IWLS database id (int)
+        :returns: unique IWLS database id, raise StationNotFoundError if unknown (int)
         """
-        return self.info.loc[self.info.code==station_code].id.values[0]
+        return self.registry.index.id_from_code(station_code)
 
     def _id_from_station_name(self, station_name: str) -> int:
         """
         Return unique id for a station from exact official name
 
         :param sation_name: Station exact official name (string)
-        :returns: unique IWLS database id (int)
+        :returns: unique IWLS database id, raise StationNotFoundError if unknown (int)
         """
-        return self.info.loc[self.info.officialName==station_name].id.values[0]
+        return self.registry.index.id_from_name(station_name)
 
     def _station_name_from_id(self, iwls_id: str) -> str:
         """
         Return  station  exact official name from unique id
 
         :param iwls_id:unique IWLS database id (string)
-        :returns: Station Name (string)
+        :returns: Station Name, raise StationNotFoundError if unknown (string)
         """
-        return self.info.loc[self.info.id==iwls_id].officialName.values[0]
+        return self.registry.index.name_from_id(iwls_id)
 
     def _get_station_metadata(self, station_code: str, cache_result=True):
         """
         Return a json response from the IWLS API containing full metadata for a single station.
 
         :param station_code: = five digit station identifier (string)
-        :cache_result: boolean, if true use requests_cache to cache results (bool)
+        :cache_result: boolean, if true use the in-memory metadata cache and requests_cache (bool)
         :returns: Station Metadata (JSON)
         """
         station_id = self._id_from_station_code(station_code)
-        url = 'https://api-iwls.dfo-mpo.gc.ca/api/v1/stations/' + station_id + '/metadata'
+
+        if cache_result == True:
+            metadata = self.metadata_cache.get(station_id)
+            if metadata is None:
+                metadata = self._fetch_station_metadata(station_id)
+                self.metadata_cache.put(station_id, metadata)
+            return metadata
+
+        return self._fetch_station_metadata(station_id, cache_result=False)
+
+    def _fetch_station_metadata(self, station_id: str, cache_result=True) -> dict:
+        """
+        Request the metadata of a single station from the IWLS API.
+
+        :param station_id: unique IWLS database id (string)
+        :cache_result: boolean, if true use requests_cache to cache results (bool)
+        :returns: Station Metadata (JSON)
+        """
+        url = self.summary_url + station_id + '/metadata'
         params = {}
 
         if cache_result == True:
-            s_stn_metadata = requests_cache.CachedSession('http_cache', backend='filesystem',expire_after=2629746)
-            r = s_stn_metadata.get(url=url, params=params)
+            r = self.session.get(url=url, params=params, expire_after=self.config.metadata_ttl)
         else:
-            r = requests.get(url=url, params=params)
+            r = self.session.get(url=url, params=params)
         r.raise_for_status()
 
         return r.json()
 
-    def _get_station_data(self, station_code: int, start_time: str, end_time: str) -> dict:
+    def warm_up_metadata(self, station_ids: list = None) -> int:
+        """
+        Fetch the metadata of every station missing from the metadata cache,
+        max_metadata_workers stations at a time, then save the cache snapshot.
+
+        :param station_ids: unique IWLS database ids, every station of the summary if None (list)
+        :returns: number of stations fetched (int)
+        """
+        if station_ids is None:
+            station_ids = list(self.info.get('id', []))
+        missing = self.metadata_cache.missing(station_ids)[:self.metadata_cache.max_entries]
+
+        def fetch(station_id):
+            try:
+                self.metadata_cache.put(station_id, self._fetch_station_metadata(station_id))
+                return True
+            except Exception as e:
+                logging.warning(f'Metadata warm-up failed for station {station_id}: {e}')
+                return False
+
+        fetched = sum(self._run_concurrently(fetch, missing, self.config.max_metadata_workers))
+        self.metadata_cache.save_snapshot()
+        logging.info(f'Station metadata warmed up, {fetched} of {len(missing)} stations fetched')
+
+        return fetched
+
+    def _get_station_data(self, station_code: int, start_time: str, end_time: str,
+                          with_metadata: bool = True) -> dict:
         """
         Get the station data.
 
         :param station_code: five digits station identifier (string)
-        :param  time_series_code: Code of the timeseries (wlo,wlp, wlf, all); all return (wlo,wlp,wlf) tuple for every timestamps (string)
         :param  start_time: Start time, ISO 8601 format UTC (e.g.: 2019-11-13T19:18:00Z) (string)
         :param  end_time: End time, ISO 8601 format UTC (e.g.: 2019-11-13T19:18:00Z) (string)
-        :returns: time_strings_range, metadata and url for query
+        :param with_metadata: fetch the station metadata, metadata is None if False (bool)
+        :returns: time range, metadata and url for query
         """
-
-        # Can only get 7 days of data per request, psplit data in multiple requests if needed
-        #(ToDo: had check to block large requests in ProviderIwls class)
-        start_time_dt = dateutil.parser.parse(start_time)
-        end_time_dt = dateutil.parser.parse(end_time)
-        date_list = [start_time_dt]
-
-        if (end_time_dt - start_time_dt) > datetime.timedelta(days=5):
-            date_list.append(start_time_dt + datetime.timedelta(days=5))
-            while (date_list[-1]  + datetime.timedelta(days=5)) < end_time_dt:
-                date_list.append(date_list[-1] + datetime.timedelta(days=5))
-        date_list.append(end_time_dt)
-
-        # Create list of start time and end time pairs
-        time_ranges = []
-
-        for idx, i in enumerate(date_list[:-1]):
-            time_ranges.append([i,date_list[idx+1] - datetime.timedelta(seconds=1)])
-        time_ranges[-1][-1] = time_ranges[-1][-1] + datetime.timedelta(seconds=1)
-
-        #  Convert datetime object back to ISO 8601 format strings
-        time_ranges_strings = [[datetime.datetime.strftime(i,'%Y-%m-%dT%H:%M:%SZ',) for i in x] for x in time_ranges]
+        # Requests are split per series by the request planner in _get_timeseries
+        time_range = self.planner.normalize_range(start_time, end_time)
 
         # Get metadata
-        metadata = self._get_station_metadata(station_code)
+        metadata = self._get_station_metadata(station_code) if with_metadata else None
 
         # Get the station id from the station code
         station_id = self._id_from_station_code(station_code)
 
         # Use the station id in the url for the query
-        url = f'https://api-iwls.dfo-mpo.gc.ca/api/v1/stations/{station_id}/data'
+        url = f'{self.summary_url}{station_id}/data'
 
-        return time_ranges_strings, metadata, url
+        return time_range, metadata, url
 
-    def _get_timeseries(self,url: str, time_ranges_strings: pd.core.frame.DataFrame, series_code: str):
+    def _run_concurrently(self, func, items: list, max_workers: int, timeout: float = None) -> list:
+        """
+        Call func on every item with a bounded pool of worker threads.
+
+        :param func: function called with a single item as argument (function)
+        :param items: arguments to pass to func (list)
+        :param max_workers: maximum number of concurrent calls, run serially if 1 (int)
+        :param timeout: seconds to wait for all calls, no limit if None (float)
+        :returns: results in the same order as items, raise requests.exceptions.Timeout
+                  naming the items not completed within timeout (list)
+        """
+        if timeout is None and (max_workers <= 1 or len(items) <= 1):
+            return [func(i) for i in items]
+
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items))))
+        try:
+            futures = [executor.submit(func, i) for i in items]
+            done, not_done = wait(futures, timeout=timeout)
+
+            # Drop calls still running after the deadline, partial results are not returned
+            for future in not_done:
+                future.cancel()
+            if not_done:
+                late = ', '.join(str(item) for item, future in zip(items, futures) if future in not_done)
+                raise requests.exceptions.Timeout(
+                    f'{len(not_done)} of {len(items)} calls not completed within {timeout} seconds: {late}')
+
+            return [future.result() for future in futures]
+        finally:
+            executor.shutdown(wait=False)
+
+    def _fetch_chunk(self, url: str, series_code: str, time_range: list) -> tuple:
+        """
+        Send a single query to the IWLS API for one chunk of a time series.
+
+        :param url: url used for queries (String)
+        :param series_code: three letter identifer for time series (String)
+        :param time_range: start time and end time used for the query (list)
+        :returns: UTC timestamps (datetime64[ns]) and values (float64) returned by the API (tuple)
+        """
+        params = {
+            'time-series-code':series_code,
+            'from':time_range[0],
+            'to': time_range[1]
+            }
+        r = self.session.get(url=url, params=params, hedge=self.config.hedge)
+        r.raise_for_status()
+
+        # Records are decoded straight from the body into arrays, without building a dict per record
+        return decode_records(r.content)
+
+    def _get_timeseries(self, url: str, time_range: list, series_code: str):
         """
         Send a series of queries to the IWLS API and return
 
         :param url: url used for queries (String)
-        :param time_ranges_string: pairs of start times and end times used for queries (pd.Dataframe)
+        :param time_range: start time and end time, returned by _get_station_data (list)
         :param series_code: three letter identifer for time series (String)
                             'wlo' = Observed Water Levels
                             'wlp' = Tidal Predictions
@@ -149,27 +323,272 @@ class IwlsApiConnector():
                             'wlf-spine' = SPINE Forcast
                             'wcs1' = Observed Surface Currents Speed
                             'wcd1' = Observed Surface Currents Direction
-        returns: series of pairs of time stamps and water level values (json)
-        """
-        series_data = pd.DataFrame()
-        for i in time_ranges_strings:
-            params = {
-                'time-series-code':series_code,
-                'from':i[0],
-                'to': i[1]
-                }
-            r = requests.get(url=url, params=params)
-            r.raise_for_status()
-            series_data = pd.concat([series_data, pd.DataFrame.from_dict(r.json())])
+        returns: time stamps and values in time order (StationSeries)
+        """
+        buckets, plan = self._plan_timeseries(url, series_code, time_range)
+
+        # Fetch every chunk concurrently, results are returned in request order
+        chunks = self._run_concurrently(
+            lambda chunk: self._fetch_plan_chunk(url, series_code, chunk, buckets is not None),
+            plan.chunks, self.config.max_chunk_workers)
+
+        return self._merge_timeseries(plan, buckets, chunks)
+
+    def _fetch_plan_chunk(self, url: str, series_code: str, chunk: tuple, use_store: bool):
+        """
+        Fetch one chunk of a request plan, sharing the API call with identical requests
+        of other threads running at the same time.
+
+        :param url: url used for queries (String)
+        :param series_code: three letter identifer for time series (String)
+        :param chunk: time range and UTC days of the request, from RequestPlan.chunks (tuple)
+        :param use_store: store the chunk in the local time series store (bool)
+        :returns: timestamps and values (tuple), or day buckets if use_store is True (dict)
+        """
+        chunk_range, days = chunk
+        if use_store:
+            fetch = lambda: self._fetch_chunk_stored(url, series_code, chunk_range, days)
+        else:
+            fetch = lambda: self._fetch_chunk(url, series_code, chunk_range)
+
+        if self.single_flight is None:
+            return fetch()
+        return self.single_flight.do((url, series_code, *chunk_range, use_store), fetch)
+
+    def _chunk_lock(self, url: str, series_code: str, chunk_range: list):
+        """
+        Return the lock shared with other worker processes for a chunk.
+
+        :param url: url used for queries (String)
+        :param series_code: three letter identifer for time series (String)
+        :param chunk_range: start time and end time of the request (list)
+        :returns: lock, None if no lock folder is configured (FileLock)
+        """
+        if self.config.single_flight_lock_dir is None:
+            return None
+        return FileLock(self.config.single_flight_lock_dir, (url, series_code, *chunk_range))
+
+    def _fetch_chunk_stored(self, url: str, series_code: str, chunk_range: list, days: list) -> dict:
+        """
+        Fetch one chunk and store its day buckets in the local time series store. With a lock
+        folder, a worker process waiting for another one fetching the same chunk reads the store.
+
+        :param url: url used for queries (String)
+        :param series_code: three letter identifer for time series (String)
+        :param chunk_range: start time and end time of the request (list)
+        :param days: UTC days covered by the request (list of datetime.date)
+        :returns: timestamps and values by day (dict)
+        """
+        lock = self._chunk_lock(url, series_code, chunk_range)
+        with lock or contextlib.nullcontext():
+            buckets = self._stored_chunk(url, series_code, days) if lock else None
+            if buckets is None:
+                buckets = self._store_chunk(url, series_code, days, *self._fetch_chunk(url, series_code, chunk_range))
+
+        return buckets
+
+    def _stored_chunk(self, url: str, series_code: str, days: list) -> dict:
+        """
+        Return the buckets of a chunk if every day is in the local time series store.
 
-        if series_data.empty:
-                return json.dumps({'value':{}})
+        :param url: url used for queries (String)
+        :param series_code: three letter identifer for time series (String)
+        :param days: UTC days covered by the request (list of datetime.date)
+        :returns: timestamps and values by day, None if a day is missing (dict)
+        """
+        buckets = self.timeseries_cache.get(url, series_code, days)
+        if len(buckets) < len(days):
+            return None
+
+        logging.debug(f'{series_code} {days[0]}/{days[-1]} stored by another worker process')
+        return buckets
+
+    def _store_chunk(self, url: str, series_code: str, days: list, times, values) -> dict:
+        """
+        Split a chunk in day buckets and store them in the local time series store.
+
+        :param url: url used for queries (String)
+        :param series_code: three letter identifer for time series (String)
+        :param days: UTC days covered by the request (list of datetime.date)
+        :param times: UTC timestamps returned by _fetch_chunk (np.ndarray of datetime64[ns])
+        :param values: values returned by _fetch_chunk (np.ndarray of float64)
+        :returns: timestamps and values by day (dict)
+        """
+        # Days without records are stored too, they are not requested again until they expire
+        time_days = times.astype('datetime64[D]')
+        buckets = {}
+        for day in days:
+            in_day = time_days == np.datetime64(day)
+            buckets[day] = (times[in_day], values[in_day])
+
+        if buckets:
+            self.timeseries_cache.put(url, series_code, buckets)
+        return buckets
+
+    def _plan_timeseries(self, url: str, series_code: str, time_range: list):
+        """
+        Plan the requests of a time series, skipping the days available in the local store.
+
+        :param url: url used for queries (String)
+        :param series_code: three letter identifer for time series (String)
+        :param time_range: start time and end time, returned by _get_station_data (list)
+        :returns: cached buckets by day (dict) and requests to send (RequestPlan)
+        """
+        if self.timeseries_cache is None:
+            # Requests shared with other requests of the same days cover whole days, a time range
+            # clipped to the current second would never match the one of another request
+            buckets = None
+            plan = self.planner.plan(series_code, time_range, whole_days=self.config.single_flight)
         else:
-                series_data['eventDate'] = pd.to_datetime(series_data['eventDate'])
-                series_data = series_data.set_index('eventDate').sort_index()
-                series_data = series_data[['value']]
+            # Fetch whole days so every day fetched can be stored as a bucket
+            buckets = self.timeseries_cache.get(url, series_code, days_between(*time_range))
+            plan = self.planner.plan(series_code, time_range, skip_days=buckets, whole_days=True)
+
+        logging.debug(f'Request plan {plan.report()}')
+        return buckets, plan
 
-                return series_data.to_json(date_format='iso')
+    def _merge_timeseries(self, plan, buckets: dict, chunks: list):
+        """
+        Merge the chunks fetched for a plan with the cached buckets.
+
+        :param plan: requests sent, returned by _plan_timeseries (RequestPlan)
+        :param buckets: cached buckets by day, None if the local store is disabled (dict)
+        :param chunks: timestamps and values for every request of the plan, day buckets
+                       already stored by _fetch_chunk_stored if the local store is enabled (list)
+        returns: time stamps and values in time order (StationSeries)
+        """
+        if buckets is None:
+            arrays = chunks
+        else:
+            for chunk_buckets in chunks:
+                buckets.update(chunk_buckets)
+            arrays = [buckets[day] for day in sorted(buckets)]
+
+        # Chunks and buckets may cover whole days, keep records of the requested time range only.
+        # Arrays are concatenated and sorted once, boundary timestamps are kept only once
+        start_time, end_time = parse_event_dates([plan.start_time, plan.end_time])
+        accumulator = SeriesAccumulator()
+        for times, values in arrays:
+            in_range = (times >= start_time) & (times <= end_time)
+            accumulator.add_arrays(times[in_range], values[in_range])
+
+        return accumulator.build()
+
+    def _select_properties(self, properties: list = None) -> tuple:
+        """
+        Translate the feature properties selected by a query into the series to request
+        and whether the station metadata is needed.
+
+        :param properties: selected feature property names, e.g. ['wlo', 'metadata'], all if empty or None (list)
+        :returns: feature property name and IWLS code of the selected series (dict), metadata selected (bool)
+        """
+        if not properties:
+            return self.series_codes, True
+
+        return ({name: code for name, code in self.series_codes.items() if name in properties},
+                'metadata' in properties)
+
+    def _published_series_codes(self, station_code: str, series_codes: dict) -> dict:
+        """
+        Keep only the series a station publishes according to the station summary.
+
+        :param station_code: five digits station identifier, keep every series if None (string)
+        :param series_codes: feature property name and IWLS code of every series (dict)
+        :returns: feature property name and IWLS code of the published series (dict)
+        """
+        published = self.registry.index.published_series(station_code) if station_code else None
+
+        if published is None:
+            return dict(series_codes)
+        return {name: code for name, code in series_codes.items() if code in published}
+
+    def _get_station_series(self, url: str, time_range: list, series_codes: dict,
+                            station_code: str = None) -> dict:
+        """
+        Fetch several time series of a single station concurrently.
+        Series the station does not publish are not requested. If a series is not returned
+        before the station deadline, the station fails instead of returning partial series.
+
+        :param url: url used for queries (String)
+        :param time_range: start time and end time, returned by _get_station_data (list)
+        :param series_codes: feature property name and IWLS code of every series, e.g. {'spine': 'wlf-spine'} (dict)
+        :param station_code: five digits station identifier, request every series if None (string)
+        :returns: feature property name and series returned by _get_timeseries (dict)
+        """
+        requested = self._published_series_codes(station_code, series_codes)
+        empty_series = StationSeries.empty()
+
+        try:
+            series_list = self._run_concurrently(
+                lambda series_code: self._get_timeseries(url, time_range, series_code),
+                list(requested.values()), self.config.max_series_workers,
+                timeout=self.config.station_deadline)
+        except requests.exceptions.Timeout as e:
+            logging.warning(f'Station {station_code or url} series deadline exceeded, {e}')
+            raise requests.exceptions.Timeout(f'Station {station_code or url} series deadline exceeded, {e}') from e
+
+        series = dict.fromkeys(series_codes, empty_series)
+        series.update(zip(requested.keys(), series_list))
+
+        return series
+
+    def _build_feature(self, metadata: dict, series: dict, station_code: str = None,
+                       skip_geometry: bool = False, with_metadata: bool = True) -> dict:
+        """
+        Build the GeoJSON feature of a single station.
+
+        :param metadata: station metadata returned by _get_station_metadata, None if not fetched (dict)
+        :param series: feature property name and series returned by _get_station_series (dict)
+        :param station_code: five digits station identifier, feature id if metadata is None (string)
+        :param skip_geometry: build the feature without geometry (bool)
+        :param with_metadata: add the metadata to the feature properties, metadata may still be fetched for the geometry (bool)
+        :returns: GeoJSON feature (dict)
+        """
+        # Series are rendered as GeoJSON properties only when the response is written
+        properties = {'metadata':metadata} if with_metadata and metadata is not None else {}
+        properties.update(series)
+
+        geometry = None
+        if not skip_geometry:
+            geometry = {
+                'type': 'Point',
+                'coordinates':[metadata['longitude'],metadata['latitude']]
+            }
+
+        return {'type': 'Feature',
+                'id': metadata['code'] if metadata is not None else station_code,
+                'geometry': geometry,
+                'properties': properties
+                }
+
+    def _get_features_by_station(self, station_codes: list, start_time: str, end_time: str,
+                                 csv=False, properties: list = None, skip_geometry: bool = False) -> list:
+        """
+        Get the GeoJSON feature of several stations, at most max_station_workers stations at a time.
+
+        :param station_codes: five digits station identifiers (list)
+        :param  start_time: Start time, ISO 8601 format UTC (e.g.: 2019-11-13T19:18:00Z) (string)
+        :param  end_time: End time, ISO 8601 format UTC (e.g.: 2019-11-13T19:18:00Z) (string)
+        :param  csv:  Write csv file to disk if True, default = False(bool)
+        :param properties: feature properties to return, all if empty or None (list)
+        :param skip_geometry: build features without geometry (bool)
+        :returns: GeoJSON features in the same order as station_codes (list)
+        """
+        # Stations being fetched by this call, the connector is shared by concurrent requests
+        fan_out = InFlightGauge()
+
+        def get_station_feature(station_code):
+            with self.stations_in_flight.track(), fan_out.track():
+                return self._get_station_data(station_code, start_time, end_time, csv=csv,
+                                              properties=properties, skip_geometry=skip_geometry)
+
+        features = self._run_concurrently(
+            get_station_feature, station_codes, self.config.max_station_workers)
+
+        logging.info(f'Fetched {len(station_codes)} stations, '
+                     f'up to {fan_out.peak} stations in flight')
+
+        return features
 
     def _get_timeseries_by_boundary(self, start_time: str, end_time: str, bbox: list,
                                     limit: int, start_index: int):
@@ -181,21 +600,103 @@ class IwlsApiConnector():
         :param bbox: bounding box [minx,miny,maxx,maxy] (list)
         :param limit: number of records to return (int)
         :param start_index: starting record to return (int)
-        :returns: lat/lon values in bounding box, list of stations, end index and unpopulated geojson (timeseries_data)
+        :returns: list of stations, end index and unpopulated geojson (timeseries_data)
         """
-        # use summary metadata info to find stations within request
-        within_lat = self.info['latitude'].between(bbox[1], bbox[3])
-        within_lon = self.info['longitude'].between(bbox[0], bbox[2])
-
-        stations_list_data = self.info[within_lat & within_lon]
+        # use the spatial index of the station summary to find stations within request,
+        # skipping stations that do not publish the series required by the child class
+        stations_list_data = self.registry.index.stations_in_bbox(bbox, self.required_series)
 
         # Only Query stations up  from start index to limit
         end_index = start_index + limit
         stations_list = stations_list_data[start_index:end_index]
 
-        timeseries_data = {"type": "featureCollection"}
+        # Every station of the page becomes a feature, counts are known before any series is fetched
+        timeseries_data = {"type": "featureCollection",
+                           "numberMatched": len(stations_list_data),
+                           "numberReturned": len(stations_list)}
+
+        return stations_list, end_index, timeseries_data
+
+    def _count_stations_by_boundary(self, bbox: list) -> dict:
+        """
+        Count the stations inside a bounding box from the station index only, no time series is fetched.
+        Used to answer queries with resulttype=hits.
+
+        :param bbox: bounding box [minx,miny,maxx,maxy] (list)
+        :returns: GeoJSON feature collection without features (dict)
+        """
+        number_matched = len(self.registry.index.stations_in_bbox(bbox, self.required_series))
 
-        return within_lat, within_lon, stations_list, end_index, timeseries_data
+        return {"type": "featureCollection",
+                "features": [],
+                "numberMatched": number_matched,
+                "numberReturned": 0}
+
+    def latest_values(self, series_code: str) -> LatestValues:
+        """
+        Return the table of the latest value of a time series for every station publishing it,
+        shared by every connector of the process and refreshed in the background.
+
+        :param series_code: three letter identifer for time series, e.g. wlo (string)
+        :returns: shared table (LatestValues)
+        """
+        return LatestValues.shared(
+            (self.summary_url, series_code),
+            lambda previous: self._get_latest_values(series_code, previous),
+            self.config.latest_poll_interval)
+
+    def _get_latest_values(self, series_code: str, previous: dict) -> dict:
+        """
+        Get the latest value of a time series for every station publishing it, at most
+        max_station_workers stations at a time. Only values following the previous latest
+        value of a station are requested, a station keeps its previous value if none is returned.
+
+        :param series_code: three letter identifer for time series, e.g. wlo (string)
+        :param previous: GeoJSON feature of the latest value by station code, from the previous call (dict)
+        :returns: GeoJSON feature of the latest value by station code (dict)
+        """
+        now = time.time()
+        end_time = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now))
+        lookback_time = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now - self.config.latest_lookback))
+        stations = self.registry.index.stations_in_bbox([-180, -90, 180, 90], series_code)
+
+        def get_latest_feature(station):
+            feature = previous.get(station.code)
+            # ISO 8601 timestamps in the same form compare as strings
+            start_time = lookback_time
+            if feature is not None:
+                start_time = max(start_time, feature['properties']['eventDate'])
+
+            try:
+                times, values = self._fetch_chunk(
+                    f'{self.summary_url}{station.id}/data', series_code, [start_time, end_time])
+            except Exception as e:
+                logging.warning(f'Latest {series_code} value of station {station.code} not refreshed: {e}')
+                return feature
+
+            valid = np.flatnonzero(~np.isnan(values))
+            if len(valid) == 0:
+                return feature
+            latest = valid[np.argmax(times[valid])]
+
+            return {'type': 'Feature',
+                    'id': station.code,
+                    'geometry': {
+                        'type': 'Point',
+                        'coordinates':[station.longitude, station.latitude]
+                    },
+                    'properties': {
+                        'officialName': station.officialName,
+                        'timeSeriesCode': series_code,
+                        'eventDate': f'{np.datetime_as_string(times[latest], unit="s")}Z',
+                        'value': float(values[latest])
+                    }
+                    }
+
+        rows = list(stations.itertuples(index=False))
+        features = self._run_concurrently(get_latest_feature, rows, self.config.max_station_workers)
+
+        return {row.code: feature for row, feature in zip(rows, features) if feature is not None}
 
     def _station_data_to_csv(self):
         """
@@ -0,0 +1,409 @@
+# Standard library imports
+import asyncio
+import logging
+import threading
+
+# Packages imports
+import requests
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Local imports
+from provider_iwls.api_connector.iwls_api_config import IwlsApiConfig
+from provider_iwls.api_connector.iwls_api_connector import IwlsApiConnector
+from provider_iwls.api_connector.iwls_api_connector_waterlevels import IwlsApiConnectorWaterLevels
+from provider_iwls.api_connector.iwls_api_connector_currents import IwlsApiConnectorCurrents
+from provider_iwls.api_connector.iwls_station_series import StationSeries
+from provider_iwls.api_connector.iwls_series_decoder import decode_records
+from provider_iwls.api_connector.iwls_single_flight import AsyncSingleFlight
+from provider_iwls.api_connector.iwls_request_policy import InFlightGauge
+from provider_iwls.api_connector.iwls_shared import Shared
+
+class AsyncRuntime(Shared):
+    """
+    Event loop running in a background thread, with the HTTP client and in-flight
+    limit shared by every async connector using the same settings.
+    There is one loop per worker process.
+    """
+    @classmethod
+    def get(cls, config: IwlsApiConfig):
+        """
+        Return the runtime matching the connector settings, create it if needed.
+
+        :param config: connector settings (IwlsApiConfig)
+        :returns: shared runtime (AsyncRuntime)
+        """
+        key = (config.pool_size, config.keep_alive, config.connect_timeout,
+               config.read_timeout, config.max_in_flight)
+        return cls._shared(key, lambda: cls(config))
+
+    def __init__(self, config: IwlsApiConfig):
+        """
+        Start the event loop thread and create the HTTP client on it.
+
+        :param config: connector settings (IwlsApiConfig)
+        """
+        if aiohttp is None:
+            raise ImportError('aiohttp must be installed to use the async IWLS connectors')
+
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name='iwls-async-loop', daemon=True)
+        self._thread.start()
+        self.client, self.semaphore = self.run(self._create_client(config))
+        # Identical requests of every async connector using this loop share a single API call
+        self.single_flight = AsyncSingleFlight()
+
+    async def _create_client(self, config: IwlsApiConfig):
+        """
+        Create the HTTP client and in-flight limit, must run on the event loop.
+
+        :param config: connector settings (IwlsApiConfig)
+        :returns: HTTP client and semaphore (tuple)
+        """
+        connector = aiohttp.TCPConnector(limit=config.pool_size, force_close=not config.keep_alive)
+        timeout = aiohttp.ClientTimeout(sock_connect=config.connect_timeout, sock_read=config.read_timeout)
+        client = aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+        return client, asyncio.Semaphore(config.max_in_flight)
+
+    def run(self, coro):
+        """
+        Run a coroutine on the event loop and block until it returns (sync bridge).
+
+        :param coro: coroutine to run (coroutine)
+        :returns: coroutine result
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def close(self):
+        """
+        Close the HTTP client and stop the event loop, the next caller of get() starts a new runtime.
+        """
+        self._discard()
+        self.run(self.client.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+class AsyncIwlsApiConnector(IwlsApiConnector):
+    """
+    Asyncio variant of IwlsApiConnector, used as parent by AsyncIwlsApiConnectorWaterLevels
+    and AsyncIwlsApiConnectorCurrents. Stations, series and chunks of a request are all
+    scheduled on a single event loop, at most max_in_flight requests at a time.
+    Blocking methods keep their signature so the class can replace a sync connector,
+    errors are raised as the requests exceptions raised by the sync connectors.
+    Local time series store reads and writes and csv files run in worker threads.
+    """
+    # Seconds between two attempts to acquire a lock held by another request
+    lock_poll_interval = 0.02
+
+    def __init__(self, config: IwlsApiConfig = None):
+        super().__init__(config)
+        self.runtime = AsyncRuntime.get(self.config)
+
+    async def _fetch_chunk_async(self, url: str, series_code: str, time_range: list) -> tuple:
+        """
+        Send a single query to the IWLS API for one chunk of a time series.
+
+        :param url: url used for queries (String)
+        :param series_code: three letter identifer for time series (String)
+        :param time_range: start time and end time used for the query (list)
+        :returns: UTC timestamps (datetime64[ns]) and values (float64) returned by the API (tuple)
+        """
+        params = {
+            'time-series-code':series_code,
+            'from':time_range[0],
+            'to': time_range[1]
+            }
+        delay = self.session.latency_tracker.hedge_delay() if self.config.hedge else None
+        if delay is None:
+            return decode_records(await self._send_async(url, params))
+
+        primary = asyncio.ensure_future(self._send_async(url, params))
+        done, _ = await asyncio.wait([primary], timeout=delay)
+        if done:
+            return decode_records(primary.result())
+
+        logging.debug(f'IWLS call slower than {delay:.3f} s, sending a hedged request: {url}')
+        hedge = asyncio.ensure_future(self._send_async(url, params))
+        done, pending = await asyncio.wait([primary, hedge], return_when=asyncio.FIRST_COMPLETED)
+        first = done.pop()
+        if first.exception() is not None and pending:
+            first = pending.pop()
+            await asyncio.wait([first])
+        # Cancelling the slower call closes its connection
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        return decode_records(first.result())
+
+    async def _send_async(self, url: str, params: dict) -> bytes:
+        """
+        Send a GET request, retry it while the retry policy of the session allows.
+
+        :param url: url used for the query (string)
+        :param params: query parameters (dict)
+        :returns: response body, raise the last error if every attempt failed (bytes)
+        """
+        retry_policy = self.session.retry_policy
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                # Waits between retries are spent outside the in-flight limit
+                async with self.runtime.semaphore:
+                    t_start = self.runtime.loop.time()
+                    async with self.runtime.client.get(url, params=params) as r:
+                        if not retry_policy.should_retry(attempt, r.status):
+                            if r.status >= 400:
+                                raise self._http_error(r.status, r.reason, str(r.url))
+                            content = await r.read()
+                            self.session.latency_tracker.record(self.runtime.loop.time() - t_start)
+                            return content
+                        status = r.status
+                        wait_time = retry_policy.wait_time(attempt, r.headers.get('Retry-After'))
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if not retry_policy.should_retry(attempt):
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise requests.exceptions.Timeout(f'IWLS call timed out: {url}') from e
+                    raise requests.exceptions.ConnectionError(f'{e}: {url}') from e
+                status = e.__class__.__name__
+                wait_time = retry_policy.wait_time(attempt)
+
+            logging.warning(f'IWLS call failed ({status}), retry {attempt} in {wait_time:.2f} s: {url}')
+            await asyncio.sleep(wait_time)
+
+    @staticmethod
+    def _http_error(status: int, reason: str, url: str) -> requests.exceptions.HTTPError:
+        """
+        Build the error raised by requests for an error status, as raised by the sync connectors.
+
+        :param status: HTTP status (int)
+        :param reason: HTTP reason phrase (string)
+        :param url: requested url (string)
+        :returns: error (requests.exceptions.HTTPError)
+        """
+        response = requests.Response()
+        response.status_code = status
+        response.reason = reason
+        response.url = url
+        kind = 'Client' if status < 500 else 'Server'
+
+        return requests.exceptions.HTTPError(f'{status} {kind} Error: {reason} for url: {url}', response=response)
+
+    async def _run_blocking(self, func, *args):
+        """
+        Run a blocking function in a worker thread, keeping the event loop free for other requests.
+
+        :param func: function to call (function)
+        :param args: arguments of func
+        :returns: result of func
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def _get_timeseries_async(self, url: str, time_range: list, series_code: str):
+        """
+        Async version of _get_timeseries, every chunk of the request plan is requested at once.
+
+        :param url: url used for queries (String)
+        :param time_range: start time and end time, returned by _get_station_data (list)
+        :param series_code: three letter identifer for time series (String)
+        returns: time stamps and values in time order (StationSeries)
+        """
+        if self.timeseries_cache is None:
+            buckets, plan = self._plan_timeseries(url, series_code, time_range)
+        else:
+            buckets, plan = await self._run_blocking(self._plan_timeseries, url, series_code, time_range)
+        chunks = await asyncio.gather(
+            *[self._fetch_plan_chunk_async(url, series_code, chunk, buckets is not None) for chunk in plan.chunks])
+
+        return self._merge_timeseries(plan, buckets, list(chunks))
+
+    async def _fetch_plan_chunk_async(self, url: str, series_code: str, chunk: tuple, use_store: bool):
+        """
+        Async version of _fetch_plan_chunk, the API call is shared with identical requests
+        of every async connector of the process running at the same time.
+
+        :param url: url used for queries (String)
+        :param series_code: three letter identifer for time series (String)
+        :param chunk: time range and UTC days of the request, from RequestPlan.chunks (tuple)
+        :param use_store: store the chunk in the local time series store (bool)
+        :returns: timestamps and values (tuple), or day buckets if use_store is True (dict)
+        """
+        chunk_range, days = chunk
+        if use_store:
+            fetch = lambda: self._fetch_chunk_stored_async(url, series_code, chunk_range, days)
+        else:
+            fetch = lambda: self._fetch_chunk_async(url, series_code, chunk_range)
+
+        if not self.config.single_flight:
+            return await fetch()
+        return await self.runtime.single_flight.do((url, series_code, *chunk_range, use_store), fetch)
+
+    async def _fetch_chunk_stored_async(self, url: str, series_code: str, chunk_range: list, days: list) -> dict:
+        """
+        Async version of _fetch_chunk_stored, the lock shared with other worker processes
+        is polled without blocking the event loop or a worker thread.
+
+        :param url: url used for queries (String)
+        :param series_code: three letter identifer for time series (String)
+        :param chunk_range: start time and end time of the request (list)
+        :param days: UTC days covered by the request (list of datetime.date)
+        :returns: timestamps and values by day (dict)
+        """
+        lock = self._chunk_lock(url, series_code, chunk_range)
+        if lock is None:
+            return await self._run_blocking(
+                self._store_chunk, url, series_code, days, *await self._fetch_chunk_async(url, series_code, chunk_range))
+
+        # Waiting for the lock in a worker thread would take the threads the lock holders need
+        # to read and write the store, the lock is polled from the event loop instead
+        while not lock.try_acquire():
+            await asyncio.sleep(self.lock_poll_interval)
+
+        try:
+            buckets = await self._run_blocking(self._stored_chunk, url, series_code, days)
+            if buckets is None:
+                buckets = await self._run_blocking(
+                    self._store_chunk, url, series_code, days, *await self._fetch_chunk_async(url, series_code, chunk_range))
+        finally:
+            lock.release()
+
+        return buckets
+
+    async def _get_station_series_async(self, url: str, time_range: list, series_codes: dict,
+                                        station_code: str = None) -> dict:
+        """
+        Async version of _get_station_series, series the station does not publish are not requested
+        and the station fails if a series is not returned before the station deadline.
+
+        :param url: url used for queries (String)
+        :param time_range: start time and end time, returned by _get_station_data (list)
+        :param series_codes: feature property name and IWLS code of every series (dict)
+        :param station_code: five digits station identifier, request every series if None (string)
+        :returns: feature property name and series returned by _get_timeseries (dict)
+        """
+        requested = self._published_series_codes(station_code, series_codes)
+        empty_series = StationSeries.empty()
+        series = dict.fromkeys(series_codes, empty_series)
+
+        if not requested:
+            return series
+
+        tasks = [asyncio.ensure_future(self._get_timeseries_async(url, time_range, code))
+                 for code in requested.values()]
+        done, pending = await asyncio.wait(tasks, timeout=self.config.station_deadline)
+
+        # Drop series still running after the deadline, partial results are not returned
+        for task in pending:
+            task.cancel()
+        if pending:
+            late = ', '.join(code for code, task in zip(requested.values(), tasks) if task in pending)
+            message = (f'Station {station_code or url} series deadline exceeded, {len(pending)} of {len(tasks)} '
+                       f'calls not completed within {self.config.station_deadline} seconds: {late}')
+            logging.warning(message)
+            raise requests.exceptions.Timeout(message)
+
+        series.update({name: task.result() for name, task in zip(requested.keys(), tasks)})
+        return series
+
+    async def _get_station_data_async(self, station_code: str, start_time: str, end_time: str, csv=False,
+                                      properties: list = None, skip_geometry: bool = False) -> dict:
+        """
+        Async version of the child class _get_station_data.
+
+        :param station_code: five digits station identifier (string)
+        :param  start_time: Start time, ISO 8601 format UTC (e.g.: 2019-11-13T19:18:00Z) (string)
+        :param  end_time: End time, ISO 8601 format UTC (e.g.: 2019-11-13T19:18:00Z) (string)
+        :param  csv:  Write csv file to disk if True, default = False(bool)
+        :param properties: feature properties to return, only these series are requested, all if empty or None (list)
+        :param skip_geometry: build the feature without geometry, metadata is not fetched unless selected (bool)
+        :returns: GeoJSON feature (dict)
+        """
+        series_codes, metadata_selected = self._select_properties(properties)
+        with_metadata = metadata_selected or not skip_geometry
+
+        # Station metadata missing from the in-memory cache comes from the blocking cached session,
+        # keep it off the event loop
+        if with_metadata and self.metadata_cache.missing([self._id_from_station_code(station_code)]):
+            time_range, metadata, url = await asyncio.get_running_loop().run_in_executor(
+                None, IwlsApiConnector._get_station_data, self, station_code, start_time, end_time)
+        else:
+            time_range, metadata, url = IwlsApiConnector._get_station_data(
+                self, station_code, start_time, end_time, with_metadata)
+
+        series = await self._get_station_series_async(url, time_range, series_codes, station_code)
+
+        if csv == True:
+            await self._run_blocking(lambda: self._station_data_to_csv(station_code, **series))
+
+        return self._build_feature(metadata, series, station_code, skip_geometry, metadata_selected)
+
+    async def _get_features_by_station_async(self, station_codes: list, start_time: str, end_time: str,
+                                             csv=False, properties: list = None,
+                                             skip_geometry: bool = False) -> list:
+        """
+        Async version of _get_features_by_station, every station is scheduled at once.
+
+        :param station_codes: five digits station identifiers (list)
+        :param  start_time: Start time, ISO 8601 format UTC (e.g.: 2019-11-13T19:18:00Z) (string)
+        :param  end_time: End time, ISO 8601 format UTC (e.g.: 2019-11-13T19:18:00Z) (string)
+        :param  csv:  Write csv file to disk if True, default = False(bool)
+        :param properties: feature properties to return, all if empty or None (list)
+        :param skip_geometry: build features without geometry (bool)
+        :returns: GeoJSON features in the same order as station_codes (list)
+        """
+        # Stations being fetched by this call, API calls are limited by the runtime semaphore
+        fan_out = InFlightGauge()
+
+        async def get_station_feature(station_code):
+            with self.stations_in_flight.track(), fan_out.track():
+                return await self._get_station_data_async(station_code, start_time, end_time, csv=csv,
+                                                          properties=properties, skip_geometry=skip_geometry)
+
+        features = await asyncio.gather(*[get_station_feature(i) for i in station_codes])
+
+        logging.info(f'Fetched {len(station_codes)} stations, '
+                     f'up to {fan_out.peak} stations in flight')
+
+        return list(features)
+
+    def _get_timeseries(self, url: str, time_range: list, series_code: str):
+        """
+        Blocking bridge to _get_timeseries_async.
+        """
+        return self.runtime.run(self._get_timeseries_async(url, time_range, series_code))
+
+    def _get_station_series(self, url: str, time_range: list, series_codes: dict,
+                            station_code: str = None) -> dict:
+        """
+        Blocking bridge to _get_station_series_async.
+        """
+        return self.runtime.run(
+            self._get_station_series_async(url, time_range, series_codes, station_code))
+
+    def _get_features_by_station(self, station_codes: list, start_time: str, end_time: str,
+                                 csv=False, properties: list = None, skip_geometry: bool = False) -> list:
+        """
+        Blocking bridge to _get_features_by_station_async.
+        """
+        return self.runtime.run(
+            self._get_features_by_station_async(station_codes, start_time, end_time, csv=csv,
+                                                properties=properties, skip_geometry=skip_geometry))
+
+class AsyncIwlsApiConnectorWaterLevels(AsyncIwlsApiConnector, IwlsApiConnectorWaterLevels):
+    """
+    Asyncio variant of IwlsApiConnectorWaterLevels.
+    """
+    def __init__(self, config: IwlsApiConfig = None):
+        super().__init__(config)
+
+class AsyncIwlsApiConnectorCurrents(AsyncIwlsApiConnector, IwlsApiConnectorCurrents):
+    """
+    Asyncio variant of IwlsApiConnectorCurrents.
+    """
+    def __init__(self, config: IwlsApiConfig = None):
+        super().__init__(config)
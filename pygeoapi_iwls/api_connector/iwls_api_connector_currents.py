@@ -5,16 +5,22 @@ import json
 import pandas as pd
 
 # Local imports
+from provider_iwls.api_connector.iwls_api_config import IwlsApiConfig
 from provider_iwls.api_connector.iwls_api_connector import IwlsApiConnector
 
 class IwlsApiConnectorCurrents(IwlsApiConnector):
     """
     Provider class used to retrieve iwls SurfaceCurrents data.
     """
-    def __init__(self):
-        super().__init__()
+    # Feature property name and IWLS code of every time series returned
+    series_codes = {'wcs': 'wcs1', 'wcd': 'wcd1'}
+    required_series = 'wcs1'
 
-    def _get_station_data(self, station_code: str, start_time: str, end_time: str, csv=False):
+    def __init__(self, config: IwlsApiConfig = None):
+        super().__init__(config)
+
+    def _get_station_data(self, station_code: str, start_time: str, end_time: str, csv=False,
+                          properties: list = None, skip_geometry: bool = False):
         """
         Get water level timeseries (observations, predictions, forecasts) for a single station.
 
@@ -23,37 +29,27 @@ class IwlsApiConnectorCurrents(IwlsApiConnector):
         :param  start_time: Start time, ISO 8601 format UTC (e.g.: 2019-11-13T19:18:00Z) (string)
         :param  end_time: End time, ISO 8601 format UTC (e.g.: 2019-11-13T19:18:00Z) (string)
         :param  csv:  Write csv file to disk if True, default = False(bool)
+        :param properties: feature properties to return, only these series are requested, all if empty or None (list)
+        :param skip_geometry: build the feature without geometry, metadata is not fetched unless selected (bool)
         :returns: GeoJSON containing requested station metadata and available water level time series for specified time range (Json)
         """
-        time_ranges_strings, metadata, url = super()._get_station_data(station_code, start_time, end_time)
+        series_codes, metadata_selected = self._select_properties(properties)
+        time_range, metadata, url = super()._get_station_data(
+            station_code, start_time, end_time, with_metadata=metadata_selected or not skip_geometry)
+
+        #Get Surface Currents observations (speed and direction) concurrently, if published by the station
+        series = self._get_station_series(url, time_range, series_codes, station_code)
 
-        #Get Surface Currents observations (speed and direction)
-        wcs = self._get_timeseries(url,time_ranges_strings,'wcs1')
-        wcd = self._get_timeseries(url,time_ranges_strings,'wcd1')
-        
         # Generate csv file if requested
         if csv == True:
-            self._station_data_to_csv(station_code, wcs, wcd)
+            self._station_data_to_csv(station_code, **series)
 
         # Build Geojson feature for station
-        station_geojson = {'type': 'Feature',
-                           'id': metadata['code'],
-                           'geometry':  {
-                               "type": "Point",
-                               "coordinates":[metadata['longitude'],metadata['latitude']]
-                           },
-                           'properties': {
-                               'metadata':metadata,
-                               'wcs':json.loads(wcs)['value'],
-                               'wcd':json.loads(wcd)['value'],
-                           }
-                           }
-
-
-        return station_geojson
+        return self._build_feature(metadata, series, station_code, skip_geometry, metadata_selected)
 
     def _get_timeseries_by_boundary(self, start_time: str, end_time: str,
-                                    bbox: list, limit=10, start_index=0, csv=False):
+                                    bbox: list, limit=10, start_index=0, csv=False,
+                                    properties: list = None, skip_geometry: bool = False):
         """
         Sends a request to retreive timeseries data in a specified bounding box.
 
@@ -63,24 +59,19 @@ class IwlsApiConnectorCurrents(IwlsApiConnector):
         :param limit: number of records to return (default 10) (int)
         :param start_index: starting record to return (default 0) (int)
         :param  csv:  Write csv file to disk if True, default = False(bool)
+        :param properties: feature properties to return, all if empty or None (list)
+        :param skip_geometry: build features without geometry (bool)
 
         :returns: dict of 0..n GeoJSON features (json)
         """
-        features = []
-
-        within_lat, within_lon, stations_list, end_index, timeseries_data = super()._get_timeseries_by_boundary(
+        stations_list, end_index, timeseries_data = super()._get_timeseries_by_boundary(
             start_time, end_time, bbox, limit, start_index
         )
-        stations_list = stations_list[stations_list['timeSeries'].astype(str).str.contains('wcs1')]
-
-        for stn in stations_list.code.iteritems():
-            # export to csv if requested
-            if csv ==True:
-                feature = self._get_station_data(stn[1], start_time, end_time)
-            else:
-                feature = self._get_station_data(stn[1], start_time, end_time)
+        # Fetch stations concurrently, features keep the station list order
+        features = self._get_features_by_station(
+            list(stations_list.code), start_time, end_time, csv=csv,
+            properties=properties, skip_geometry=skip_geometry)
 
-            features.append(feature)
         timeseries_data['features'] = features
 
         # with open('test.json', 'w', encoding='utf-8') as f:
@@ -93,19 +84,14 @@ class IwlsApiConnectorCurrents(IwlsApiConnector):
         Export single station data to a csv file written in the current folder
 
         :param station_code: five digits station identifier (string)
-        :param  wcs: wcs dataframe generated by _get_station_data (pd.Dataframe)
-        :param  wcd: wcd dataframe generated by _get_station_data (pd.Dataframe)
+        :param  wcs: wcs series generated by _get_station_data (StationSeries)
+        :param  wcd: wcd series generated by _get_station_data (StationSeries)
         :returns: csv file
         """
         data_dict= {'wcs':wcs,'wcd':wcd}
-        # Format time series into single dataframe 
-        series_data = pd.DataFrame()
-        for k,v in data_dict.items():
-            df_data = pd.read_json(v)
-            df_data.index.name = 'datetime'
-            df_data = df_data.rename(columns={'value':k})
-            series_data = series_data.merge(df_data, how='outer', left_index=True, right_index=True)
-            series_data = series_data.sort_index()
+        # Format time series into single dataframe, aligned on the union of timestamps
+        series_data = pd.concat([v.to_series(k) for k,v in data_dict.items()], axis=1).sort_index()
+        series_data.index.name = 'datetime'
 
         # Export dataframe to csv
         csv_name = f'{station_code}.csv'
@@ -5,16 +5,21 @@ import json
 import pandas as pd
 
 # Local imports
+from provider_iwls.api_connector.iwls_api_config import IwlsApiConfig
 from provider_iwls.api_connector.iwls_api_connector import IwlsApiConnector
 
 class IwlsApiConnectorWaterLevels(IwlsApiConnector):
     """
     Provider class used to retrieve iwls SurfaceCurrents data.
     """
-    def __init__(self):
-        super().__init__()
+    # Feature property name and IWLS code of every time series returned
+    series_codes = {'wlo': 'wlo', 'wlp': 'wlp', 'wlf': 'wlf', 'spine': 'wlf-spine'}
 
-    def _get_station_data(self, station_code: str, start_time: str, end_time: str, csv=False):
+    def __init__(self, config: IwlsApiConfig = None):
+        super().__init__(config)
+
+    def _get_station_data(self, station_code: str, start_time: str, end_time: str, csv=False,
+                          properties: list = None, skip_geometry: bool = False):
         """
         Get water level timeseries (observations, predictions, forecasts) for a single station.
 
@@ -23,41 +28,27 @@ class IwlsApiConnectorWaterLevels(IwlsApiConnector):
         :param  start_time: Start time, ISO 8601 format UTC (e.g.: 2019-11-13T19:18:00Z) (string)
         :param  end_time: End time, ISO 8601 format UTC (e.g.: 2019-11-13T19:18:00Z) (string)
         :param  csv:  Write csv file to disk if True, default = False(bool)
+        :param properties: feature properties to return, only these series are requested, all if empty or None (list)
+        :param skip_geometry: build the feature without geometry, metadata is not fetched unless selected (bool)
         :returns: GeoJSON containing requested station metadata and available water level time series for specified time range (Json)
         """
-        time_ranges_strings, metadata, url = super()._get_station_data(station_code, start_time, end_time)
+        series_codes, metadata_selected = self._select_properties(properties)
+        time_range, metadata, url = super()._get_station_data(
+            station_code, start_time, end_time, with_metadata=metadata_selected or not skip_geometry)
 
-        # Get Observations, Predictions, Forecasts and SPINE
-        wlo = self._get_timeseries(url,time_ranges_strings,'wlo')
-        wlp = self._get_timeseries(url,time_ranges_strings,'wlp')
-        wlf = self._get_timeseries(url,time_ranges_strings,'wlf')
-        spine = self._get_timeseries(url,time_ranges_strings,'wlf-spine')
+        # Get Observations, Predictions, Forecasts and SPINE concurrently, if published by the station
+        series = self._get_station_series(url, time_range, series_codes, station_code)
 
         # Generate csv file if requested
         if csv == True:
-            self._station_data_to_csv(station_code, wlo, wlp, wlf, spine)
+            self._station_data_to_csv(station_code, **series)
 
         # Build Geojson feature for station
-        station_geojson = {'type': 'Feature',
-                           'id': metadata['code'],
-                           "geometry": {
-                               "type": "Point",
-                               "coordinates":[metadata['longitude'],metadata['latitude']]
-                           },
-                           'properties':  {
-                               'metadata':metadata,
-                               'wlo':json.loads(wlo)['value'],
-                               'wlp':json.loads(wlp)['value'],
-                               'wlf':json.loads(wlf)['value'],
-                               'spine':json.loads(spine)['value']
-                               }
-                           }
-
-
-        return station_geojson
+        return self._build_feature(metadata, series, station_code, skip_geometry, metadata_selected)
 
     def _get_timeseries_by_boundary(self, start_time: str, end_time: str, bbox: list,
-                                             limit=10, start_index=0, csv=False):
+                                             limit=10, start_index=0, csv=False,
+                                             properties: list = None, skip_geometry: bool = False):
         """
         Retrieves timeseries data from a bounding box.
 
@@ -67,22 +58,18 @@ class IwlsApiConnectorWaterLevels(IwlsApiConnector):
         :param limit: number of records to return (default 10) (int)
         :param start_index: starting record to return (default 0) (int)
         :param  csv:  Write csv file to disk if True, default = False(bool)
+        :param properties: feature properties to return, all if empty or None (list)
+        :param skip_geometry: build features without geometry (bool)
         :returns: dict of 0..n GeoJSON features
         """
-        features = []
-
-        within_lat, within_lon, stations_list, end_index, timeseries_data = super()._get_timeseries_by_boundary(
+        stations_list, end_index, timeseries_data = super()._get_timeseries_by_boundary(
             start_time, end_time,bbox, limit, start_index
         )
 
-        for stn in stations_list.code.iteritems():
-            # export to csv if requested
-            if csv == True:
-                feature = self._get_station_data(stn[1],start_time,end_time,csv=True)
-            else:
-                feature = self._get_station_data(stn[1],start_time,end_time)
-
-            features.append(feature)
+        # Fetch stations concurrently, features keep the station list order
+        features = self._get_features_by_station(
+            list(stations_list.code), start_time, end_time, csv=csv,
+            properties=properties, skip_geometry=skip_geometry)
 
         timeseries_data['features'] = features
 
@@ -96,21 +83,16 @@ class IwlsApiConnectorWaterLevels(IwlsApiConnector):
         Export single station data to a csv file written in the current folder
 
         :param station_code: five digits station identifier (string)
-        :param  wlo: wlo dataframe generated by _get_station_data (pd.Dataframe)
-        :param  wlf: wlf dataframe generated by _get_station_data (pd.Dataframe)
-        :param  wlp: wlp dataframe generated by _get_station_data (pd.Dataframe)
-        :param  spine: spine dataframe generated by _get_station_data (pd.Dataframe)
+        :param  wlo: wlo series generated by _get_station_data (StationSeries)
+        :param  wlf: wlf series generated by _get_station_data (StationSeries)
+        :param  wlp: wlp series generated by _get_station_data (StationSeries)
+        :param  spine: spine series generated by _get_station_data (StationSeries)
         :returns: csv file
         """
         data_dict= {'wlo':wlo,'wlf':wlf,'wlp':wlp,'spine':spine}
-        # Format time series into single dataframe 
-        series_data = pd.DataFrame()
-        for k,v in data_dict.items():
-            df_data = pd.read_json(v)
-            df_data.index.name = 'datetime'
-            df_data = df_data.rename(columns={'value':k})
-            series_data = series_data.merge(df_data, how='outer', left_index=True, right_index=True)
-            series_data = series_data.sort_index()
+        # Format time series into single dataframe, aligned on the union of timestamps
+        series_data = pd.concat([v.to_series(k) for k,v in data_dict.items()], axis=1).sort_index()
+        series_data.index.name = 'datetime'
 
         # Export dataframe to csv
         csv_name = f'{station_code}.csv'
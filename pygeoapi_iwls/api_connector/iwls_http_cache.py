@@ -0,0 +1,201 @@
+# Standard library imports
+import time
+import sqlite3
+import logging
+import threading
+import collections
+
+# Packages imports
+from requests_cache.backends import BaseCache, FileCache
+from requests_cache.backends.base import DictStorage
+from requests_cache.backends.sqlite import SQLiteDict, SQLitePickleDict
+
+# Local imports
+from provider_iwls.api_connector.iwls_shared import Shared
+
+class LruDictStorage(DictStorage):
+    """
+    In-memory response storage holding at most max_entries items,
+    least recently used items are dropped first.
+    """
+    def __init__(self, max_entries: int = None):
+        """
+        Init method.
+
+        :param max_entries: number of items kept, no limit if None (int)
+        """
+        super().__init__()
+        self.data = collections.OrderedDict()
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            item = super().__getitem__(key)
+            self.data.move_to_end(key)
+            return item
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while self.max_entries and len(self.data) > self.max_entries:
+                self.data.popitem(last=False)
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self.data[key]
+
+class LruMemoryCache(BaseCache):
+    """
+    requests_cache backend keeping responses in memory, bounded by max_entries.
+    """
+    def __init__(self, cache_name: str = 'http_cache', max_entries: int = None, **kwargs):
+        super().__init__(cache_name, **kwargs)
+        self.responses = LruDictStorage(max_entries)
+        self.redirects = LruDictStorage(max_entries)
+
+class LruSQLiteDict(SQLiteDict):
+    """
+    SQLite table of a requests_cache backend in WAL mode, bounded by max_entries.
+    Every read updates the access time of the row, least recently used rows are dropped first.
+    """
+    def __init__(self, db_path, table_name: str = 'http_cache', max_entries: int = None, **kwargs):
+        self.max_entries = max_entries
+        super().__init__(db_path, table_name=table_name, **kwargs)
+
+    def init_db(self):
+        """
+        Create the table, add the access time column to tables created by requests_cache.
+        """
+        super().init_db()
+        with self._lock, self.connection(commit=True) as con:
+            # WAL lets every worker process read while another one writes a response
+            con.execute('PRAGMA journal_mode=WAL')
+            columns = [row[1] for row in con.execute(f'PRAGMA table_info({self.table_name})')]
+            if 'accessed' not in columns:
+                con.execute(f'ALTER TABLE {self.table_name} ADD COLUMN accessed REAL')
+                con.execute(f'CREATE INDEX IF NOT EXISTS {self.table_name}_accessed '
+                            f'ON {self.table_name} (accessed)')
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if self.max_entries:
+            try:
+                with self.connection(commit=True) as con:
+                    con.execute(f'UPDATE {self.table_name} SET accessed=? WHERE key=?', (time.time(), key))
+            except sqlite3.OperationalError as e:
+                # Another process is writing, the access time is only used for eviction
+                logging.debug(f'HTTP cache access time not updated: {e}')
+        return value
+
+    def __setitem__(self, key, value):
+        with self.connection(commit=True) as con:
+            con.execute(
+                f'INSERT OR REPLACE INTO {self.table_name} (key,value,accessed) VALUES (?,?,?)',
+                (key, value, time.time()))
+            if self.max_entries:
+                con.execute(
+                    f'DELETE FROM {self.table_name} WHERE key IN (SELECT key FROM {self.table_name} '
+                    f'ORDER BY accessed LIMIT max(0, (SELECT COUNT(*) FROM {self.table_name}) - ?))',
+                    (self.max_entries,))
+
+class LruSQLitePickleDict(SQLitePickleDict, LruSQLiteDict):
+    """
+    Same as LruSQLiteDict, but serializes values before saving.
+    """
+
+class LruSQLiteCache(BaseCache):
+    """
+    requests_cache backend keeping responses in a SQLite file in WAL mode, bounded by max_entries.
+    """
+    def __init__(self, db_path: str = 'http_cache', max_entries: int = None, **kwargs):
+        super().__init__(cache_name=db_path, **kwargs)
+        self.responses = LruSQLitePickleDict(db_path, table_name='responses', max_entries=max_entries, **kwargs)
+        self.redirects = LruSQLiteDict(db_path, table_name='redirects', max_entries=max_entries, **kwargs)
+
+class HttpCache(Shared):
+    """
+    requests_cache backend shared by every session of the process, with hit and miss counters.
+    Backends are 'filesystem' (folder), 'sqlite' (file), 'memory' or 'redis' (url).
+    """
+    @classmethod
+    def shared(cls, backend: str = 'filesystem', location: str = 'http_cache', max_entries: int = None):
+        """
+        Return the cache matching the settings, create it on first use.
+
+        :param backend: 'filesystem', 'sqlite', 'memory' or 'redis' (string)
+        :param location: cache folder, SQLite file or redis url (string)
+        :param max_entries: number of responses kept by the memory and sqlite backends, no limit if None (int)
+        :returns: shared cache (HttpCache)
+        """
+        return cls._shared((backend, location, max_entries), lambda: cls(backend, location, max_entries))
+
+    def __init__(self, backend: str = 'filesystem', location: str = 'http_cache', max_entries: int = None):
+        """
+        Init method, create the requests_cache backend.
+
+        :param backend: 'filesystem', 'sqlite', 'memory' or 'redis' (string)
+        :param location: cache folder, SQLite file or redis url (string)
+        :param max_entries: number of responses kept by the memory and sqlite backends, no limit if None (int)
+        """
+        self.name = backend
+        self.backend = self._create_backend(backend, location, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._counters_lock = threading.Lock()
+
+    @staticmethod
+    def _create_backend(backend: str, location: str, max_entries: int) -> BaseCache:
+        """
+        Create a requests_cache backend.
+
+        :param backend: 'filesystem', 'sqlite', 'memory' or 'redis' (string)
+        :param location: cache folder, SQLite file or redis url (string)
+        :param max_entries: number of responses kept by the memory and sqlite backends, no limit if None (int)
+        :returns: requests_cache backend (BaseCache)
+        """
+        if backend == 'filesystem':
+            if max_entries:
+                logging.warning('http_cache_max_entries is ignored by the filesystem HTTP cache')
+            return FileCache(location)
+
+        if backend == 'sqlite':
+            return LruSQLiteCache(location, max_entries=max_entries, timeout=30)
+
+        if backend == 'memory':
+            return LruMemoryCache(max_entries=max_entries)
+
+        if backend == 'redis':
+            try:
+                from redis import StrictRedis
+                from requests_cache.backends.redis import RedisCache
+            except ImportError:
+                raise ImportError('redis must be installed to use the redis HTTP cache')
+            # Size and eviction are set on the server, e.g. maxmemory and maxmemory-policy allkeys-lru
+            if max_entries:
+                logging.warning('http_cache_max_entries is ignored by the redis HTTP cache')
+            return RedisCache(connection=StrictRedis.from_url(location))
+
+        raise ValueError(f'Unknown HTTP cache backend: {backend}')
+
+    def record(self, from_cache: bool):
+        """
+        Count a response read from the cache or requested from the API.
+
+        :param from_cache: True if the response was read from the cache (bool)
+        """
+        with self._counters_lock:
+            if from_cache:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        """
+        Return the cache counters.
+
+        :returns: backend name, hits, misses and number of responses stored (dict)
+        """
+        return {'backend': self.name, 'hits': self.hits, 'misses': self.misses,
+                'entries': len(self.backend.responses)}
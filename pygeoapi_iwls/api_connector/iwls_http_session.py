@@ -0,0 +1,218 @@
+# Standard library imports
+import time
+import logging
+import threading
+import requests
+import requests_cache
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Packages imports
+from requests.adapters import HTTPAdapter
+
+# Local imports
+from provider_iwls.api_connector.iwls_request_policy import RetryPolicy
+from provider_iwls.api_connector.iwls_http_cache import HttpCache
+
+class IwlsHttpSession():
+    """
+    Thread-safe pooled HTTP session used for every call to the IWLS API.
+    A single connection pool is shared by all threads, each thread gets its own
+    requests session mounted on that pool. Failed calls are retried according to
+    the retry policy, slow calls can be hedged with a duplicate request.
+    """
+    # Threads sending hedged calls, shared by every session of the process
+    hedge_workers = 32
+    _hedge_executor = None
+    _hedge_executor_lock = threading.Lock()
+    # Free threads, a call queued behind busy threads would reach the hedge delay before being sent
+    _hedge_slots = threading.BoundedSemaphore(hedge_workers)
+
+    def __init__(self, pool_size: int = 16, connect_timeout: float = 3.05,
+                 read_timeout: float = 30.0, keep_alive: bool = True,
+                 retry_policy: RetryPolicy = None, latency_tracker=None, http_cache: HttpCache = None):
+        """
+        Init method, create the shared connection pool.
+
+        :param pool_size: number of connections kept open per host (int)
+        :param connect_timeout: seconds to wait for a connection to be established (float)
+        :param read_timeout: seconds to wait between bytes received from the server (float)
+        :param keep_alive: reuse connections between requests if True (bool)
+        :param retry_policy: when to retry failed calls, never retried if None (RetryPolicy)
+        :param latency_tracker: recent call latencies, calls are never hedged if None (LatencyTracker)
+        :param http_cache: backend of cached calls, filesystem cache in the working folder if None (HttpCache)
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.headers = {'Connection': 'keep-alive' if keep_alive else 'close'}
+        self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=0)
+        self.latency_tracker = latency_tracker
+        self.http_cache = http_cache or HttpCache.shared()
+        self._local = threading.local()
+
+    def _mount(self, session: requests.Session) -> requests.Session:
+        """
+        Mount the shared connection pool on a session.
+
+        :param session: session to configure (requests.Session)
+        :returns: configured session (requests.Session)
+        """
+        session.mount('https://', self.adapter)
+        session.mount('http://', self.adapter)
+        session.headers.update(self.headers)
+        return session
+
+    def _session(self) -> requests.Session:
+        """
+        Return the plain session owned by the calling thread.
+
+        :returns: session (requests.Session)
+        """
+        if not hasattr(self._local, 'session'):
+            self._local.session = self._mount(requests.Session())
+        return self._local.session
+
+    def _cached_session(self) -> requests_cache.CachedSession:
+        """
+        Return the cached session owned by the calling thread.
+
+        :returns: session (requests_cache.CachedSession)
+        """
+        if not hasattr(self._local, 'cached_session'):
+            self._local.cached_session = self._mount(
+                requests_cache.CachedSession(backend=self.http_cache.backend))
+        return self._local.cached_session
+
+    @classmethod
+    def _executor(cls) -> ThreadPoolExecutor:
+        """
+        Return the executor sending hedged calls, create it on first use.
+
+        :returns: executor (ThreadPoolExecutor)
+        """
+        with cls._hedge_executor_lock:
+            if cls._hedge_executor is None:
+                cls._hedge_executor = ThreadPoolExecutor(max_workers=cls.hedge_workers, thread_name_prefix='iwls-hedge')
+            return cls._hedge_executor
+
+    def _submit(self, url: str, params: dict):
+        """
+        Send a GET request from a thread of the hedge executor, only if one is free.
+
+        :param url: url used for the query (string)
+        :param params: query parameters (dict)
+        :returns: call (concurrent.futures.Future), None if every thread is busy
+        """
+        slots = self._hedge_slots
+        if not slots.acquire(blocking=False):
+            return None
+        future = self._executor().submit(self._send, self._session, url, params)
+        future.add_done_callback(lambda future: slots.release())
+        return future
+
+    def get(self, url: str, params: dict = None, expire_after: int = None, hedge: bool = False) -> requests.Response:
+        """
+        Send a GET request through the connection pool.
+
+        :param url: url used for the query (string)
+        :param params: query parameters (dict)
+        :param expire_after: if set, use requests_cache and keep the response for this many seconds (int)
+        :param hedge: send a duplicate request if the call is slower than usual, ignored for cached calls (bool)
+        :returns: response (requests.Response)
+        """
+        if expire_after is not None:
+            r = self._send(self._cached_session, url, params, expire_after=expire_after)
+            self.http_cache.record(getattr(r, 'from_cache', False))
+            return r
+
+        if hedge and self.latency_tracker is not None:
+            return self._hedged_send(url, params)
+
+        return self._send(self._session, url, params)
+
+    def _send(self, get_session, url: str, params: dict, **kwargs) -> requests.Response:
+        """
+        Send a GET request, retry it while the retry policy allows.
+
+        :param get_session: returns the session of the calling thread (function)
+        :param url: url used for the query (string)
+        :param params: query parameters (dict)
+        :param kwargs: other arguments of the session get method
+        :returns: last response received, raise the last connection error if no response (requests.Response)
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            t_start = time.monotonic()
+            try:
+                r = get_session().get(url=url, params=params, timeout=self.timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if not self.retry_policy.should_retry(attempt):
+                    raise
+                wait_time = self.retry_policy.wait_time(attempt)
+                logging.warning(f'IWLS call failed ({e.__class__.__name__}), retry {attempt} in {wait_time:.2f} s: {url}')
+                time.sleep(wait_time)
+                continue
+
+            if self.retry_policy.should_retry(attempt, r.status_code):
+                wait_time = self.retry_policy.wait_time(attempt, r.headers.get('Retry-After'))
+                logging.warning(f'IWLS call returned {r.status_code}, retry {attempt} in {wait_time:.2f} s: {url}')
+                time.sleep(wait_time)
+                continue
+
+            # Only latencies of calls sent to the API are used to decide when to hedge
+            if r.ok and self.latency_tracker is not None and not getattr(r, 'from_cache', False):
+                self.latency_tracker.record(time.monotonic() - t_start)
+            return r
+
+    def _hedged_send(self, url: str, params: dict) -> requests.Response:
+        """
+        Send a GET request, send a duplicate if no response is received within the
+        hedge delay and return the first successful response.
+
+        :param url: url used for the query (string)
+        :param params: query parameters (dict)
+        :returns: response (requests.Response)
+        """
+        delay = self.latency_tracker.hedge_delay()
+        if delay is None:
+            return self._send(self._session, url, params)
+
+        # Calls are not hedged while the hedge threads are saturated
+        primary = self._submit(url, params)
+        if primary is None:
+            logging.debug(f'Hedge threads busy, IWLS call sent without hedging: {url}')
+            return self._send(self._session, url, params)
+        if wait([primary], timeout=delay).done:
+            return primary.result()
+
+        hedge = self._submit(url, params)
+        if hedge is None:
+            return primary.result()
+        logging.debug(f'IWLS call slower than {delay:.3f} s, sending a hedged request: {url}')
+
+        done, pending = wait([primary, hedge], return_when=FIRST_COMPLETED)
+        first = done.pop()
+        if first.exception() is not None and pending:
+            first = pending.pop()
+            wait([first])
+        # A call still running can not be interrupted, its response is closed when received
+        for future in pending:
+            if not future.cancel():
+                future.add_done_callback(self._close_response)
+        return first.result()
+
+    @staticmethod
+    def _close_response(future):
+        """
+        Close the response of a hedged call that lost the race, its connection goes back to the pool.
+
+        :param future: completed call (concurrent.futures.Future)
+        """
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
+
+    def close(self):
+        """
+        Close every pooled connection.
+        """
+        self.adapter.close()
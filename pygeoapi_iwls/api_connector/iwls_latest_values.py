@@ -0,0 +1,85 @@
+# Standard library imports
+import time
+import logging
+import threading
+
+# Local imports
+from provider_iwls.api_connector.iwls_shared import Shared, settings_key
+
+class LatestValues(Shared):
+    """
+    In-memory table of the latest value of one time series for every station, keyed by
+    station code. A background thread refreshes the table every interval seconds until
+    the table is closed, reads never call the IWLS API.
+    """
+    @classmethod
+    def shared(cls, key, loader, interval: float = 60.0):
+        """
+        Return the table of an IWLS API, time series and refresh interval, start its poller on first use.
+
+        :param key: identifies the IWLS API and time series, e.g. (summary url, series code) (hashable)
+        :param loader: function returning the new table from the previous one (function)
+        :param interval: seconds between two refreshes (float)
+        :returns: shared table (LatestValues)
+        """
+        return cls._shared(settings_key(key, interval), lambda: cls(loader, interval))
+
+    def __init__(self, loader, interval: float = 60.0):
+        """
+        Init method, start the poller thread. The table is empty until the first refresh completes.
+
+        :param loader: function returning the new table from the previous one (function)
+        :param interval: seconds between two refreshes (float)
+        """
+        self.loader = loader
+        self.interval = interval
+        self.values = {}
+        self.updated_at = None
+        self.ready = threading.Event()
+        self._closed = threading.Event()
+
+        self._poller = threading.Thread(target=self._poll_loop, name='iwls-latest-values', daemon=True)
+        self._poller.start()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def get(self, station_code: str) -> dict:
+        """
+        Return the latest value of a station.
+
+        :param station_code: five digits station identifier (string)
+        :returns: latest value entry, None if the station has no value yet (dict)
+        """
+        return self.values.get(station_code)
+
+    def close(self):
+        """
+        Stop the poller thread, the table keeps its last values. A new table is created
+        by the next caller of shared().
+        """
+        self._closed.set()
+        self._discard()
+        self._poller.join()
+
+    def _poll_loop(self):
+        """
+        Refresh the table every interval seconds, keep the previous table if it fails.
+        """
+        while not self._closed.is_set():
+            started = time.monotonic()
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f'Latest values refresh failed, keeping previous table: {e}')
+            self._closed.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def refresh(self):
+        """
+        Build the new table from the previous one and swap it in a single assignment,
+        readers always see either the previous or the new table.
+        """
+        self.values = self.loader(self.values)
+        self.updated_at = time.time()
+        self.ready.set()
+        logging.info(f'Latest values refreshed, {len(self.values)} stations')
@@ -0,0 +1,151 @@
+# Standard library imports
+import os
+import json
+import time
+import logging
+import threading
+import collections
+
+# Local imports
+from provider_iwls.api_connector.iwls_shared import Shared, settings_key
+
+class MetadataCache(Shared):
+    """
+    In-memory LRU of station metadata keyed by IWLS station id, in front of the
+    requests_cache filesystem cache. Entries can be loaded in bulk at startup and
+    saved to a JSON snapshot, so metadata lookups on the request path stay in memory.
+    """
+    @classmethod
+    def shared(cls, key: str, **kwargs):
+        """
+        Return the metadata cache of an IWLS API and settings, create it on first use.
+
+        :param key: identifies the IWLS API, e.g. the stations summary url (string)
+        :param kwargs: other arguments of __init__
+        :returns: shared cache (MetadataCache)
+        """
+        return cls._shared(settings_key(key, **kwargs), lambda: cls(**kwargs))
+
+    def __init__(self, max_entries: int = 4096, ttl: float = 2629746.0, snapshot_path: str = None):
+        """
+        Init method, load the snapshot if it exists.
+
+        :param max_entries: number of stations kept, least recently used dropped first (int)
+        :param ttl: seconds before the metadata of a station is requested again (float)
+        :param snapshot_path: JSON file the cache is loaded from and saved to, not saved if None (string)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.snapshot_path = snapshot_path
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._entries_lock = threading.Lock()
+        self._warm_up_thread = None
+
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.load_snapshot()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, station_id: str) -> dict:
+        """
+        Return the metadata of a station, None if unknown or expired.
+
+        :param station_id: unique IWLS database id (string)
+        :returns: station metadata (dict)
+        """
+        with self._entries_lock:
+            entry = self._entries.get(station_id)
+            if entry is None or entry[0] <= time.time():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(station_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, station_id: str, metadata: dict, expires_at: float = None):
+        """
+        Store the metadata of a station, drop the least recently used stations above max_entries.
+
+        :param station_id: unique IWLS database id (string)
+        :param metadata: station metadata (dict)
+        :param expires_at: expiry time, seconds since epoch, now + ttl if None (float)
+        """
+        if expires_at is None:
+            expires_at = time.time() + self.ttl
+
+        with self._entries_lock:
+            self._entries[station_id] = (expires_at, metadata)
+            self._entries.move_to_end(station_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def missing(self, station_ids: list) -> list:
+        """
+        Return the stations without valid metadata in the cache, without counting hits or misses.
+
+        :param station_ids: unique IWLS database ids (list)
+        :returns: unique IWLS database ids (list)
+        """
+        now = time.time()
+        with self._entries_lock:
+            return [i for i in station_ids if i not in self._entries or self._entries[i][0] <= now]
+
+    def load_snapshot(self):
+        """
+        Load the entries still valid from the snapshot file, keep the cache unchanged if it is unreadable.
+        """
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f'Station metadata snapshot ignored, {self.snapshot_path} unreadable: {e}')
+            return
+
+        now = time.time()
+        for station_id, (expires_at, metadata) in snapshot.items():
+            if expires_at > now:
+                self.put(station_id, metadata, expires_at)
+        logging.info(f'Station metadata snapshot loaded, {len(self)} stations')
+
+    def save_snapshot(self):
+        """
+        Save every entry to the snapshot file. The file is replaced in a single rename,
+        other processes always read either the previous or the new snapshot.
+        """
+        if not self.snapshot_path:
+            return
+
+        with self._entries_lock:
+            snapshot = dict(self._entries)
+
+        temp_path = f'{self.snapshot_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(temp_path, self.snapshot_path)
+
+    def start_warm_up(self, warm_up):
+        """
+        Run the warm-up in a background thread, once per process.
+
+        :param warm_up: function loading every station in the cache (function)
+        """
+        with self._entries_lock:
+            if self._warm_up_thread is not None:
+                return
+            self._warm_up_thread = threading.Thread(
+                target=self._run_warm_up, args=(warm_up,), name='iwls-metadata-warm-up', daemon=True)
+        self._warm_up_thread.start()
+
+    def _run_warm_up(self, warm_up):
+        """
+        Run the warm-up function and log failures, requests fall back to the API.
+
+        :param warm_up: function loading every station in the cache (function)
+        """
+        try:
+            warm_up()
+        except Exception as e:
+            logging.error(f'Station metadata warm-up failed: {e}')
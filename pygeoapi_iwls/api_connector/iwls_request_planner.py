@@ -0,0 +1,150 @@
+# Standard library imports
+import datetime
+import dateutil.parser
+from dataclasses import dataclass, field
+
+# IWLS API time stamp format, always UTC
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+@dataclass
+class RequestPlan:
+    """
+    Class to store the requests needed to get one time series of a station.
+    Every chunk covers whole UTC days, clipped to the requested time range unless
+    whole days are requested.
+    """
+    series_code: str
+    start_time: str
+    end_time: str
+    window_days: int
+    # Time range of every request and the UTC days it covers, e.g. (['2023-01-01T00:00:00Z', ...], [date, ...])
+    chunks: list = field(default_factory=list)
+    # UTC days of the time range not requested, e.g. found in the local time series store
+    skipped_days: list = field(default_factory=list)
+
+    @property
+    def time_ranges(self) -> list:
+        """
+        Time range of every request, e.g. [['2023-01-01T00:00:00Z', '2023-01-07T23:59:59Z']].
+        """
+        return [time_range for time_range, days in self.chunks]
+
+    def report(self) -> str:
+        """
+        Describe the plan in a single line, used for logging.
+
+        :returns: plan summary (string)
+        """
+        requested_days = sum(len(days) for time_range, days in self.chunks)
+        return (f'{self.series_code} {self.start_time}/{self.end_time}: '
+                f'{len(self.chunks)} requests of up to {self.window_days} days '
+                f'covering {requested_days} days, {len(self.skipped_days)} days skipped')
+
+class RequestPlanner:
+    """
+    Split the time range of a request in the fewest IWLS API requests allowed.
+    The API returns at most 7 days of data per request, chunk boundaries are
+    aligned on UTC days so chunks match the day buckets of the time series store.
+    """
+    def __init__(self, max_window_days: int = 7, series_window_days: dict = None):
+        """
+        Init method.
+
+        :param max_window_days: maximum number of days per request (int)
+        :param series_window_days: maximum number of days per request for specific series codes, e.g. {'wlo': 7} (dict)
+        """
+        assert max_window_days >= 1, f'max_window_days must be at least 1, not {max_window_days}'
+        self.max_window_days = max_window_days
+        self.series_window_days = series_window_days or {}
+
+    def window_days(self, series_code: str) -> int:
+        """
+        Return the maximum number of days per request for a series.
+
+        :param series_code: IWLS time series code (string)
+        :returns: number of days (int)
+        """
+        return self.series_window_days.get(series_code, self.max_window_days)
+
+    @staticmethod
+    def normalize_time(time: str) -> str:
+        """
+        Convert a time stamp to the UTC format used by the IWLS API.
+
+        :param time: ISO 8601 time stamp, UTC if no offset is given (string)
+        :returns: time stamp, e.g. 2019-11-13T19:18:00Z (string)
+        """
+        time_dt = dateutil.parser.parse(time)
+        if time_dt.tzinfo is not None:
+            time_dt = time_dt.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+        return time_dt.strftime(TIME_FORMAT)
+
+    def normalize_range(self, start_time: str, end_time: str) -> list:
+        """
+        Convert the start and end time of a request to the UTC format used by the IWLS API.
+
+        :param  start_time: Start time, ISO 8601 format (e.g.: 2019-11-13T19:18:00Z) (string)
+        :param  end_time: End time, ISO 8601 format (e.g.: 2019-11-13T19:18:00Z) (string)
+        :returns: start time and end time (list)
+        """
+        return [self.normalize_time(start_time), self.normalize_time(end_time)]
+
+    def plan(self, series_code: str, time_range: list, skip_days=(), whole_days: bool = False) -> RequestPlan:
+        """
+        Plan the requests needed to get one time series.
+
+        :param series_code: IWLS time series code (string)
+        :param time_range: start time and end time, returned by normalize_range (list)
+        :param skip_days: UTC days not to request (iterable of datetime.date)
+        :param whole_days: request whole UTC days even if the time range starts or ends within a day (bool)
+        :returns: requests to send (RequestPlan)
+        """
+        start_time, end_time = time_range
+        window_days = self.window_days(series_code)
+        plan = RequestPlan(series_code, start_time, end_time, window_days)
+
+        skip_days = set(skip_days)
+        days = days_between(start_time, end_time)
+        plan.skipped_days = [day for day in days if day in skip_days]
+
+        for chunk_range, chunk_days in day_ranges([day for day in days if day not in skip_days], window_days):
+            if not whole_days:
+                chunk_range = [max(chunk_range[0], start_time), min(chunk_range[1], end_time)]
+            plan.chunks.append((chunk_range, chunk_days))
+
+        return plan
+
+def days_between(start_time: str, end_time: str) -> list:
+    """
+    Return every UTC day overlapped by a time range, empty if it ends before it starts.
+
+    :param start_time: Start time, ISO 8601 format UTC (e.g.: 2019-11-13T19:18:00Z) (string)
+    :param end_time: End time, ISO 8601 format UTC (e.g.: 2019-11-13T19:18:00Z) (string)
+    :returns: UTC days (list of datetime.date)
+    """
+    if end_time < start_time:
+        return []
+
+    first = datetime.date.fromisoformat(start_time[:10])
+    last = datetime.date.fromisoformat(end_time[:10])
+
+    return [first + datetime.timedelta(days=i) for i in range((last - first).days + 1)]
+
+def day_ranges(days: list, max_days: int) -> list:
+    """
+    Group consecutive days in query time ranges covering whole days.
+
+    :param days: UTC days in ascending order (list of datetime.date)
+    :param max_days: maximum number of days per time range (int)
+    :returns: time ranges and the days they cover, e.g. [(['2023-01-01T00:00:00Z', '2023-01-02T23:59:59Z'], [...])] (list)
+    """
+    groups = []
+    for day in days:
+        if groups and day - groups[-1][-1] == datetime.timedelta(days=1) and len(groups[-1]) < max_days:
+            groups[-1].append(day)
+        else:
+            groups.append([day])
+
+    return [([f'{group[0].isoformat()}T00:00:00Z', f'{group[-1].isoformat()}T23:59:59Z'], group)
+            for group in groups]
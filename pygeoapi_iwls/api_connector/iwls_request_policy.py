@@ -0,0 +1,138 @@
+# Standard library imports
+import random
+import threading
+import contextlib
+import collections
+
+# Packages imports
+import numpy as np
+
+# Local imports
+from provider_iwls.api_connector.iwls_shared import Shared, settings_key
+
+class RetryPolicy():
+    """
+    Decide when a failed IWLS API call is sent again and how long to wait before.
+    Waits grow exponentially with full jitter, a Retry-After header is honoured.
+    """
+    # Throttled or temporary server errors
+    retry_statuses = frozenset((429, 500, 502, 503, 504))
+
+    def __init__(self, max_retries: int = 3, backoff: float = 0.5, backoff_max: float = 10.0):
+        """
+        Init method.
+
+        :param max_retries: number of retries after the first attempt, never retry if 0 (int)
+        :param backoff: seconds of the first wait, doubled at every retry (float)
+        :param backoff_max: longest wait in seconds (float)
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+
+    def should_retry(self, attempt: int, status: int = None) -> bool:
+        """
+        Return True if a call should be sent again.
+
+        :param attempt: number of attempts already sent (int)
+        :param status: HTTP status of the last response, None if no response was received (int)
+        :returns: retry the call (bool)
+        """
+        if attempt > self.max_retries:
+            return False
+        return status is None or status in self.retry_statuses
+
+    def wait_time(self, attempt: int, retry_after: str = None) -> float:
+        """
+        Return the seconds to wait before sending a call again.
+
+        :param attempt: number of attempts already sent (int)
+        :param retry_after: Retry-After header of the last response, in seconds (string)
+        :returns: seconds to wait (float)
+        """
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                # HTTP dates are not used by the IWLS API, fall back to backoff
+                pass
+
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** (attempt - 1)))
+
+class LatencyTracker(Shared):
+    """
+    Recent latencies of successful IWLS API calls, used to decide when a slow
+    call is hedged with a duplicate request.
+    """
+    @classmethod
+    def shared(cls, key: str, **kwargs):
+        """
+        Return the tracker of an IWLS API and settings, create it on first use.
+        Connectors are created per request, latencies are kept for the whole process.
+
+        :param key: identifies the IWLS API, e.g. its root url (string)
+        :param kwargs: other arguments of __init__
+        :returns: shared tracker (LatencyTracker)
+        """
+        return cls._shared(settings_key(key, **kwargs), lambda: cls(**kwargs))
+
+    def __init__(self, quantile: float = 0.95, window: int = 200, min_samples: int = 20,
+                 min_delay: float = 0.05):
+        """
+        Init method.
+
+        :param quantile: latency quantile after which a call is hedged, e.g. 0.95 for p95 (float)
+        :param window: number of recent latencies kept (int)
+        :param min_samples: latencies needed before hedging starts (int)
+        :param min_delay: shortest delay before a hedge in seconds (float)
+        """
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.latencies = collections.deque(maxlen=window)
+        self._latencies_lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """
+        Add the latency of a successful call.
+
+        :param seconds: call latency (float)
+        """
+        with self._latencies_lock:
+            self.latencies.append(seconds)
+
+    def hedge_delay(self) -> float:
+        """
+        Return the seconds after which a call still running is hedged, None until enough latencies are known.
+
+        :returns: delay in seconds (float)
+        """
+        with self._latencies_lock:
+            if len(self.latencies) < self.min_samples:
+                return None
+            latencies = list(self.latencies)
+
+        return max(self.min_delay, float(np.quantile(latencies, self.quantile)))
+
+class InFlightGauge():
+    """
+    Number of calls running right now and highest number reached, updated from any thread.
+    """
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def track(self):
+        """
+        Count a call as running until the end of the with block.
+        """
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.current -= 1
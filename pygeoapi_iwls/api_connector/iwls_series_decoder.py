@@ -0,0 +1,200 @@
+# Standard library imports
+import json
+import logging
+
+# Packages imports
+import numpy as np
+import pandas as pd
+
+# Records of a /data response look like
+# {"eventDate":"2019-11-13T19:18:00Z","qcFlagCode":"1","value":1.234,"timeSeriesId":"..."}
+# Keys are searched from their rarest byte, e.g. the D of eventDate
+EVENT_DATE_KEY = (np.frombuffer(b'"eventDate"', np.uint8), 6)
+VALUE_KEY = (np.frombuffer(b'"value"', np.uint8), 1)
+
+# Positions of the digits and separators in YYYY-MM-DDTHH:MM:SSZ
+DIGIT_POSITIONS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+SEPARATORS = {4: b'-', 7: b'-', 10: b'T', 13: b':', 16: b':', 19: b'Z'}
+
+# Bytes allowed in a value once null is replaced by nan
+VALUE_BYTES = np.frombuffer(b'0123456789+-.eEna ', np.uint8)
+
+def decode_records(content: bytes) -> tuple:
+    """
+    Decode the body of a /data response straight into numpy arrays. Keys and values
+    are located with array operations on the raw bytes, no dict is built per record.
+    Falls back to the json module if the body does not have the expected layout.
+
+    :param content: response body (bytes)
+    :returns: UTC timestamps (np.ndarray of datetime64[ns]) and values, NaN if null (np.ndarray of float64)
+    """
+    decoded = _decode_fast(np.frombuffer(content, np.uint8))
+    if decoded is None:
+        logging.debug('Unexpected /data record layout, decoding with the json module')
+        return decode_json_records(json.loads(content))
+
+    return decoded
+
+def decode_json_records(records: list) -> tuple:
+    """
+    Convert records already decoded by the json module into numpy arrays.
+
+    :param records: records with 'eventDate' and 'value' keys (list of dict)
+    :returns: UTC timestamps (np.ndarray of datetime64[ns]) and values, NaN if missing (np.ndarray of float64)
+    """
+    event_dates = [record['eventDate'] for record in records]
+    values = pd.to_numeric(pd.Series([record.get('value') for record in records], dtype=object),
+                           errors='coerce').to_numpy(dtype=np.float64)
+
+    return parse_event_dates(event_dates), values
+
+def parse_event_dates(event_dates) -> np.ndarray:
+    """
+    Parse ISO 8601 UTC timestamps. Timestamps in the YYYY-MM-DDTHH:MM:SSZ form returned
+    by the IWLS API are parsed with array arithmetic on their digits, other forms with pandas.
+
+    :param event_dates: ISO 8601 UTC timestamps, e.g. 2019-11-13T19:18:00Z (iterable)
+    :returns: UTC timestamps (np.ndarray of datetime64[ns])
+    """
+    if not isinstance(event_dates, np.ndarray):
+        event_dates = _to_array(list(event_dates))
+
+    if len(event_dates) == 0:
+        return np.empty(0, dtype='datetime64[ns]')
+
+    if event_dates.dtype == np.dtype('S20'):
+        times = _parse_iso_chars(event_dates.view(np.uint8).reshape(-1, 20))
+        if times is not None:
+            return times
+
+    if event_dates.dtype.kind == 'S':
+        event_dates = np.char.decode(event_dates, 'ascii')
+
+    return pd.to_datetime(pd.Index(event_dates, dtype=object), utc=True).tz_localize(None).values
+
+def _decode_fast(body: np.ndarray) -> tuple:
+    """
+    Locate the eventDate and value of every record in a /data response body.
+
+    :param body: response body (np.ndarray of uint8)
+    :returns: timestamps and values (tuple), None if the body does not have the expected layout
+    """
+    date_starts = _skip_colon(body, _find_key(body, *EVENT_DATE_KEY))
+    value_starts = _skip_colon(body, _find_key(body, *VALUE_KEY))
+    if date_starts is None or value_starts is None or len(date_starts) != len(value_starts):
+        return None
+
+    if len(date_starts) == 0:
+        return np.empty(0, dtype='datetime64[ns]'), np.empty(0, dtype=np.float64)
+
+    # The n-th eventDate and n-th value must belong to the same record
+    braces = np.flatnonzero(body == ord('{'))
+    if not np.array_equal(np.searchsorted(braces, date_starts), np.searchsorted(braces, value_starts)):
+        return None
+
+    # Timestamps are quoted 20 characters strings
+    if date_starts[-1] + 21 >= len(body) or not (
+            (body[date_starts] == ord('"')).all() and (body[date_starts + 21] == ord('"')).all()):
+        return None
+    times = _parse_iso_chars(body[(date_starts + 1)[:, None] + np.arange(20)])
+    if times is None:
+        return None
+
+    # Values end at the next comma or closing brace, copy them to fixed width rows padded with spaces
+    delimiters = np.flatnonzero((body == ord(',')) | (body == ord('}')))
+    next_delimiter = np.searchsorted(delimiters, value_starts)
+    if next_delimiter[-1] >= len(delimiters):
+        return None
+    lengths = delimiters[next_delimiter] - value_starts
+
+    columns = np.arange(int(lengths.max()) + 1)
+    tokens = body[np.minimum(value_starts[:, None] + columns, len(body) - 1)]
+    tokens = np.where(columns < lengths[:, None], tokens, ord(' ')).astype(np.uint8)
+
+    nulls = tokens[:, 0] == ord('n')
+    if nulls.any():
+        if not (lengths[nulls] == 4).all() or not (tokens[nulls, :4] == np.frombuffer(b'null', np.uint8)).all():
+            return None
+        tokens[nulls, :4] = np.frombuffer(b'nan ', np.uint8)
+    if not np.isin(tokens, VALUE_BYTES).all():
+        return None
+
+    values = np.fromstring(tokens.tobytes(), sep=' ')
+    if len(values) != len(times):
+        return None
+
+    return times, values
+
+def _find_key(body: np.ndarray, key: np.ndarray, anchor: int) -> np.ndarray:
+    """
+    Return the position following every occurrence of a key.
+
+    :param body: response body (np.ndarray of uint8)
+    :param key: quoted key (np.ndarray of uint8)
+    :param anchor: position in the key of its rarest byte (int)
+    :returns: positions (np.ndarray of int)
+    """
+    positions = np.flatnonzero(body == key[anchor]) - anchor
+    positions = positions[(positions >= 0) & (positions <= len(body) - len(key))]
+    for offset in range(len(key)):
+        if offset != anchor:
+            positions = positions[body[positions + offset] == key[offset]]
+
+    return positions + len(key)
+
+def _skip_colon(body: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """
+    Move positions following keys past the colon and a single space on either side.
+
+    :param body: response body (np.ndarray of uint8)
+    :param positions: positions following keys (np.ndarray of int)
+    :returns: positions of the values, None if a colon is missing (np.ndarray of int)
+    """
+    if len(positions) and positions[-1] + 2 >= len(body):
+        return None
+    positions = positions + (body[positions] == ord(' '))
+    if not (body[positions] == ord(':')).all():
+        return None
+    positions = positions + 1
+
+    return positions + (body[positions] == ord(' '))
+
+def _parse_iso_chars(chars: np.ndarray) -> np.ndarray:
+    """
+    Parse YYYY-MM-DDTHH:MM:SSZ timestamps with array arithmetic on their digits.
+
+    :param chars: one timestamp per row (np.ndarray of uint8, shape (n, 20))
+    :returns: UTC timestamps, None if a timestamp is not in this form (np.ndarray of datetime64[ns])
+    """
+    if not all((chars[:, i] == ord(c)).all() for i, c in SEPARATORS.items()):
+        return None
+
+    digits = chars[:, DIGIT_POSITIONS].astype(np.int64) - ord('0')
+    if not ((digits >= 0) & (digits <= 9)).all():
+        return None
+
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month, day, hour, minute, second = (digits[:, i] * 10 + digits[:, i + 1] for i in range(4, 14, 2))
+    if not ((month >= 1) & (month <= 12) & (day >= 1) & (hour < 24) & (minute < 60) & (second < 60)).all():
+        return None
+
+    months = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    days = months.astype('datetime64[D]') + (day - 1)
+    # Days past the end of their month, e.g. 02-30, would roll over to the next month
+    if not (days.astype('datetime64[M]') == months).all():
+        return None
+
+    seconds = hour * 3600 + minute * 60 + second
+
+    return days.astype('datetime64[ns]') + seconds.astype('timedelta64[s]')
+
+def _to_array(event_dates: list) -> np.ndarray:
+    """
+    Convert timestamps to an array of ASCII bytes if they are all strings, to an object array otherwise.
+    """
+    if all(isinstance(i, (str, bytes)) for i in event_dates):
+        try:
+            return np.array(event_dates, dtype=bytes)
+        except UnicodeEncodeError:
+            pass
+    return np.array(event_dates, dtype=object)
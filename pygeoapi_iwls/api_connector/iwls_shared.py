@@ -0,0 +1,74 @@
+# Standard library imports
+import threading
+
+class Shared():
+    """
+    Parent of the classes with process-wide instances. pygeoapi creates a provider per request,
+    providers reuse the instances (connectors, caches, pollers) created by the first request.
+    Instances are keyed by class and by every setting they are created with, a provider with
+    other settings gets its own instance. They are created outside the process-wide lock:
+    a slow creation only delays the callers of the same key, a failed one is attempted
+    again by the next caller.
+    """
+    _instances = {}
+    _creating = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _shared(cls, key, create):
+        """
+        Return the instance of this class matching a key, create it on first use.
+
+        :param key: identifies the instance, including its settings (hashable)
+        :param create: function returning a new instance (function)
+        :returns: shared instance
+        """
+        key = (cls, key)
+        with Shared._lock:
+            if key in Shared._instances:
+                return Shared._instances[key]
+            creating = Shared._creating.setdefault(key, threading.Lock())
+
+        # Callers of the same key wait for the first one to create it
+        with creating:
+            with Shared._lock:
+                if key in Shared._instances:
+                    return Shared._instances[key]
+            instance = create()
+            with Shared._lock:
+                Shared._instances[key] = instance
+                Shared._creating.pop(key, None)
+            return instance
+
+    @staticmethod
+    def reset():
+        """
+        Close and forget every shared instance, e.g. between tests. Instances are closed if they
+        have a close method (pollers, refresh threads, event loops).
+        """
+        with Shared._lock:
+            instances = list(Shared._instances.values())
+            Shared._instances.clear()
+
+        for instance in instances:
+            close = getattr(instance, 'close', None)
+            if close is not None:
+                close()
+
+    def _discard(self):
+        """
+        Forget this instance, the next caller of its key gets a new one.
+        """
+        with Shared._lock:
+            for key in [k for k, v in Shared._instances.items() if v is self]:
+                del Shared._instances[key]
+
+def settings_key(*args, **kwargs) -> str:
+    """
+    Return a key identifying a set of settings, from arguments that may not be hashable.
+
+    :param args: positional settings
+    :param kwargs: named settings
+    :returns: key (string)
+    """
+    return repr((args, sorted(kwargs.items())))
@@ -0,0 +1,182 @@
+# Standard library imports
+import os
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import Future
+
+# Packages imports
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Local imports
+from provider_iwls.api_connector.iwls_shared import Shared
+
+class SingleFlight(Shared):
+    """
+    Coalesce identical concurrent calls of the process: the first caller of a key
+    runs the call, callers arriving while it runs wait for it and share its result.
+    """
+    @classmethod
+    def shared(cls, key: str):
+        """
+        Return the group of an IWLS API, create it on first use.
+
+        :param key: identifies the IWLS API, e.g. the stations summary url (string)
+        :returns: shared group (SingleFlight)
+        """
+        return cls._shared(key, cls)
+
+    def __init__(self):
+        self.calls = 0
+        self.shared_calls = 0
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+
+    def do(self, key, func):
+        """
+        Run func, or wait for the call already running for the same key.
+
+        :param key: identifies identical calls (hashable)
+        :param func: function called without arguments (function)
+        :returns: result of func, raise its exception
+        """
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self.calls += 1
+            else:
+                self.shared_calls += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+
+class AsyncSingleFlight():
+    """
+    Asyncio variant of SingleFlight, must only be used from its event loop.
+    Calls run in their own task: a caller cancelled by a deadline does not cancel the
+    call shared with other callers.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.shared_calls = 0
+        self._in_flight = {}
+
+    async def do(self, key, coro_func):
+        """
+        Await coro_func(), or the call already running for the same key.
+
+        :param key: identifies identical calls (hashable)
+        :param coro_func: coroutine function called without arguments (function)
+        :returns: result of the coroutine, raise its exception
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = self._in_flight[key] = asyncio.ensure_future(coro_func())
+            task.add_done_callback(lambda done: self._done(key, done))
+            self.calls += 1
+        else:
+            self.shared_calls += 1
+
+        return await asyncio.shield(task)
+
+    def _done(self, key, task: asyncio.Task):
+        """
+        Forget a call once it is completed.
+        """
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+class FileLock():
+    """
+    Exclusive lock shared by the worker processes of a host, on a file of a lock folder.
+    Every key has its own lock file, unrelated keys never wait for each other. The holder
+    deletes the file on release, so lock files do not pile up in the folder.
+    """
+    def __init__(self, folder: str, key):
+        """
+        Init method, the lock is not acquired.
+
+        :param folder: lock folder shared by every process, created if needed (string)
+        :param key: identifies the protected resource (hashable with a stable repr)
+        """
+        if fcntl is None:
+            raise ImportError('Cross-process single flight locks require fcntl (POSIX only)')
+
+        os.makedirs(folder, exist_ok=True)
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        self.path = os.path.join(folder, f'iwls_{digest}.lock')
+        self._file = None
+
+    def acquire(self):
+        """
+        Block until the lock is acquired.
+        """
+        while not self._lock(blocking=True):
+            pass
+
+    def try_acquire(self) -> bool:
+        """
+        Acquire the lock if it is free, without waiting.
+
+        :returns: True if the lock is acquired (bool)
+        """
+        return self._lock(blocking=False)
+
+    def _lock(self, blocking: bool) -> bool:
+        """
+        Lock the current file of the key. A file deleted by the previous holder while
+        waiting for it no longer protects the key, it is not kept.
+
+        :param blocking: wait for the lock if it is held (bool)
+        :returns: True if the lock is acquired (bool)
+        """
+        file = open(self.path, 'a')
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            file.close()
+            return False
+
+        try:
+            current = os.stat(self.path).st_ino == os.fstat(file.fileno()).st_ino
+        except FileNotFoundError:
+            current = False
+        if not current:
+            file.close()
+            return False
+
+        self._file = file
+        return True
+
+    def release(self):
+        """
+        Release the lock.
+        """
+        os.remove(self.path)
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
@@ -0,0 +1,192 @@
+# Standard library imports
+import time
+import logging
+import threading
+
+# Packages imports
+import pandas as pd
+
+# Local imports
+from provider_iwls.spatial_index import GridIndex
+from provider_iwls.api_connector.iwls_shared import Shared
+
+class StationNotFoundError(LookupError):
+    """
+    Raised when a station code, name or id is not in the station summary.
+    """
+
+class StationIndex():
+    """
+    Immutable snapshot of the IWLS station summary, with hash indexes used to
+    match station codes and names to unique IWLS database id in constant time.
+    """
+    def __init__(self, info: pd.core.frame.DataFrame):
+        """
+        Init method, build the snapshot and its indexes from the station summary.
+
+        :param info: summary information for all stations (pd.DataFrame)
+        """
+        self.info = info
+
+        # Keep the first row when a key is duplicated, as the previous boolean mask lookups did
+        self.id_by_code = self._first_match(info.get('code', []), info.get('id', []))
+        self.id_by_name = self._first_match(info.get('officialName', []), info.get('id', []))
+        self.name_by_id = self._first_match(info.get('id', []), info.get('officialName', []))
+
+        # Spatial index used by bounding box queries
+        self.spatial_index = GridIndex(info.get('longitude', []), info.get('latitude', []))
+
+        # Time series codes published by every station, None if not listed in the summary
+        self.series_by_position = [self._series_codes(i) for i in info.get('timeSeries', [None] * len(info))]
+        self.series_by_code = self._first_match(info.get('code', []), self.series_by_position)
+
+    @staticmethod
+    def _series_codes(time_series) -> frozenset:
+        """
+        Parse the time series codes listed in the 'timeSeries' field of a station summary.
+
+        :param time_series: time series of a station, e.g. [{'code': 'wlo', ...}] (list)
+        :returns: time series codes, None if the field is missing (frozenset)
+        """
+        if not isinstance(time_series, list):
+            return None
+        return frozenset(i['code'] for i in time_series if isinstance(i, dict) and 'code' in i)
+
+    @staticmethod
+    def _first_match(keys, values) -> dict:
+        """
+        Build a dictionary keeping the first value found for every key.
+
+        :param keys: dictionary keys (iterable)
+        :param values: dictionary values (iterable)
+        :returns: index (dict)
+        """
+        index = {}
+        for key, value in zip(keys, values):
+            index.setdefault(key, value)
+        return index
+
+    def id_from_code(self, station_code: str) -> str:
+        """
+        Return unique id for a station from five digits identifier
+
+        :param station_code: five digits station identifier (string)
+        :returns: unique IWLS database id (string)
+        """
+        try:
+            return self.id_by_code[station_code]
+        except KeyError:
+            raise StationNotFoundError(f'No IWLS station with code {station_code}') from None
+
+    def id_from_name(self, station_name: str) -> str:
+        """
+        Return unique id for a station from exact official name
+
+        :param station_name: Station exact official name (string)
+        :returns: unique IWLS database id (string)
+        """
+        try:
+            return self.id_by_name[station_name]
+        except KeyError:
+            raise StationNotFoundError(f'No IWLS station named {station_name}') from None
+
+    def name_from_id(self, iwls_id: str) -> str:
+        """
+        Return station exact official name from unique id
+
+        :param iwls_id: unique IWLS database id (string)
+        :returns: Station Name (string)
+        """
+        try:
+            return self.name_by_id[iwls_id]
+        except KeyError:
+            raise StationNotFoundError(f'No IWLS station with id {iwls_id}') from None
+
+    def published_series(self, station_code: str) -> frozenset:
+        """
+        Return the time series codes published by a station.
+
+        :param station_code: five digits station identifier (string)
+        :returns: time series codes, None if unknown (frozenset)
+        """
+        return self.series_by_code.get(station_code)
+
+    def stations_in_bbox(self, bbox: list, series_code: str = None) -> pd.core.frame.DataFrame:
+        """
+        Return summary information of the stations inside a bounding box, in summary order.
+
+        :param bbox: bounding box [minx,miny,maxx,maxy], minx > maxx crosses the antimeridian (list)
+        :param series_code: if set, only keep stations publishing this time series (string)
+        :returns: summary information for the selected stations (pd.DataFrame)
+        """
+        positions = self.spatial_index.query(bbox)
+
+        if series_code is not None:
+            positions = [i for i in positions
+                         if self.series_by_position[i] is not None and series_code in self.series_by_position[i]]
+
+        return self.info.iloc[positions]
+
+class StationRegistry(Shared):
+    """
+    Process-wide station index, loaded once and refreshed in a background thread.
+    Every connector using the same IWLS API holds a reference to the same registry.
+    """
+    @classmethod
+    def shared(cls, key: str, loader, ttl: float = None):
+        """
+        Return the registry for an IWLS API and refresh interval, load it on first use.
+
+        :param key: identifies the IWLS API, e.g. the stations summary url (string)
+        :param loader: function returning the station summary (function)
+        :param ttl: seconds between background refreshes, never refreshed if None (float)
+        :returns: shared registry (StationRegistry)
+        """
+        return cls._shared((key, ttl), lambda: cls(loader, ttl))
+
+    def __init__(self, loader, ttl: float = None):
+        """
+        Init method, load the station summary and start the refresh thread.
+
+        :param loader: function returning the station summary (function)
+        :param ttl: seconds between background refreshes, never refreshed if None (float)
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self.index = StationIndex(loader())
+        self.loaded_at = time.time()
+        self._closed = threading.Event()
+
+        self._refresher = None
+        if ttl:
+            self._refresher = threading.Thread(target=self._refresh_loop, name='iwls-station-registry', daemon=True)
+            self._refresher.start()
+
+    def close(self):
+        """
+        Stop the refresh thread, the index keeps its last stations. A new registry is loaded
+        by the next caller of shared().
+        """
+        self._closed.set()
+        self._discard()
+        if self._refresher is not None:
+            self._refresher.join()
+
+    def _refresh_loop(self):
+        """
+        Reload the station summary every ttl seconds, keep the previous index if it fails.
+        """
+        while not self._closed.wait(self.ttl):
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f'Station summary refresh failed, keeping previous index: {e}')
+
+    def refresh(self):
+        """
+        Reload the station summary and swap the index in a single assignment,
+        readers always see either the previous or the new index.
+        """
+        self.index = StationIndex(self.loader())
+        self.loaded_at = time.time()
+        logging.info(f'Station index refreshed, {len(self.index.info)} stations')
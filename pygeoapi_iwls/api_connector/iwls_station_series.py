@@ -0,0 +1,245 @@
+# Packages imports
+import numpy as np
+import pandas as pd
+
+# Local imports
+from provider_iwls.api_connector.iwls_series_decoder import parse_event_dates, decode_json_records
+
+# Aggregations available to StationSeries.resample
+AGGREGATIONS = ('mean', 'min', 'max', 'last')
+
+class StationSeries():
+    """
+    Time series of a single station, stored as two numpy arrays: UTC timestamps
+    (datetime64[ns], ascending and unique) and values (float64, NaN if missing).
+    Returned by the connectors, rendered to GeoJSON or csv only when a response is written.
+    """
+    __slots__ = ('times', 'values')
+
+    def __init__(self, times: np.ndarray, values: np.ndarray):
+        """
+        Init method, arrays must already be sorted and without duplicated timestamps.
+
+        :param times: UTC timestamps (np.ndarray of datetime64[ns])
+        :param values: values for every timestamp (np.ndarray of float64)
+        """
+        self.times = times
+        self.values = values
+
+    @classmethod
+    def empty(cls):
+        """
+        Return a series without any value.
+
+        :returns: empty series (StationSeries)
+        """
+        return cls(np.empty(0, dtype='datetime64[ns]'), np.empty(0, dtype=np.float64))
+
+    @classmethod
+    def from_records(cls, event_dates, values):
+        """
+        Build a series from the records returned by the IWLS API.
+        The first record is kept when a timestamp is returned more than once.
+
+        :param event_dates: ISO 8601 UTC timestamps, e.g. 2019-11-13T19:18:00Z (iterable)
+        :param values: value of every record, None if missing (iterable)
+        :returns: series sorted by time (StationSeries)
+        """
+        values = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+
+        return cls.from_arrays(parse_event_dates(event_dates), values)
+
+    @classmethod
+    def from_arrays(cls, times: np.ndarray, values: np.ndarray):
+        """
+        Build a series from arrays in any order, the first value is kept when a timestamp is repeated.
+
+        :param times: UTC timestamps (np.ndarray of datetime64[ns])
+        :param values: values for every timestamp, NaN if missing (np.ndarray of float64)
+        :returns: series sorted by time (StationSeries)
+        """
+        if len(times) == 0:
+            return cls.empty()
+
+        # The IWLS API sends some zero values as -0.0, outputs always write them as 0.0
+        values = np.where(values == 0, 0.0, values)
+
+        # Stable sort keeps duplicated timestamps in record order, keep the first one
+        if (times[1:] > times[:-1]).all():
+            return cls(times, values)
+        order = np.argsort(times, kind='stable')
+        times, values = times[order], values[order]
+        keep = np.concatenate(([True], times[1:] != times[:-1]))
+
+        return cls(times[keep], values[keep])
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __bool__(self) -> bool:
+        return len(self.times) > 0
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, StationSeries)
+                and np.array_equal(self.times, other.times)
+                and np.array_equal(self.values, other.values, equal_nan=True))
+
+    def __repr__(self) -> str:
+        return f'<StationSeries> {len(self)} values'
+
+    def resample(self, interval: np.timedelta64, agg: str = 'mean'):
+        """
+        Aggregate the values in fixed intervals aligned on 1970-01-01T00:00:00Z, timestamped
+        by the start of their interval. Missing values are ignored, intervals without
+        any value are left out.
+
+        :param interval: interval length, returned by parse_interval (np.timedelta64)
+        :param agg: aggregation of the values of an interval, one of AGGREGATIONS (string)
+        :returns: resampled series (StationSeries)
+        """
+        if agg not in AGGREGATIONS:
+            raise ValueError(f'Unknown aggregation {agg}, expected one of {", ".join(AGGREGATIONS)}')
+
+        valid = ~np.isnan(self.values)
+        times, values = self.times[valid], self.values[valid]
+        if len(times) == 0:
+            return StationSeries.empty()
+
+        # Timestamps are sorted, every interval is a contiguous slice of the arrays
+        step = interval.astype('timedelta64[ns]').astype(np.int64)
+        bins = times.astype(np.int64) // step
+        starts = np.flatnonzero(np.concatenate(([True], bins[1:] != bins[:-1])))
+        ends = np.append(starts[1:], len(values))
+
+        if agg == 'mean':
+            aggregated = np.add.reduceat(values, starts) / (ends - starts)
+        elif agg == 'min':
+            aggregated = np.minimum.reduceat(values, starts)
+        elif agg == 'max':
+            aggregated = np.maximum.reduceat(values, starts)
+        else:
+            aggregated = values[ends - 1]
+
+        return StationSeries((bins[starts] * step).astype('datetime64[ns]'), aggregated)
+
+    def to_series(self, name: str = None) -> pd.core.series.Series:
+        """
+        Return the series as a pandas Series with a UTC DatetimeIndex.
+
+        :param name: name of the pandas Series (string)
+        :returns: series (pd.Series)
+        """
+        return pd.Series(self.values, index=pd.DatetimeIndex(self.times).tz_localize('UTC'), name=name)
+
+    def to_dict(self) -> dict:
+        """
+        Render the series as GeoJSON properties, e.g. {'2019-11-13T19:18:00.000Z': 1.234}.
+
+        :returns: value of every timestamp, None if missing (dict)
+        """
+        keys = np.char.add(np.datetime_as_string(self.times, unit='ms'), 'Z').tolist()
+        values = self.values.astype(object)
+        values[np.isnan(self.values)] = None
+
+        return dict(zip(keys, values.tolist()))
+
+class SeriesAccumulator():
+    """
+    Collect the arrays decoded from every chunk of a time series and build a single
+    StationSeries once all chunks are received, in linear time.
+    """
+    __slots__ = ('times', 'values')
+
+    def __init__(self):
+        self.times = []
+        self.values = []
+
+    def add_arrays(self, times: np.ndarray, values: np.ndarray):
+        """
+        Append timestamps and values decoded from a chunk, in any order.
+
+        :param times: UTC timestamps (np.ndarray of datetime64[ns])
+        :param values: values for every timestamp, NaN if missing (np.ndarray of float64)
+        """
+        self.times.append(times)
+        self.values.append(values)
+
+    def add(self, event_dates, values):
+        """
+        Append timestamps and values, in any order.
+
+        :param event_dates: ISO 8601 UTC timestamps, e.g. 2019-11-13T19:18:00Z (iterable)
+        :param values: value of every timestamp, None if missing (iterable)
+        """
+        values = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+        self.add_arrays(parse_event_dates(event_dates), values)
+
+    def add_records(self, records: list):
+        """
+        Append the records returned by the IWLS API for one chunk, already decoded by the json module.
+
+        :param records: records with 'eventDate' and 'value' keys (list of dict)
+        """
+        self.add_arrays(*decode_json_records(records))
+
+    def build(self) -> StationSeries:
+        """
+        Build the series, timestamps at chunk boundaries are kept only once.
+
+        :returns: series sorted by time (StationSeries)
+        """
+        if not self.times:
+            return StationSeries.empty()
+
+        return StationSeries.from_arrays(np.concatenate(self.times), np.concatenate(self.values))
+
+def parse_interval(interval: str) -> np.timedelta64:
+    """
+    Parse a resampling interval, e.g. 15min, 1h, 1d or PT1H.
+
+    :param interval: interval length (string)
+    :returns: interval length, raise ValueError if not a positive duration (np.timedelta64)
+    """
+    try:
+        step = pd.Timedelta(interval)
+    except (ValueError, TypeError):
+        step = pd.NaT
+    if pd.isna(step) or step <= pd.Timedelta(0):
+        raise ValueError(f'Invalid resampling interval {interval}, expected e.g. 15min, 1h or 1d')
+
+    return step.to_timedelta64()
+
+def resample_feature(feature: dict, interval: np.timedelta64, agg: str = 'mean') -> dict:
+    """
+    Resample every station series of a feature returned by the connectors.
+
+    :param feature: GeoJSON feature (dict)
+    :param interval: interval length, returned by parse_interval (np.timedelta64)
+    :param agg: aggregation of the values of an interval, one of AGGREGATIONS (string)
+    :returns: GeoJSON feature with resampled series (dict)
+    """
+    properties = {name: value.resample(interval, agg) if isinstance(value, StationSeries) else value
+                  for name, value in feature['properties'].items()}
+
+    return dict(feature, properties=properties)
+
+def render_feature(feature: dict) -> dict:
+    """
+    Render the station series of a feature returned by the connectors as GeoJSON properties.
+
+    :param feature: GeoJSON feature (dict)
+    :returns: GeoJSON feature with only JSON serializable properties (dict)
+    """
+    properties = {name: value.to_dict() if isinstance(value, StationSeries) else value
+                  for name, value in feature['properties'].items()}
+
+    return dict(feature, properties=properties)
+
+def render_feature_collection(collection: dict) -> dict:
+    """
+    Render every feature of a collection returned by the connectors.
+
+    :param collection: GeoJSON feature collection (dict)
+    :returns: GeoJSON feature collection with only JSON serializable properties (dict)
+    """
+    return dict(collection, features=[render_feature(i) for i in collection.get('features', [])])
@@ -0,0 +1,180 @@
+# Standard library imports
+import time
+import sqlite3
+import datetime
+import threading
+
+# Packages imports
+import numpy as np
+
+# Local imports
+from provider_iwls.api_connector.iwls_shared import Shared, settings_key
+
+class TimeSeriesCache(Shared):
+    """
+    Local SQLite store of IWLS time series, bucketed by UTC day.
+    A bucket holds the timestamps and values of one series of one station for one day,
+    stored as raw numpy arrays. Buckets of
+    immutable series (observations and predictions) never expire once the day is
+    over, recent buckets and forecasts expire after recent_ttl seconds.
+    Expired buckets and buckets older than retention_days are purged every purge_interval
+    seconds, the oldest days are dropped first above max_buckets.
+    """
+    @classmethod
+    def shared(cls, path: str, **kwargs):
+        """
+        Return the cache stored in a file with these settings, create it on first use.
+
+        :param path: SQLite database file (string)
+        :param kwargs: other arguments of __init__
+        :returns: shared cache (TimeSeriesCache)
+        """
+        return cls._shared(settings_key(path, **kwargs), lambda: cls(path, **kwargs))
+
+    def __init__(self, path: str, recent_ttl: float = 300.0, settle_time: float = 86400.0,
+                 immutable_series: tuple = ('wlo', 'wlp', 'wcs1', 'wcd1'),
+                 retention_days: float = 30.0, max_buckets: int = None, purge_interval: float = 3600.0):
+        """
+        Init method, create the database table if needed.
+
+        :param path: SQLite database file (string)
+        :param recent_ttl: seconds before a mutable bucket is requested again (float)
+        :param settle_time: seconds after the end of a day before its buckets become immutable (float)
+        :param immutable_series: series codes that do not change once the day is over (tuple)
+        :param retention_days: days before a bucket is purged, counted from its day, kept forever if None (float)
+        :param max_buckets: number of buckets kept, oldest days purged first, no limit if None (int)
+        :param purge_interval: seconds between two purges, run by the next put (float)
+        """
+        self.path = path
+        self.recent_ttl = recent_ttl
+        self.settle_time = settle_time
+        self.immutable_series = frozenset(immutable_series)
+        self.retention_days = retention_days
+        self.max_buckets = max_buckets
+        self.purge_interval = purge_interval
+        self.purged_at = time.time()
+        self._purge_lock = threading.Lock()
+        self._local = threading.local()
+
+        connection = self._connection()
+        # Pages freed by purges are given back to the file system by incremental vacuums,
+        # the mode of an existing file only changes with a full vacuum
+        connection.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        if connection.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            connection.execute('VACUUM')
+
+        with connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS series_buckets ('
+                'url TEXT NOT NULL, series TEXT NOT NULL, day TEXT NOT NULL, '
+                'expires_at REAL, times BLOB NOT NULL, vals BLOB NOT NULL, '
+                'PRIMARY KEY (url, series, day))')
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Return the database connection owned by the calling thread.
+
+        :returns: connection (sqlite3.Connection)
+        """
+        if not hasattr(self._local, 'connection'):
+            connection = sqlite3.connect(self.path, timeout=30)
+            # WAL lets readers of every worker process run while a bucket is written
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return self._local.connection
+
+    def _expires_at(self, series_code: str, day: datetime.date, now: float):
+        """
+        Return the expiry time of a bucket, None if it never expires.
+
+        :param series_code: IWLS time series code (string)
+        :param day: UTC day of the bucket (datetime.date)
+        :param now: current time, seconds since epoch (float)
+        :returns: expiry time, seconds since epoch (float)
+        """
+        day_end = datetime.datetime.combine(
+            day + datetime.timedelta(days=1), datetime.time(), tzinfo=datetime.timezone.utc)
+
+        if series_code in self.immutable_series and day_end.timestamp() + self.settle_time <= now:
+            return None
+        return now + self.recent_ttl
+
+    def get(self, url: str, series_code: str, days: list) -> dict:
+        """
+        Return the buckets still valid for several days.
+
+        :param url: url used for queries, identifies the station (string)
+        :param series_code: IWLS time series code (string)
+        :param days: UTC days (list of datetime.date)
+        :returns: day, UTC timestamps (datetime64[ns]) and values (float64) of every bucket found (dict)
+        """
+        if not days:
+            return {}
+
+        rows = self._connection().execute(
+            'SELECT day, times, vals FROM series_buckets WHERE url = ? AND series = ? '
+            'AND day BETWEEN ? AND ? AND (expires_at IS NULL OR expires_at > ?)',
+            (url, series_code, days[0].isoformat(), days[-1].isoformat(), time.time())).fetchall()
+
+        return {datetime.date.fromisoformat(day): (np.frombuffer(times, dtype='datetime64[ns]'),
+                                                   np.frombuffer(values, dtype=np.float64))
+                for day, times, values in rows}
+
+    def put(self, url: str, series_code: str, buckets: dict):
+        """
+        Store the buckets of several days, replacing previous ones.
+
+        :param url: url used for queries, identifies the station (string)
+        :param series_code: IWLS time series code (string)
+        :param buckets: day, UTC timestamps (datetime64[ns]) and values (float64) of every bucket (dict)
+        """
+        now = time.time()
+        with self._connection() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO series_buckets VALUES (?, ?, ?, ?, ?, ?)',
+                [(url, series_code, day.isoformat(), self._expires_at(series_code, day, now),
+                  np.ascontiguousarray(times, dtype='datetime64[ns]').tobytes(),
+                  np.ascontiguousarray(values, dtype=np.float64).tobytes())
+                 for day, (times, values) in buckets.items()])
+
+        if now - self.purged_at >= self.purge_interval:
+            self.purge(now)
+
+    def purge(self, now: float = None) -> int:
+        """
+        Delete expired buckets, buckets older than retention_days and the oldest buckets above
+        max_buckets, then give the freed pages back to the file system.
+
+        :param now: current time, seconds since epoch (float)
+        :returns: number of buckets deleted (int)
+        """
+        now = now or time.time()
+        # A single thread of the process purges at a time, the others keep storing
+        if not self._purge_lock.acquire(blocking=False):
+            return 0
+
+        try:
+            self.purged_at = now
+            cutoff = ''
+            if self.retention_days is not None:
+                cutoff = (datetime.datetime.fromtimestamp(now, datetime.timezone.utc).date()
+                          - datetime.timedelta(days=self.retention_days)).isoformat()
+
+            with self._connection() as connection:
+                deleted = connection.execute(
+                    'DELETE FROM series_buckets WHERE expires_at <= ? OR day < ?', (now, cutoff)).rowcount
+                if self.max_buckets is not None:
+                    deleted += connection.execute(
+                        'DELETE FROM series_buckets WHERE rowid IN (SELECT rowid FROM series_buckets '
+                        'ORDER BY day DESC LIMIT -1 OFFSET ?)', (self.max_buckets,)).rowcount
+
+            # executescript steps the pragma until every free page is released
+            if deleted:
+                self._connection().executescript('PRAGMA incremental_vacuum;')
+            return deleted
+        finally:
+            self._purge_lock.release()
+
+    def __len__(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM series_buckets').fetchone()[0]
@@ -0,0 +1,374 @@
+####
+# Local stand-in for the IWLS API, serving /v1/stations, /v1/stations/{id}/metadata and
+# /v1/stations/{id}/data from synthetic or recorded fixtures, with injectable latency
+# and error rates. Used to test, benchmark and load-test the connectors without network.
+# Usage: python -m provider_iwls.iwls_stand_in [--port 8000] [--fixtures folder] [--latency 0.05] [--error-rate 0.01]
+# then set the base_url connector option to http://127.0.0.1:8000/api/
+####
+
+# Standard library imports
+import os
+import json
+import math
+import time
+import random
+import argparse
+import datetime
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Packages imports
+import numpy as np
+import requests
+
+# Time series published by synthetic water level and surface current stations
+WATER_LEVEL_SERIES = ('wlo', 'wlp', 'wlf', 'wlf-spine')
+CURRENT_SERIES = ('wlo', 'wlp', 'wcs1', 'wcd1')
+
+# The IWLS API refuses requests longer than 7 days
+MAX_REQUEST_DAYS = 7
+
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+class SyntheticFixtures():
+    """
+    Stations spread along the Canadian coasts, with tidal-like time series
+    generated on request for any time range.
+    """
+    def __init__(self, n_stations: int = 50, step: int = 60, seed: int = 0):
+        """
+        Init method, build the station summary.
+
+        :param n_stations: number of stations, one in four publishes surface currents (int)
+        :param step: seconds between two values of every time series (int)
+        :param seed: random seed of station positions and tides (int)
+        """
+        rng = random.Random(seed)
+        self.step = step
+        self.stations = []
+        for i in range(n_stations):
+            series = CURRENT_SERIES if i % 4 == 3 else WATER_LEVEL_SERIES
+            self.stations.append({
+                'id': f'5cebf1de3d0f4a073c4b{i:04x}',
+                'code': f'{i + 1:05d}',
+                'officialName': f'Station {i + 1}',
+                'operating': True,
+                # Pacific and Atlantic coasts
+                'latitude': round(rng.uniform(43.0, 55.0), 4),
+                'longitude': round(rng.choice([rng.uniform(-133.0, -123.0), rng.uniform(-67.0, -52.0)]), 4),
+                'type': 'PERMANENT',
+                'timeSeries': [{'id': f'5cebf1e43d0f4a073c4b{i:04x}{j:02x}', 'code': code}
+                               for j, code in enumerate(series)],
+                # Tide amplitude and phase
+                '_amplitude': rng.uniform(0.5, 5.0),
+                '_phase': rng.uniform(0.0, 2 * math.pi),
+            })
+        self.by_id = {station['id']: station for station in self.stations}
+
+    @staticmethod
+    def _public(station: dict) -> dict:
+        """
+        Remove the private generation parameters of a station.
+        """
+        return {k: v for k, v in station.items() if not k.startswith('_')}
+
+    def summary(self) -> list:
+        """
+        Return the /stations response.
+        """
+        return [self._public(station) for station in self.stations]
+
+    def metadata(self, station_id: str) -> dict:
+        """
+        Return the /stations/{id}/metadata response, None if the station does not exist.
+        """
+        station = self.by_id.get(station_id)
+        return self._public(station) if station else None
+
+    def data(self, station_id: str, series_code: str, start: datetime.datetime, end: datetime.datetime) -> list:
+        """
+        Return the /stations/{id}/data response, None if the station does not exist.
+        """
+        station = self.by_id.get(station_id)
+        if station is None:
+            return None
+        series = {i['code']: i['id'] for i in station['timeSeries']}
+        if series_code not in series:
+            return []
+
+        first = math.ceil(start.timestamp() / self.step) * self.step
+        seconds = np.arange(first, int(end.timestamp()) + 1, self.step, dtype=np.int64)
+        angles = 2 * np.pi * seconds / 44712 + station['_phase']  # M2 tide period
+        if series_code == 'wcd1':
+            values = np.round(np.degrees(angles) % 360, 1)
+        else:
+            values = np.round(station['_amplitude'] * (1 + np.sin(angles)), 3)
+        event_dates = np.char.add(np.datetime_as_string(seconds.astype('datetime64[s]')), 'Z')
+
+        series_id = series[series_code]
+        return [{'eventDate': event_date, 'qcFlagCode': '1', 'value': value, 'timeSeriesId': series_id}
+                for event_date, value in zip(event_dates.tolist(), values.tolist())]
+
+class RecordedFixtures():
+    """
+    Responses recorded from the IWLS API by record_fixtures, in a folder:
+    stations.json, metadata/{id}.json and data/{id}/{series code}.json.
+    """
+    def __init__(self, path: str):
+        """
+        Init method, load every recorded response.
+
+        :param path: fixtures folder (string)
+        """
+        self.path = path
+        with open(os.path.join(path, 'stations.json')) as f:
+            self.stations = json.load(f)
+        self.by_id = {station['id']: station for station in self.stations}
+        self._data = {}
+
+    def summary(self) -> list:
+        """
+        Return the recorded /stations response.
+        """
+        return self.stations
+
+    def metadata(self, station_id: str) -> dict:
+        """
+        Return the recorded /stations/{id}/metadata response, the summary entry if not recorded.
+        """
+        metadata_path = os.path.join(self.path, 'metadata', f'{station_id}.json')
+        if not os.path.exists(metadata_path):
+            return self.by_id.get(station_id)
+        with open(metadata_path) as f:
+            return json.load(f)
+
+    def data(self, station_id: str, series_code: str, start: datetime.datetime, end: datetime.datetime) -> list:
+        """
+        Return the recorded records of a time series within a time range, None if the station does not exist.
+        """
+        if station_id not in self.by_id:
+            return None
+        key = (station_id, series_code)
+        if key not in self._data:
+            data_path = os.path.join(self.path, 'data', station_id, f'{series_code}.json')
+            self._data[key] = []
+            if os.path.exists(data_path):
+                with open(data_path) as f:
+                    self._data[key] = json.load(f)
+
+        start, end = start.strftime(TIME_FORMAT), end.strftime(TIME_FORMAT)
+        return [i for i in self._data[key] if start <= i['eventDate'] <= end]
+
+def record_fixtures(path: str, station_codes: list, start_time: str, end_time: str,
+                    base_url: str = 'https://api-iwls.dfo-mpo.gc.ca/api/'):
+    """
+    Record IWLS API responses for some stations, to be served by RecordedFixtures.
+
+    :param path: fixtures folder, created if needed (string)
+    :param station_codes: five digits station identifiers (list)
+    :param  start_time: Start time, ISO 8601 format UTC (e.g.: 2019-11-13T19:18:00Z) (string)
+    :param  end_time: End time, ISO 8601 format UTC (e.g.: 2019-11-13T19:18:00Z) (string)
+    :param base_url: IWLS API root url (string)
+    """
+    stations_url = f'{base_url.rstrip("/")}/v1/stations/'
+    r = requests.get(stations_url)
+    r.raise_for_status()
+    stations = [i for i in r.json() if i['code'] in station_codes]
+
+    os.makedirs(os.path.join(path, 'metadata'), exist_ok=True)
+    with open(os.path.join(path, 'stations.json'), 'w') as f:
+        json.dump(stations, f)
+
+    start = datetime.datetime.strptime(start_time, TIME_FORMAT)
+    end = datetime.datetime.strptime(end_time, TIME_FORMAT)
+    for station in stations:
+        r = requests.get(f'{stations_url}{station["id"]}/metadata')
+        r.raise_for_status()
+        with open(os.path.join(path, 'metadata', f'{station["id"]}.json'), 'w') as f:
+            json.dump(r.json(), f)
+
+        os.makedirs(os.path.join(path, 'data', station['id']), exist_ok=True)
+        for series in station.get('timeSeries', []):
+            records = []
+            chunk_start = start
+            while chunk_start <= end:
+                chunk_end = min(chunk_start + datetime.timedelta(days=MAX_REQUEST_DAYS, seconds=-1), end)
+                r = requests.get(f'{stations_url}{station["id"]}/data', params={
+                    'time-series-code': series['code'],
+                    'from': chunk_start.strftime(TIME_FORMAT),
+                    'to': chunk_end.strftime(TIME_FORMAT)})
+                r.raise_for_status()
+                records.extend(r.json())
+                chunk_start = chunk_end + datetime.timedelta(seconds=1)
+            with open(os.path.join(path, 'data', station['id'], f'{series["code"]}.json'), 'w') as f:
+                json.dump(records, f)
+
+class IwlsStandIn():
+    """
+    Local HTTP server answering like the IWLS API.
+    """
+    def __init__(self, fixtures=None, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 503, seed: int = None):
+        """
+        Init method.
+
+        :param fixtures: responses to serve, 50 synthetic stations if None (SyntheticFixtures or RecordedFixtures)
+        :param latency: seconds added to every response (float)
+        :param jitter: maximum random seconds added to the latency (float)
+        :param error_rate: fraction of requests answered with error_status (float)
+        :param error_status: HTTP status of injected errors (int)
+        :param seed: random seed of jitter and errors (int)
+        """
+        self.fixtures = fixtures or SyntheticFixtures()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.server = None
+
+        # Number of requests received by endpoint ('stations', 'metadata', 'data', 'error')
+        self.counts = {'stations': 0, 'metadata': 0, 'data': 0, 'error': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        """
+        IWLS API root url of the running server, used as base_url connector option.
+        """
+        return f'http://{self.server.server_address[0]}:{self.server.server_port}/api/'
+
+    def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """
+        Start the server in a background thread.
+
+        :param host: listening address (string)
+        :param port: listening port, any free port if 0 (int)
+        :returns: IWLS API root url (string)
+        """
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name='iwls-stand-in', daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        """
+        Stop the server.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _count(self, key: str):
+        """
+        Count a request received by an endpoint.
+        """
+        with self._lock:
+            self.counts[key] += 1
+
+    def respond(self, path: str, query: dict):
+        """
+        Return the HTTP status and JSON body for a request.
+
+        :param path: request path, e.g. /api/v1/stations/{id}/data (string)
+        :param query: query parameters (dict)
+        :returns: HTTP status and body (tuple)
+        """
+        if self.error_rate and self.random.random() < self.error_rate:
+            self._count('error')
+            return self.error_status, {'message': 'Injected error'}
+
+        parts = [i for i in path.split('/') if i]
+        if parts[-2:] == ['v1', 'stations']:
+            self._count('stations')
+            return 200, self.fixtures.summary()
+
+        if len(parts) >= 4 and parts[-4:-2] == ['v1', 'stations'] and parts[-1] == 'metadata':
+            self._count('metadata')
+            metadata = self.fixtures.metadata(parts[-2])
+            return (200, metadata) if metadata else (404, {'message': 'Station not found'})
+
+        if len(parts) >= 4 and parts[-4:-2] == ['v1', 'stations'] and parts[-1] == 'data':
+            self._count('data')
+            try:
+                start = datetime.datetime.strptime(query['from'], TIME_FORMAT).replace(tzinfo=datetime.timezone.utc)
+                end = datetime.datetime.strptime(query['to'], TIME_FORMAT).replace(tzinfo=datetime.timezone.utc)
+                series_code = query['time-series-code']
+            except (KeyError, ValueError):
+                return 400, {'message': 'from, to and time-series-code are required'}
+            if end - start > datetime.timedelta(days=MAX_REQUEST_DAYS):
+                return 400, {'message': f'Requests are limited to {MAX_REQUEST_DAYS} days'}
+            data = self.fixtures.data(parts[-2], series_code, start, end)
+            return (200, data) if data is not None else (404, {'message': 'Station not found'})
+
+        return 404, {'message': 'Not found'}
+
+    def _handler(self):
+        """
+        Build the request handler class bound to this server.
+        """
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def handle(self):
+                # Clients drop calls they no longer need, e.g. the slower of two hedged calls
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                status, body = stand_in.respond(url.path, query)
+
+                delay = stand_in.latency + (stand_in.random.uniform(0, stand_in.jitter) if stand_in.jitter else 0)
+                if delay:
+                    time.sleep(delay)
+
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the IWLS API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--fixtures', help='recorded fixtures folder, synthetic stations if not set')
+    parser.add_argument('--stations', type=int, default=50, help='number of synthetic stations')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='maximum random seconds added to the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with an error')
+    parser.add_argument('--error-status', type=int, default=503)
+    args = parser.parse_args()
+
+    fixtures = RecordedFixtures(args.fixtures) if args.fixtures else SyntheticFixtures(args.stations)
+    stand_in = IwlsStandIn(fixtures, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, error_status=args.error_status)
+    print(f'IWLS stand-in serving on {stand_in.start(args.host, args.port)}')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stand_in.stop()
+
+if __name__ == '__main__':
+    main()
@@ -17,8 +17,11 @@ from pathlib import Path
 from dataclasses import dataclass
 
 # Local imports
+from provider_iwls.api_connector.iwls_api_config import IwlsApiConfig
 from provider_iwls.api_connector.iwls_api_connector_waterlevels import IwlsApiConnectorWaterLevels
 from provider_iwls.api_connector.iwls_api_connector_currents import IwlsApiConnectorCurrents
+from provider_iwls.api_connector.iwls_api_connector_async import AsyncIwlsApiConnectorWaterLevels, AsyncIwlsApiConnectorCurrents
+from provider_iwls.api_connector.iwls_station_series import render_feature_collection
 import provider_iwls.s100_processing.s104 as s104
 import provider_iwls.s100_processing.s111 as s111
 
@@ -49,6 +52,13 @@ class S100Processor(BaseProcessor):
         # Temporary file for zip output
         self.output_dir_name = 'output_response'
 
+        # Connector settings (pool size, timeouts...) from processor definition options
+        options = dict(processor_def.get('options') or {})
+
+        # Debug mode adds the api result (output.json) to the returned archive
+        self.debug = bool(options.pop('debug', False))
+        self.connector_config = IwlsApiConfig.from_dict(options)
+
 
     def execute(self, data: dict):
         """
@@ -118,11 +128,14 @@ class S100Processor(BaseProcessor):
         :returns: Api request result (dict)
         '''
         # Send Request to IWLS API
+        # Async connectors schedule every station on a single event loop
         if layer == 'S104':
-            # Establish connection to IWLS API
-            api = IwlsApiConnectorWaterLevels()
+            connector_class = AsyncIwlsApiConnectorWaterLevels if self.connector_config.use_async else IwlsApiConnectorWaterLevels
         else:
-            api = IwlsApiConnectorCurrents()
+            connector_class = AsyncIwlsApiConnectorCurrents if self.connector_config.use_async else IwlsApiConnectorCurrents
+
+        # Reuse the connection to IWLS API of previous requests with the same settings
+        api = connector_class.shared(self.connector_config)
 
         # Pass query to IWLS API and return geojson
         return api._get_timeseries_by_boundary(start_time, end_time, bbox)
@@ -131,7 +144,6 @@ class S100Processor(BaseProcessor):
         '''
         Process a s100 request through the s104/s111 generator classes.
 
-        :param response_path: Path to json containing all results (str)
         :param temp_folder_path: Temp directory path (str)
         :param layer: Specified layer to create S*** file (i.e. S104 or S111)
         :param result: Returned results from api request (dict)
@@ -141,22 +153,23 @@ class S100Processor(BaseProcessor):
         s100_folder_path = Path(temp_folder_path).joinpath('s100')
         os.mkdir(s100_folder_path)
 
-        # Create a json containing the output results from the api
-        result_path = os.path.join(temp_folder_path, 'output.json')
-        with open(result_path, 'w', encoding='utf-8') as result_file:
-            json.dump(result, result_file, ensure_ascii=False, indent=4)
+        # Only write the output results from the api in debug mode, generators use them in memory
+        if self.debug:
+            result_path = os.path.join(s100_folder_path, 'output.json')
+            with open(result_path, 'w', encoding='utf-8') as result_file:
+                json.dump(render_feature_collection(result), result_file, ensure_ascii=False, indent=4)
 
         # Create S-100 Files from Geojson return
         if layer == 'S104':
             logging.info('Creating S-104 Files')
             s104.S104GeneratorDCF8(
-              result_path, s100_folder_path,'./templates/DCF8_009_104CA0024900N12400W_production.h5'
+              result, s100_folder_path,'./templates/DCF8_009_104CA0024900N12400W_production.h5'
             ).create_s100_tiles_from_template('./templates/tiles_grid_level_2.json')
 
         else:
             logging.info('Creating S-111 Files')
             s111.S111GeneratorDCF8(
-              result_path, s100_folder_path,'./templates/DCF8_111_111CA0024900N12400W_production.h5'
+              result, s100_folder_path,'./templates/DCF8_111_111CA0024900N12400W_production.h5'
             ).create_s100_tiles_from_template('./templates/tiles_grid_level_2.json')
 
         return s100_folder_path
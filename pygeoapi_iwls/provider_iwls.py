@@ -7,22 +7,76 @@ import dateutil.parser
 
 # Packages imports
 import pandas as pd
-from pygeoapi.provider.base import BaseProvider
+from pygeoapi.provider.base import (
+    BaseProvider, ProviderItemNotFoundError, ProviderInvalidQueryError, ProviderConnectionError)
 from zipfile import ZipFile
 
 # Local imports
+from provider_iwls.api_connector.iwls_api_config import IwlsApiConfig
 from provider_iwls.api_connector.iwls_api_connector_waterlevels import IwlsApiConnectorWaterLevels
 from provider_iwls.api_connector.iwls_api_connector_currents import IwlsApiConnectorCurrents
+from provider_iwls.api_connector.iwls_api_connector_async import AsyncIwlsApiConnectorWaterLevels, AsyncIwlsApiConnectorCurrents
+from provider_iwls.api_connector.iwls_station_index import StationNotFoundError
+from provider_iwls.api_connector.iwls_station_series import (
+    AGGREGATIONS, parse_interval, resample_feature, render_feature, render_feature_collection)
 
 class ProviderIwls(BaseProvider):
     """
     Provider abstract base class for iwls data. Used as parent by ProviderIwlsWaterLevels
     and ProviderIwlsCurrents.
     """
+    # Connector classes of the child class, async variant used when the use_async option is set
+    connector_class = None
+    async_connector_class = None
+
     def __init__(self, provider_def):
         """Inherit from parent class"""
         super().__init__(provider_def)
 
+        # Connector settings (pool size, timeouts...) from provider definition options,
+        # the IWLS API root url comes from the provider data unless set in options
+        options = dict(self.options or {})
+        if self.data:
+            options.setdefault('base_url', self.data)
+        self.connector_config = IwlsApiConfig.from_dict(options)
+
+        # Connector built by the first provider with these settings, then reused by every request
+        if self.connector_config.use_async:
+            self.connector = self.async_connector_class.shared(self.connector_config)
+        else:
+            self.connector = self.connector_class.shared(self.connector_config)
+
+        # Feature properties accepted by pygeoapi in the properties parameter of queries
+        self.properties = list(self.properties or []) + [
+            i for i in ['metadata', *self.connector.series_codes] if i not in (self.properties or [])]
+
+        # Vendor query parameters, pygeoapi only passes declared fields to query
+        self.fields = {'resample': {'type': 'string'}, 'agg': {'type': 'string'}}
+
+    def _resampling(self, properties: list = [], **kwargs) -> tuple:
+        """
+        Resampling of the series of a request, from the resample and agg query parameters
+        or keyword arguments of query, defaults from the provider options. Values are checked
+        before any IWLS request, pygeoapi 0.12 only checks the parameter names (unknown names
+        are a 400) and reports the ProviderInvalidQueryError of a bad value as a 500.
+
+        :param properties: list of tuples (name, value) passed by pygeoapi to query (list)
+        :returns: interval, None if series are not resampled (np.timedelta64), and aggregation (string)
+        """
+        params = dict(properties or [])
+        params.update({k: kwargs[k] for k in ('resample', 'agg') if kwargs.get(k)})
+        interval = params.get('resample', self.connector_config.resample)
+        agg = params.get('agg', self.connector_config.resample_agg)
+
+        if not interval:
+            return None, agg
+        if agg not in AGGREGATIONS:
+            raise ProviderInvalidQueryError(f'Unknown aggregation {agg}, expected one of {", ".join(AGGREGATIONS)}')
+        try:
+            return parse_interval(interval), agg
+        except ValueError as e:
+            raise ProviderInvalidQueryError(str(e)) from e
+
     def _provider_get_station_data(self):
         # Method needs to be implemented by child class
         raise NotImplementedError("Must override _provider_get_station_data")
@@ -38,8 +92,9 @@ class ProviderIwls(BaseProvider):
         :param identifier: feature id (int)
         :returns: feature collection
         """
-        # Establish connection to IWLS API
-        api = IwlsApiConnectorWaterLevels()
+        # pygeoapi does not pass query parameters to get, series are resampled
+        # with the resample and resample_agg options only
+        interval, agg = self._resampling()
 
         # Only latest 24h of data available throught get method
         now = datetime.datetime.now()
@@ -48,10 +103,19 @@ class ProviderIwls(BaseProvider):
         end_time = tomorrow.strftime('%Y-%m-%dT%H:%M:%SZ')
         start_time = yesterday.strftime('%Y-%m-%dT%H:%M:%SZ')
 
-        # Pass query to IWLS API
-        return self._provider_get_station_data(identifier, start_time, end_time, api)
+        # Pass query to IWLS API, unknown stations are reported as missing items (404)
+        try:
+            feature = self._provider_get_station_data(identifier, start_time, end_time, self.connector)
+        except StationNotFoundError as e:
+            raise ProviderItemNotFoundError(str(e)) from e
+
+        # Series are aggregated on their arrays, before being rendered as GeoJSON properties
+        if interval is not None:
+            feature = resample_feature(feature, interval, agg)
+
+        return render_feature(feature)
 
-    def query(self, start_index=0, limit=10, result_type='results',
+    def query(self, startindex=0, limit=10, resulttype='results',
               bbox=[], datetime_=None, properties=[], sortby=[],
               select_properties=[], skip_geometry=False, q=None, **kwargs):
 
@@ -60,21 +124,29 @@ class ProviderIwls(BaseProvider):
 
         :param startindex: starting record to return (default 0) (int)
         :param limit: number of records to return (default 10) (int)
-        :param result_type: return results or hit limit (default results)
+        :param resulttype: return results or hit limit (default results)
         :param bbox: bounding box [minx,miny,maxx,maxy] (default empty list []) (list)
         :param datetime_: temporal (datestamp or extent) (string)
-        :param properties: list of tuples (name, value) (list)
+        :param properties: list of tuples (name, value), only resample and agg are used (list)
         :param sortby: list of dicts (property, order) (list)
         :param select_properties: list of property names (list)
         :param skip_geometry: bool of whether to skip geometry (default False) (bool)
         :param q: full-text search term(s) (default None) (string)
+        :param resample: interval the series are aggregated over, e.g. 1h, overrides properties (string)
+        :param agg: aggregation of the values of an interval: mean, min, max or last (string)
         :returns: dict of 0..n GeoJSON features
         """
         result  = None
 
+        interval, agg = self._resampling(properties, **kwargs)
+
         if not bbox:
            bbox = [-180,-90,180,90]
 
+        # Hits are counted from the station index, without any time series request
+        if resulttype == 'hits':
+            return self.connector._count_stations_by_boundary(bbox)
+
         if not datetime_:
             now = datetime.datetime.now()
             yesterday = now - datetime.timedelta(days=1)
@@ -85,19 +157,26 @@ class ProviderIwls(BaseProvider):
             start_time = datetime_.split('/')[0]
             end_time = datetime_.split('/')[1]
 
-        # Establish connection to IWLS API
-        api = IwlsApiConnectorWaterLevels()
-
-        # Pass query to IWLS API
-        return self._provider_get_timeseries_by_boundary(
-            start_time, end_time, bbox, limit, start_index, api
+        # Pass query to IWLS API, only the selected series are requested
+        collection = self._provider_get_timeseries_by_boundary(
+            start_time, end_time, bbox, limit, startindex, self.connector,
+            properties=select_properties, skip_geometry=skip_geometry
         )
 
+        # Series are aggregated on their arrays, then rendered as GeoJSON properties
+        if interval is not None:
+            collection['features'] = [resample_feature(i, interval, agg) for i in collection['features']]
+
+        return render_feature_collection(collection)
+
 
 class ProviderIwlsWaterLevels(ProviderIwls):
     """
     Provider class for iwls Water Level data
     """
+    connector_class = IwlsApiConnectorWaterLevels
+    async_connector_class = AsyncIwlsApiConnectorWaterLevels
+
     def __init__(self, provider_def):
         """Inherits from ProviderIwls class"""
         super().__init__(provider_def)
@@ -115,7 +194,8 @@ class ProviderIwlsWaterLevels(ProviderIwls):
         """
         return api._get_station_data(identifier, start_time, end_time)
 
-    def _provider_get_timeseries_by_boundary(self, start_time: str, end_time: str, bbox: list, limit: int, start_index: int, api: IwlsApiConnectorWaterLevels):
+    def _provider_get_timeseries_by_boundary(self, start_time: str, end_time: str, bbox: list, limit: int, start_index: int, api: IwlsApiConnectorWaterLevels,
+                                             properties: list = None, skip_geometry: bool = False):
         """
         Calls _get_timeseries_by_boundary in IwlsApiConnectorWaterlevels class. Used by pygeoapi query method.
 
@@ -125,10 +205,13 @@ class ProviderIwlsWaterLevels(ProviderIwls):
         :param limit: number of records to return (default 10) (int)
         :param startindex: starting record to return (default 0) (int)
         :param api: api connection to IWLS (IwlsApiConnectorWaterLevels)
+        :param properties: feature properties to return, only these series are requested, all if empty (list)
+        :param skip_geometry: build features without geometry (bool)
         :returns: dict of 0..n GeoJSON features
         """
         return api._get_timeseries_by_boundary(
-            start_time, end_time, bbox, limit, start_index
+            start_time, end_time, bbox, limit, start_index,
+            properties=properties, skip_geometry=skip_geometry
         )
 
 
@@ -136,6 +219,9 @@ class ProviderIwlsCurrents(ProviderIwls):
     """
     Provider class for iwls Water Level Currents
     """
+    connector_class = IwlsApiConnectorCurrents
+    async_connector_class = AsyncIwlsApiConnectorCurrents
+
     def __init__(self, provider_def):
         """Inherits from ProviderIwls class"""
         super().__init__(provider_def)
@@ -152,7 +238,8 @@ class ProviderIwlsCurrents(ProviderIwls):
 
         return api._get_station_data(identifier, start_time, end_time)
 
-    def _provider_get_timeseries_by_boundary(self, start_time: str, end_time: str, bbox: list, limit: int, start_index: int, api: IwlsApiConnectorCurrents):
+    def _provider_get_timeseries_by_boundary(self, start_time: str, end_time: str, bbox: list, limit: int, start_index: int, api: IwlsApiConnectorCurrents,
+                                             properties: list = None, skip_geometry: bool = False):
         """
         Calls _get_timeseries_by_boundary in IwlsApiConnectorCurrents class. Used by pygeoapi query method.
 
@@ -162,8 +249,124 @@ class ProviderIwlsCurrents(ProviderIwls):
         :param limit: number of records to return (default 10) (int)
         :param startindex: starting record to return (default 0) (int)
         :param api: api connection to IWLS (IwlsApiConnectorCurrents)
+        :param properties: feature properties to return, only these series are requested, all if empty (list)
+        :param skip_geometry: build features without geometry (bool)
         :returns: dict of 0..n GeoJSON features (json)
         """
         return api._get_timeseries_by_boundary(
-            start_time, end_time, bbox, limit, start_index
+            start_time, end_time, bbox, limit, start_index,
+            properties=properties, skip_geometry=skip_geometry
         )
+
+
+class ProviderIwlsLatest(ProviderIwls):
+    """
+    Provider abstract base class for the latest value of a time series at every station,
+    served from an in-memory table refreshed in the background (see LatestValues).
+    Requests never call the IWLS API, they wait for the first refresh of the table
+    for at most latest_ready_timeout seconds. The table and its poller are per process,
+    every pygeoapi worker process polls the IWLS API on its own.
+    Used as parent by ProviderIwlsLatestWaterLevels and ProviderIwlsLatestCurrents.
+    """
+    # Time series code of the child class
+    latest_series = None
+
+    def __init__(self, provider_def):
+        """Inherits from ProviderIwls class, start the shared poller on first use"""
+        super().__init__(provider_def)
+
+        self.properties = list(provider_def.get('properties', [])) + [
+            'officialName', 'timeSeriesCode', 'eventDate', 'value']
+        # Latest values are never resampled
+        self.fields = {}
+        self.latest = self.connector.latest_values(self.latest_series)
+
+    def close(self):
+        """
+        Stop polling the IWLS API for the latest values, for every provider of the process.
+        """
+        self.latest.close()
+
+    def _wait_ready(self):
+        """
+        Wait for the first refresh of the table, a worker process started recently
+        would otherwise answer with no stations.
+        """
+        if not self.latest.ready.wait(self.connector_config.latest_ready_timeout):
+            raise ProviderConnectionError(f'Latest {self.latest_series} values are not loaded yet')
+
+    def get(self, identifier, **kwargs):
+        """
+        Latest value of a single station.
+
+        :param identifier: five digits station identifier (string)
+        :returns: GeoJSON feature
+        """
+        self._wait_ready()
+        feature = self.latest.get(identifier)
+        if feature is None:
+            raise ProviderItemNotFoundError(f'No latest {self.latest_series} value for station {identifier}')
+
+        # Table entries are shared by every request, pygeoapi adds links to the returned feature
+        return dict(feature)
+
+    def query(self, startindex=0, limit=10, resulttype='results',
+              bbox=[], datetime_=None, properties=[], sortby=[],
+              select_properties=[], skip_geometry=False, q=None, **kwargs):
+        """
+        Latest value of the stations inside a bounding box.
+
+        :param startindex: starting record to return (default 0) (int)
+        :param limit: number of records to return (default 10) (int)
+        :param resulttype: return results or hit limit (default results)
+        :param bbox: bounding box [minx,miny,maxx,maxy] (default empty list []) (list)
+        :param datetime_: ignored, values are always the latest ones (string)
+        :param properties: ignored (list)
+        :param sortby: ignored (list)
+        :param select_properties: list of property names (list)
+        :param skip_geometry: bool of whether to skip geometry (default False) (bool)
+        :param q: ignored (string)
+        :returns: dict of 0..n GeoJSON features
+        """
+        if not bbox:
+           bbox = [-180,-90,180,90]
+
+        self._wait_ready()
+
+        # Stations are selected with the spatial index, values are read from the table
+        stations = self.connector.registry.index.stations_in_bbox(bbox, self.latest_series)
+        features = [i for i in map(self.latest.get, stations.code) if i is not None]
+
+        if resulttype == 'hits':
+            return {'type': 'featureCollection', 'features': [],
+                    'numberMatched': len(features), 'numberReturned': 0}
+
+        page = []
+        for feature in features[startindex:startindex + limit]:
+            feature = dict(feature)
+            if select_properties:
+                feature['properties'] = {k: v for k, v in feature['properties'].items() if k in select_properties}
+            if skip_geometry:
+                feature['geometry'] = None
+            page.append(feature)
+
+        return {'type': 'featureCollection', 'features': page,
+                'numberMatched': len(features), 'numberReturned': len(page)}
+
+
+class ProviderIwlsLatestWaterLevels(ProviderIwlsLatest):
+    """
+    Provider class for the latest iwls Water Level observation of every station
+    """
+    connector_class = IwlsApiConnectorWaterLevels
+    async_connector_class = AsyncIwlsApiConnectorWaterLevels
+    latest_series = 'wlo'
+
+
+class ProviderIwlsLatestCurrents(ProviderIwlsLatest):
+    """
+    Provider class for the latest iwls Surface Current speed observation of every station
+    """
+    connector_class = IwlsApiConnectorCurrents
+    async_connector_class = AsyncIwlsApiConnectorCurrents
+    latest_series = 'wcs1'
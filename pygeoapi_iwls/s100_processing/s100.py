@@ -13,6 +13,8 @@ import numpy as np
 
 # Import utility script
 import provider_iwls.s100_processing.s100_util as s100_util
+from provider_iwls.spatial_index import GridIndex
+from provider_iwls.api_connector.iwls_station_series import StationSeries
 
 class S100GeneratorDCF8():
     """
@@ -21,20 +23,20 @@ class S100GeneratorDCF8():
     """
 
     def __init__(self,
-                 json_path: str,
+                 data,
                  folder_path: str,
                  template_path: str,
                  class_def: object):
         """
         S100 init method.
 
-        :param json_path: path to geojson to process (string)
+        :param data: geojson to process, feature collection or path to a geojson file (dict or string)
         :param folder_path: path to processing folder (string)
         :param template_path: path to S-100 h5 file production template (string)
         :param class_def: S104 or S111 Def classes to extract hardcoded class data.
         """
         self.folder_path = Path(folder_path)
-        self.json_path = Path(json_path)
+        self.data = data
         self.template_path = Path(template_path)
         self.dataset_names = class_def.dataset_names
         self.dataset_types = class_def.dataset_types
@@ -51,20 +53,18 @@ class S100GeneratorDCF8():
         :param grid_path: path to geojson tile grid (string)
         """
 
-        assert self.json_path.exists(), \
-            "Json path does not exist: {json_path}".format(json_path=self.json_path)
-
-        # Load Json and convert to python dict
-        with open(self.json_path) as data_file:
-            data = json.loads(data_file.read())
-
         # convert to list of stations dicts
-        data = data['features']
+        data = self._load_features()
 
         # Convert geojson grid to list of grid cells
         with open(grid_path) as grid_file:
             grid_list = json.load(grid_file)['features']
 
+        # Spatial index of station positions, queried once per grid cell
+        station_index = GridIndex(
+            [item['properties']['metadata']['longitude'] for item in data],
+            [item['properties']['metadata']['latitude'] for item in data])
+
         # Loop over every cells and generate S-100 if data exists in request
         for i in grid_list:
             polygon = i['geometry']['coordinates'][0]
@@ -72,13 +72,10 @@ class S100GeneratorDCF8():
             cell_min_lat = min([x[1] for x in polygon])
             cell_max_lon = max([x[0] for x in polygon])
             cell_min_lon = min([x[0] for x in polygon])
-            cell_data_list = []
-            # Search for stations within cell boundaries
 
-            for item in data:
-                if ((cell_min_lat < item['properties']['metadata']['latitude'] < cell_max_lat)
-                    and (cell_min_lon < item['properties']['metadata']['longitude'] < cell_max_lon)):
-                   cell_data_list.append(item)
+            # Search for stations strictly within cell boundaries
+            cell_bbox = [cell_min_lon, cell_min_lat, cell_max_lon, cell_max_lat]
+            cell_data_list = [data[j] for j in station_index.query(cell_bbox, inclusive=False)]
 
             # Generate S100 file if data exist within cell
             if len(cell_data_list) != 0:
@@ -87,6 +84,23 @@ class S100GeneratorDCF8():
                 bbox = [cell_max_lat,cell_min_lat,cell_max_lon,cell_min_lon]
                 self._create_s100_dcf8(cell_data_list,filename,bbox)
 
+    def _load_features(self) -> list:
+        """
+        Return the station features to process, read from disk only if a path was given.
+
+        :return features: GeoJSON features of every station (list)
+        """
+        if isinstance(self.data, dict):
+            return self.data['features']
+
+        json_path = Path(self.data)
+        assert json_path.exists(), \
+            "Json path does not exist: {json_path}".format(json_path=json_path)
+
+        # Load Json and convert to python dict
+        with open(json_path) as data_file:
+            return json.loads(data_file.read())['features']
+
     def _create_s100_dcf8(self,
                           s100_data: dict,
                           filename: str,
@@ -180,7 +194,7 @@ class S100GeneratorDCF8():
         """
         Generate dataframe of water level/surface current information needed to produce S-100 files.
 
-        :param s100_data: iwls json timeseries (Json)
+        :param s100_data: iwls GeoJSON features, series as StationSeries or rendered properties (list)
         :param code: data type code (string)
         :return df: dataframe of water level information needed to produce S-100 files (pandas.core.DataFrame)
         """
@@ -197,8 +211,12 @@ class S100GeneratorDCF8():
                         + '$'
                         + str(i['properties']['metadata']['longitude']))
 
-                stn_data = pd.Series(i['properties'][code], name=name)
-                stn_data.index = pd.to_datetime(stn_data.index)
+                # Connector series are already parsed, rendered GeoJSON properties are parsed here
+                if isinstance(i['properties'][code], StationSeries):
+                    stn_data = i['properties'][code].to_series(name)
+                else:
+                    stn_data = pd.Series(i['properties'][code], name=name)
+                    stn_data.index = pd.to_datetime(stn_data.index)
                 data_list.append(stn_data)
 
         if data_list:
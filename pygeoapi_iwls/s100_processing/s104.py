@@ -23,17 +23,17 @@ class S104GeneratorDCF8(S100GeneratorDCF8):
     """
     def __init__(
             self,
-            json_path: str,
+            data,
             folder_path: str,
             template_path: str):
         """
         S104 init method. Call s100 base class with preconfigured S104 data.
 
-        :param json_path: path to geojson to process (string)
+        :param data: geojson to process, feature collection or path to a geojson file (dict or string)
         :param folder_path: path to processing folder (string)
         :param template_path: path to S-100 h5 file production template (string)
         """
-        super().__init__(json_path=json_path,
+        super().__init__(data=data,
                          folder_path=folder_path,
                          template_path=template_path,
                          class_def=S104Def)
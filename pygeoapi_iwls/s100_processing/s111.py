@@ -22,17 +22,17 @@ class S111GeneratorDCF8(S100GeneratorDCF8):
 
     def __init__(
             self,
-            json_path: str,
+            data,
             folder_path: str,
             template_path: str):
         """
         S111 init method. Call s100 base class with preconfigured S111 data.
 
-        :param json_path: path to geojson to process (string)
+        :param data: geojson to process, feature collection or path to a geojson file (dict or string)
         :param folder_path: path to processing folder (string)
         :param template_path: path to S-100 h5 file production template (string)
         """
-        super().__init__(json_path=json_path,
+        super().__init__(data=data,
                          folder_path=folder_path,
                          template_path=template_path,
                          class_def=S111Def)
@@ -0,0 +1,92 @@
+# Standard library imports
+import math
+
+# Packages imports
+import numpy as np
+
+class GridIndex():
+    """
+    Uniform grid spatial index over point coordinates (WGS84 longitude/latitude).
+    Points are bucketed in cell_size x cell_size degree cells, a bounding box query
+    only visits the cells it overlaps. Used to select stations in a bounding box and
+    to match stations to S-100 tiles.
+    """
+    def __init__(self, lons, lats, cell_size: float = 1.0):
+        """
+        Init method, bucket every point in its grid cell.
+
+        :param lons: longitude of every point (iterable)
+        :param lats: latitude of every point (iterable)
+        :param cell_size: grid cell width and height in degrees (float)
+        """
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.cell_size = cell_size
+
+        assert len(self.lons) == len(self.lats), \
+            f'{len(self.lons)} longitudes but {len(self.lats)} latitudes'
+
+        # Points without coordinates are never returned
+        valid = np.flatnonzero(~(np.isnan(self.lons) | np.isnan(self.lats)))
+        cell_x = self._cell(self.lons[valid], 180.0)
+        cell_y = self._cell(self.lats[valid], 90.0)
+
+        cells = {}
+        for position, x, y in zip(valid, cell_x, cell_y):
+            cells.setdefault((x, y), []).append(position)
+        self.cells = {k: np.array(v, dtype=np.int64) for k, v in cells.items()}
+
+    def _cell(self, values, offset: float):
+        """
+        Return the cell number of coordinates along one axis.
+
+        :param values: longitudes or latitudes (np.ndarray)
+        :param offset: 180 for longitudes, 90 for latitudes (float)
+        :returns: cell numbers (np.ndarray)
+        """
+        return np.floor((values + offset) / self.cell_size).astype(np.int64)
+
+    def _candidates(self, bbox: list) -> np.ndarray:
+        """
+        Return positions of the points in every cell overlapped by a bounding box.
+
+        :param bbox: bounding box [minx,miny,maxx,maxy], minx <= maxx (list)
+        :returns: point positions (np.ndarray)
+        """
+        min_x, max_x = (math.floor((bbox[i] + 180.0) / self.cell_size) for i in (0, 2))
+        min_y, max_y = (math.floor((bbox[i] + 90.0) / self.cell_size) for i in (1, 3))
+
+        # Large boxes: scanning occupied cells is cheaper than enumerating covered cells
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(self.cells):
+            keys = [k for k in self.cells if min_x <= k[0] <= max_x and min_y <= k[1] <= max_y]
+        else:
+            keys = [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)
+                    if (x, y) in self.cells]
+
+        if not keys:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.cells[k] for k in keys])
+
+    def query(self, bbox: list, inclusive: bool = True) -> np.ndarray:
+        """
+        Return positions of the points inside a bounding box, in ascending order.
+        A box with minx > maxx crosses the antimeridian.
+
+        :param bbox: bounding box [minx,miny,maxx,maxy] (list)
+        :param inclusive: include points on the box boundary if True (bool)
+        :returns: point positions (np.ndarray)
+        """
+        if bbox[0] > bbox[2]:
+            east = self.query([bbox[0], bbox[1], 180.0, bbox[3]], inclusive)
+            west = self.query([-180.0, bbox[1], bbox[2], bbox[3]], inclusive)
+            return np.union1d(east, west)
+
+        candidates = self._candidates(bbox)
+        lons, lats = self.lons[candidates], self.lats[candidates]
+
+        if inclusive:
+            inside = (bbox[0] <= lons) & (lons <= bbox[2]) & (bbox[1] <= lats) & (lats <= bbox[3])
+        else:
+            inside = (bbox[0] < lons) & (lons < bbox[2]) & (bbox[1] < lats) & (lats < bbox[3])
+
+        return np.sort(candidates[inside])
@@ -0,0 +1,38 @@
+import contextlib
+
+from pytest import fixture
+
+from provider_iwls.iwls_stand_in import IwlsStandIn, SyntheticFixtures
+from provider_iwls.api_connector.iwls_shared import Shared
+
+@fixture(autouse=True)
+def shared_instances():
+    # Connectors, caches and pollers are shared by the process, no test sees those of another one
+    yield
+    Shared.reset()
+
+@fixture
+def workdir(tmp_path, monkeypatch):
+    # requests_cache files are written in the working folder
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@fixture
+def start_stand_in(workdir):
+    """
+    Start local IWLS stand-ins serving synthetic stations, stopped at the end of the test.
+    """
+    with contextlib.ExitStack() as stack:
+        def start(n_stations: int = 8, **kwargs) -> IwlsStandIn:
+            return stack.enter_context(IwlsStandIn(SyntheticFixtures(n_stations=n_stations), **kwargs))
+        yield start
+
+@fixture
+def provider_def():
+    """
+    Build the pygeoapi definition of an IWLS provider, options are passed to the connector settings.
+    """
+    def definition(provider_class, base_url: str, **options) -> dict:
+        return {'name': f'provider_iwls.provider_iwls.{provider_class.__name__}', 'type': 'feature',
+                'data': base_url, 'id_field': 'id', 'options': options}
+    return definition
@@ -0,0 +1,119 @@
+import os
+import json
+import importlib
+
+import requests
+from pytest import fixture, raises
+
+from provider_iwls.iwls_stand_in import IwlsStandIn, SyntheticFixtures
+from provider_iwls.provider_iwls import ProviderIwlsCurrents
+from provider_iwls.api_connector.iwls_api_config import IwlsApiConfig
+from provider_iwls.api_connector.iwls_api_connector_waterlevels import IwlsApiConnectorWaterLevels
+from provider_iwls.api_connector.iwls_api_connector_currents import IwlsApiConnectorCurrents
+from provider_iwls.api_connector.iwls_api_connector_async import (
+    AsyncIwlsApiConnectorWaterLevels, AsyncIwlsApiConnectorCurrents)
+from provider_iwls.api_connector.iwls_station_series import render_feature_collection
+
+START_TIME = '2023-01-01T06:30:00Z'
+END_TIME = '2023-01-03T03:00:00Z'
+BBOX = [-180, -90, 180, 90]
+
+@fixture(scope='module')
+def stand_in():
+    with IwlsStandIn(SyntheticFixtures(n_stations=8)) as stand_in:
+        yield stand_in
+
+@fixture
+def config(stand_in, workdir):
+    return IwlsApiConfig(base_url=stand_in.base_url, timeseries_cache_path=None, max_retries=0)
+
+def as_json(collection: dict) -> str:
+    return json.dumps(render_feature_collection(collection), sort_keys=True)
+
+def test_same_output(config, tmp_path):
+    for sync_class, async_class in [(IwlsApiConnectorWaterLevels, AsyncIwlsApiConnectorWaterLevels),
+                                    (IwlsApiConnectorCurrents, AsyncIwlsApiConnectorCurrents)]:
+        expected = as_json(sync_class(config)._get_timeseries_by_boundary(START_TIME, END_TIME, BBOX, 8, 0))
+        assert as_json(async_class(config)._get_timeseries_by_boundary(START_TIME, END_TIME, BBOX, 8, 0)) == expected
+
+        # Cold then warm local time series store
+        config.timeseries_cache_path = str(tmp_path / f'{sync_class.__name__}.sqlite')
+        for i in range(2):
+            assert as_json(async_class(config)._get_timeseries_by_boundary(START_TIME, END_TIME, BBOX, 8, 0)) == expected
+        config.timeseries_cache_path = None
+
+def test_stations_in_flight(config):
+    api = AsyncIwlsApiConnectorWaterLevels(config)
+    api._get_timeseries_by_boundary(START_TIME, END_TIME, BBOX, 8, 0)
+    # Every station is scheduled at once, API calls are limited by max_in_flight
+    assert (api.stations_in_flight.current, api.stations_in_flight.peak) == (0, 8)
+
+def test_same_csv(config):
+    IwlsApiConnectorWaterLevels(config)._get_station_data('00001', START_TIME, END_TIME, csv=True)
+    with open('00001.csv') as f:
+        expected = f.read()
+    os.remove('00001.csv')
+
+    AsyncIwlsApiConnectorWaterLevels(config)._get_timeseries_by_boundary(START_TIME, END_TIME, BBOX, 1, 0, csv=True)
+    with open('00001.csv') as f:
+        assert f.read() == expected
+
+def test_provider(stand_in, config):
+    definition = {'name': 'provider_iwls.provider_iwls.ProviderIwlsCurrents', 'type': 'feature',
+                  'data': stand_in.base_url, 'options': {'timeseries_cache_path': None}}
+    expected = ProviderIwlsCurrents(definition).query(datetime_=f'{START_TIME}/{END_TIME}')
+
+    definition['options']['use_async'] = True
+    provider = ProviderIwlsCurrents(definition)
+    assert type(provider.connector) is AsyncIwlsApiConnectorCurrents
+    assert provider.query(datetime_=f'{START_TIME}/{END_TIME}') == expected
+
+def test_processor(stand_in, config, tmp_path, monkeypatch):
+    # The process metadata is read from the working folder on import
+    monkeypatch.chdir(os.path.join(os.path.dirname(__file__), '..'))
+    process_iwls = importlib.import_module('provider_iwls.process_iwls')
+    monkeypatch.chdir(tmp_path)
+
+    results = []
+    for use_async, connector_class in [(False, IwlsApiConnectorWaterLevels), (True, AsyncIwlsApiConnectorWaterLevels)]:
+        processor = process_iwls.S100Processor({'name': 'provider_iwls.process_iwls.S100Processor', 'options': {
+            'base_url': stand_in.base_url, 'timeseries_cache_path': None, 'use_async': use_async}})
+        results.append(as_json(processor.send_api_request('S104', BBOX, START_TIME, END_TIME)))
+        # Requests with the same settings reuse the shared connector
+        assert connector_class.shared(processor.connector_config).stations_in_flight.peak > 0
+    assert results[0] == results[1]
+
+def test_get_timeseries_is_async(config, monkeypatch):
+    # The blocking method of the async connector sends its calls with aiohttp
+    api = AsyncIwlsApiConnectorWaterLevels(config)
+    monkeypatch.setattr(api.session, 'get', None)
+    url = f'{config.base_url}v1/stations/{api._id_from_station_code("00001")}/data'
+    assert len(api._get_timeseries(url, [START_TIME, END_TIME], 'wlo').times) > 0
+
+def test_http_errors(config):
+    url = f'{config.base_url}v1/stations/unknown/data'
+
+    # Sync and async connectors raise the same error
+    for api in [IwlsApiConnectorWaterLevels(config), AsyncIwlsApiConnectorWaterLevels(config)]:
+        with raises(requests.exceptions.HTTPError) as e:
+            api._get_timeseries(url, [START_TIME, END_TIME], 'wlo')
+        assert e.value.response.status_code == 404
+        assert e.value.response.url.startswith(url)
+
+def test_injected_errors(stand_in, config):
+    api = AsyncIwlsApiConnectorWaterLevels(config)
+    url = f'{config.base_url}v1/stations/{api._id_from_station_code("00001")}/data'
+    stand_in.error_rate = 1.0
+    try:
+        with raises(requests.exceptions.HTTPError) as e:
+            api._get_timeseries(url, [START_TIME, END_TIME], 'wlo')
+        assert e.value.response.status_code == 503
+    finally:
+        stand_in.error_rate = 0.0
+
+def test_connection_errors(config):
+    # Nothing listens on the discard port
+    url = 'http://127.0.0.1:9/api/v1/stations/unknown/data'
+    for api in [IwlsApiConnectorWaterLevels(config), AsyncIwlsApiConnectorWaterLevels(config)]:
+        with raises(requests.exceptions.ConnectionError):
+            api._get_timeseries(url, [START_TIME, END_TIME], 'wlo')
@@ -0,0 +1,121 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from pytest import fixture, raises
+
+from provider_iwls.api_connector.iwls_api_config import IwlsApiConfig
+from provider_iwls.api_connector.iwls_api_connector_waterlevels import IwlsApiConnectorWaterLevels
+from provider_iwls.api_connector.iwls_api_connector_async import AsyncIwlsApiConnectorWaterLevels
+
+START_TIME = '2023-01-01T00:00:00Z'
+END_TIME = '2023-01-02T00:00:00Z'
+
+@fixture
+def stand_in(start_stand_in):
+    return start_stand_in(4)
+
+def test_station_deadline(stand_in, caplog):
+    # Without coalescing, a retry does not wait for the calls dropped by the deadline
+    config = IwlsApiConfig(base_url=stand_in.base_url, timeseries_cache_path=None, station_deadline=0.2,
+                           single_flight=False)
+    for connector_class in [IwlsApiConnectorWaterLevels, AsyncIwlsApiConnectorWaterLevels]:
+        api = connector_class(config)
+        api._get_station_metadata('00001')
+
+        stand_in.latency = 0.5
+        try:
+            # Late series fail the station instead of being returned empty
+            with raises(requests.exceptions.Timeout, match='Station 00001 series deadline exceeded') as e:
+                api._get_station_data('00001', START_TIME, END_TIME)
+        finally:
+            stand_in.latency = 0.0
+        assert 'wlo' in str(e.value)
+        assert any(i.levelno == logging.WARNING and '00001' in i.getMessage() for i in caplog.records)
+
+        # Within the deadline every series is returned
+        feature = api._get_station_data('00001', START_TIME, END_TIME)
+        assert all(len(feature['properties'][i]) > 0 for i in ['wlo', 'wlp'])
+
+def test_session_shared_across_threads(stand_in):
+    api = IwlsApiConnectorWaterLevels(IwlsApiConfig(base_url=stand_in.base_url, timeseries_cache_path=None))
+    url = f'{stand_in.base_url}v1/stations/{api._id_from_station_code("00001")}/data'
+
+    barrier = threading.Barrier(4)
+
+    def fetch(i):
+        barrier.wait()
+        for j in range(5):
+            api._fetch_chunk(url, 'wlo', [START_TIME, END_TIME])
+        return api.session._session()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        sessions = list(executor.map(fetch, range(4)))
+
+    # Every thread has its own session, mounted on the connection pool of the connector
+    assert len({id(i) for i in sessions}) == 4
+    assert all(i.get_adapter(url) is api.session.adapter for i in sessions)
+    # 20 calls from 4 threads are sent on kept-alive connections
+    pool = api.session.adapter.poolmanager.connection_from_url(url)
+    assert stand_in.counts['data'] == 20
+    assert pool.num_connections <= 4
+
+class Delays():
+    """
+    Jitter of the stand-in in order of the requests received, then none.
+    """
+    def __init__(self, *delays):
+        self.delays = list(delays)
+
+    def uniform(self, a, b):
+        return self.delays.pop(0) if self.delays else 0.0
+
+def test_chunks_merged_in_time_order(stand_in):
+    time_range = ['2023-01-01T06:30:00Z', '2023-01-05T18:00:00Z']
+    single = IwlsApiConnectorWaterLevels(IwlsApiConfig(base_url=stand_in.base_url, timeseries_cache_path=None))
+    url = f'{stand_in.base_url}v1/stations/{single._id_from_station_code("00001")}/data'
+    expected = single._get_timeseries(url, time_range, 'wlo')
+
+    # One chunk per day, the first chunks requested are the last ones answered
+    api = IwlsApiConnectorWaterLevels(IwlsApiConfig(base_url=stand_in.base_url, timeseries_cache_path=None,
+                                                    max_window_days=1, max_chunk_workers=5))
+    stand_in.jitter = 1.0
+    stand_in.random = Delays(0.4, 0.3, 0.2, 0.1, 0.0)
+    data_before = stand_in.counts['data']
+    t_start = time.monotonic()
+    series = api._get_timeseries(url, time_range, 'wlo')
+    assert time.monotonic() - t_start < 0.8
+    assert stand_in.counts['data'] - data_before == 5
+
+    assert (np.diff(series.times) > np.timedelta64(0)).all()
+    assert np.array_equal(series.times, expected.times) and np.array_equal(series.values, expected.values)
+
+def test_single_flight_on_whole_days(stand_in):
+    # Time ranges ending at the current second differ between requests, they share the calls of their days
+    time_ranges = [['2023-01-01T06:00:00Z', '2023-01-02T12:00:01Z'], ['2023-01-01T06:00:05Z', '2023-01-02T12:00:06Z']]
+    for connector_class in [IwlsApiConnectorWaterLevels, AsyncIwlsApiConnectorWaterLevels]:
+        api = connector_class(IwlsApiConfig(base_url=stand_in.base_url, timeseries_cache_path=None))
+        url = f'{stand_in.base_url}v1/stations/{api._id_from_station_code("00001")}/data'
+        barrier = threading.Barrier(2)
+
+        def fetch(time_range):
+            barrier.wait()
+            return api._get_timeseries(url, time_range, 'wlo')
+
+        stand_in.latency = 0.3
+        data_before = stand_in.counts['data']
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                series = list(executor.map(fetch, time_ranges))
+        finally:
+            stand_in.latency = 0.0
+        assert stand_in.counts['data'] - data_before == 1
+
+        # Each request gets the records of its own time range
+        for time_range, i in zip(time_ranges, series):
+            start_time, end_time = [np.datetime64(t[:-1]) for t in time_range]
+            assert start_time <= i.times[0] < start_time + np.timedelta64(60, 's')
+            assert end_time - np.timedelta64(60, 's') < i.times[-1] <= end_time
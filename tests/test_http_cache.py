@@ -0,0 +1,45 @@
+import sqlite3
+
+from pytest import raises
+
+from provider_iwls.api_connector.iwls_api_config import IwlsApiConfig
+from provider_iwls.api_connector.iwls_api_connector_waterlevels import IwlsApiConnectorWaterLevels
+from provider_iwls.api_connector.iwls_http_cache import HttpCache, LruDictStorage, LruSQLiteDict
+
+def test_memory_eviction():
+    storage = LruDictStorage(max_entries=2)
+    storage['a'] = 1
+    storage['b'] = 2
+    assert storage['a'] == 1
+    storage['c'] = 3
+    assert list(storage.keys()) == ['a', 'c']
+
+def test_sqlite_eviction(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    storage = LruSQLiteDict(path, table_name='responses', max_entries=2)
+    storage['a'] = '1'
+    storage['b'] = '2'
+    assert storage['a'] == '1'
+    storage['c'] = '3'
+    assert sorted(storage.keys()) == ['a', 'c']
+    assert sqlite3.connect(path).execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+def test_unknown_backend():
+    with raises(ValueError):
+        HttpCache('ftp')
+
+def test_counters(start_stand_in, tmp_path):
+    stand_in = start_stand_in(4)
+    config = IwlsApiConfig(base_url=stand_in.base_url, timeseries_cache_path=None,
+                           http_cache_backend='sqlite', http_cache_location=str(tmp_path / 'http.sqlite'),
+                           http_cache_max_entries=100)
+    api = IwlsApiConnectorWaterLevels(config)
+    station_id = api._id_from_station_code('00001')
+    api._fetch_station_metadata(station_id)
+    api._fetch_station_metadata(station_id)
+
+    stats = api.cache_stats['http']
+    assert stats['backend'] == 'sqlite'
+    # Station summary and first metadata call are misses
+    assert (stats['hits'], stats['misses']) == (1, 2)
+    assert stand_in.counts['metadata'] == 1
@@ -0,0 +1,81 @@
+import time
+
+from pytest import raises
+
+from pygeoapi.provider.base import ProviderItemNotFoundError, ProviderConnectionError
+
+from provider_iwls.provider_iwls import ProviderIwlsLatestWaterLevels, ProviderIwlsLatestCurrents
+from provider_iwls.api_connector.iwls_latest_values import LatestValues
+
+def test_refresh_keeps_previous_table():
+    tables = iter([{'00001': 1}])
+
+    def loader(previous):
+        return next(tables)
+
+    latest = LatestValues(loader, interval=3600)
+    assert latest.ready.wait(5)
+    assert latest.get('00001') == 1
+    # Loader failures keep the previous table
+    with raises(StopIteration):
+        latest.refresh()
+    assert latest.get('00001') == 1
+    latest.close()
+
+def test_reads_without_upstream_calls(start_stand_in, provider_def):
+    stand_in = start_stand_in(8)
+    provider = ProviderIwlsLatestWaterLevels(
+        provider_def(ProviderIwlsLatestWaterLevels, stand_in.base_url, timeseries_cache_path=None))
+    assert provider.latest.ready.wait(30)
+    calls = dict(stand_in.counts)
+
+    feature = provider.get('00001')
+    assert feature['properties']['timeSeriesCode'] == 'wlo'
+    assert feature['properties']['eventDate'].endswith('Z')
+    page = provider.query(limit=5)
+    assert (page['numberMatched'], page['numberReturned']) == (8, 5)
+    assert provider.query(resulttype='hits')['numberMatched'] == 8
+    with raises(ProviderItemNotFoundError):
+        provider.get('99999')
+    assert stand_in.counts == calls
+
+    # Refreshes only request values following the latest one of every station
+    provider.latest.refresh()
+    assert stand_in.counts['data'] == calls['data'] + 8
+    assert provider.get('00001')['properties']['eventDate'] >= feature['properties']['eventDate']
+
+def test_currents(start_stand_in, provider_def):
+    stand_in = start_stand_in(8)
+    provider = ProviderIwlsLatestCurrents(
+        provider_def(ProviderIwlsLatestCurrents, stand_in.base_url, timeseries_cache_path=None))
+    assert provider.latest.ready.wait(30)
+
+    features = provider.query(select_properties=['value'], skip_geometry=True)['features']
+    # One in four stations publishes surface currents
+    assert [i['id'] for i in features] == ['00004', '00008']
+    assert all(i['properties'].keys() == {'value'} and i['geometry'] is None for i in features)
+
+def test_requests_wait_for_first_refresh(start_stand_in, provider_def):
+    stand_in = start_stand_in(8, latency=0.05)
+    provider = ProviderIwlsLatestWaterLevels(
+        provider_def(ProviderIwlsLatestWaterLevels, stand_in.base_url, timeseries_cache_path=None))
+    page = provider.query(limit=5)
+    assert (page['type'], page['numberMatched'], page['numberReturned']) == ('featureCollection', 8, 5)
+
+    stand_in = start_stand_in(8, latency=1.0)
+    provider = ProviderIwlsLatestWaterLevels(provider_def(
+        ProviderIwlsLatestWaterLevels, stand_in.base_url, timeseries_cache_path=None, latest_ready_timeout=0.1))
+    with raises(ProviderConnectionError):
+        provider.get('00001')
+
+def test_close_stops_poller():
+    refreshes = []
+    latest = LatestValues.shared('closed-api', lambda previous: refreshes.append(1) or {}, interval=0.05)
+    assert latest.ready.wait(5)
+    latest.close()
+    assert not latest._poller.is_alive()
+    count = len(refreshes)
+    time.sleep(0.2)
+    assert len(refreshes) == count
+    # The next caller gets a new table
+    assert LatestValues.shared('closed-api', lambda previous: {}, interval=0.05) is not latest
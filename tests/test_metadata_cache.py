@@ -0,0 +1,43 @@
+import time
+
+from provider_iwls.api_connector.iwls_api_config import IwlsApiConfig
+from provider_iwls.api_connector.iwls_api_connector_waterlevels import IwlsApiConnectorWaterLevels
+from provider_iwls.api_connector.iwls_metadata_cache import MetadataCache
+
+def test_least_recently_used_dropped():
+    cache = MetadataCache(max_entries=2)
+    cache.put('1', {'code': '00001'})
+    cache.put('2', {'code': '00002'})
+    assert cache.get('1') == {'code': '00001'}
+    cache.put('3', {'code': '00003'})
+    assert cache.get('2') is None
+    assert cache.missing(['1', '2', '3']) == ['2']
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_expired_entries():
+    cache = MetadataCache()
+    cache.put('1', {'code': '00001'}, expires_at=time.time() - 1)
+    assert cache.get('1') is None
+
+def test_snapshot(tmp_path):
+    path = str(tmp_path / 'metadata.json')
+    cache = MetadataCache(snapshot_path=path)
+    cache.put('1', {'code': '00001'})
+    cache.put('2', {'code': '00002'}, expires_at=time.time() - 1)
+    cache.save_snapshot()
+
+    loaded = MetadataCache(snapshot_path=path)
+    assert len(loaded) == 1
+    assert loaded.get('1') == {'code': '00001'}
+
+def test_warm_up(start_stand_in, tmp_path):
+    stand_in = start_stand_in(6)
+    config = IwlsApiConfig(base_url=stand_in.base_url, timeseries_cache_path=None,
+                           metadata_snapshot_path=str(tmp_path / 'metadata.json'))
+    api = IwlsApiConnectorWaterLevels(config)
+    assert api.warm_up_metadata() == 6
+    assert (tmp_path / 'metadata.json').exists()
+
+    metadata_requests = stand_in.counts['metadata']
+    assert api._get_station_metadata('00003')['code'] == '00003'
+    assert stand_in.counts['metadata'] == metadata_requests
@@ -0,0 +1,133 @@
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from pytest import raises
+
+from pygeoapi.provider.base import ProviderInvalidQueryError
+
+from provider_iwls.provider_iwls import ProviderIwlsWaterLevels, ProviderIwlsCurrents
+from provider_iwls.api_connector.iwls_api_connector_waterlevels import IwlsApiConnectorWaterLevels
+from provider_iwls.api_connector.iwls_api_connector_currents import IwlsApiConnectorCurrents
+
+def test_connector_reused(start_stand_in, provider_def):
+    stand_in = start_stand_in(8)
+    definition = provider_def(ProviderIwlsWaterLevels, stand_in.base_url, timeseries_cache_path=None)
+    first = ProviderIwlsWaterLevels(definition)
+    second = ProviderIwlsWaterLevels(definition)
+    assert first.connector is second.connector
+    assert type(first.connector) is IwlsApiConnectorWaterLevels
+
+    first.get('00001')
+    second.get('00002')
+    assert stand_in.counts['stations'] == 1
+
+def test_concurrent_fan_outs(start_stand_in, provider_def, caplog):
+    caplog.set_level(logging.INFO)
+    stand_in = start_stand_in(8, latency=0.01)
+    connector = ProviderIwlsWaterLevels(provider_def(
+        ProviderIwlsWaterLevels, stand_in.base_url, timeseries_cache_path=None, max_station_workers=2)).connector
+    codes = [f'{i + 1:05d}' for i in range(8)]
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(lambda i: connector._get_features_by_station(
+            codes, '2023-01-01T00:00:00Z', '2023-01-01T06:00:00Z', properties=['wlo']), range(4)))
+
+    # Each fan-out reports its own stations, not those of the other requests using the connector
+    peaks = [int(i) for i in re.findall(r'up to (\d+) stations in flight', caplog.text)]
+    assert len(peaks) == 4 and all(1 <= i <= 2 for i in peaks)
+    # The connector counts the stations of every request
+    assert connector.stations_in_flight.current == 0
+    assert 2 <= connector.stations_in_flight.peak <= 8
+
+def test_currents_connector(start_stand_in, provider_def):
+    stand_in = start_stand_in(8)
+    currents = ProviderIwlsCurrents(
+        provider_def(ProviderIwlsCurrents, stand_in.base_url, timeseries_cache_path=None))
+    assert type(currents.connector) is IwlsApiConnectorCurrents
+
+    feature = currents.get('00004')
+    assert 'wcs' in feature['properties']
+    assert 'wlo' not in feature['properties']
+
+def test_hits_and_counts(start_stand_in, provider_def):
+    stand_in = start_stand_in(8)
+    provider = ProviderIwlsWaterLevels(
+        provider_def(ProviderIwlsWaterLevels, stand_in.base_url, timeseries_cache_path=None))
+    number_matched = len(provider.connector.registry.index.stations_in_bbox(
+        [-180, -90, 180, 90], provider.connector.required_series))
+
+    hits = provider.query(resulttype='hits')
+    assert (hits['numberMatched'], hits['numberReturned'], hits['features']) == (number_matched, 0, [])
+    # Hits only use the station summary
+    assert (stand_in.counts['metadata'], stand_in.counts['data']) == (0, 0)
+
+    page = provider.query(startindex=number_matched - 2, limit=5)
+    assert (page['numberMatched'], page['numberReturned']) == (number_matched, 2)
+    assert len(page['features']) == 2
+
+def test_property_push_down(start_stand_in, provider_def):
+    stand_in = start_stand_in(8)
+    provider = ProviderIwlsWaterLevels(
+        provider_def(ProviderIwlsWaterLevels, stand_in.base_url, timeseries_cache_path=None))
+    assert {'metadata', 'wlo', 'wlp', 'wlf', 'spine'} <= set(provider.properties)
+
+    observations = provider.query(limit=8, select_properties=['wlo'], skip_geometry=True)
+    assert all(i['properties'].keys() == {'wlo'} and i['geometry'] is None
+               for i in observations['features'])
+    assert [i['id'] for i in observations['features']] == [f'{i + 1:05d}' for i in range(8)]
+    # Only observations are requested, without station metadata
+    assert stand_in.counts['metadata'] == 0
+    observation_calls = stand_in.counts['data']
+
+    # Metadata is fetched for the geometry but only returned if selected
+    located = provider.query(limit=8, select_properties=['wlo'])
+    assert stand_in.counts['metadata'] == 8
+    assert all(i['properties'].keys() == {'wlo'} and i['geometry']['type'] == 'Point'
+               for i in located['features'])
+    calls_before = stand_in.counts['data']
+
+    provider.query(limit=8)
+    # Six water level stations publish four series, two current stations publish wlo and wlp
+    assert (stand_in.counts['data'] - calls_before) * 8 == observation_calls * 28
+
+def test_resample(start_stand_in, provider_def):
+    stand_in = start_stand_in(4)
+    provider = ProviderIwlsWaterLevels(
+        provider_def(ProviderIwlsWaterLevels, stand_in.base_url, timeseries_cache_path=None, resample='1d'))
+    assert 'resample' in provider.fields
+
+    # Query parameters are passed by pygeoapi as property filters
+    features = provider.query(limit=1, properties=[('resample', '1h'), ('agg', 'max')])['features']
+    wlo = features[0]['properties']['wlo']
+    assert 48 <= len(wlo) <= 49
+    assert all(key.endswith(':00:00.000Z') for key in wlo)
+
+    # Single items are resampled with the option default only
+    assert len(provider.get('00001')['properties']['wlo']) <= 3
+    assert len(provider.get('00001', resample='1h')['properties']['wlo']) <= 3
+
+    with raises(ProviderInvalidQueryError):
+        provider.query(resample='1h', agg='median')
+
+def test_resample_errors(start_stand_in, provider_def):
+    stand_in = start_stand_in(4)
+    provider = ProviderIwlsWaterLevels(
+        provider_def(ProviderIwlsWaterLevels, stand_in.base_url, timeseries_cache_path=None))
+    calls_before = stand_in.counts['data']
+
+    # Bad values are refused before any series is requested
+    for properties in ([('resample', 'hourly')], [('resample', '1h'), ('agg', 'median')]):
+        with raises(ProviderInvalidQueryError):
+            provider.query(properties=properties)
+    with raises(ProviderInvalidQueryError, match='median'):
+        provider.query(agg='median', resample='1h')
+    assert stand_in.counts['data'] == calls_before
+
+    # Aggregation is only checked when series are resampled
+    provider.query(limit=1, properties=[('agg', 'median')])
+
+    # A bad resample option fails the items it would resample
+    provider = ProviderIwlsWaterLevels(
+        provider_def(ProviderIwlsWaterLevels, stand_in.base_url, timeseries_cache_path=None, resample='hourly'))
+    with raises(ProviderInvalidQueryError):
+        provider.get('00001')
@@ -0,0 +1,37 @@
+import datetime
+
+from provider_iwls.api_connector.iwls_request_planner import RequestPlanner, days_between, day_ranges
+
+def test_days_between():
+    days = days_between('2023-01-30T12:00:00Z', '2023-02-02T00:00:00Z')
+    assert [day.isoformat() for day in days] == ['2023-01-30', '2023-01-31', '2023-02-01', '2023-02-02']
+    assert days_between('2023-01-02T00:00:00Z', '2023-01-01T00:00:00Z') == []
+
+def test_day_ranges_split_gaps_and_long_runs():
+    days = days_between('2023-01-01T00:00:00Z', '2023-01-07T00:00:00Z')
+    ranges = day_ranges(days[:2] + days[3:], max_days=3)
+    assert [time_range for time_range, group in ranges] == [
+        ['2023-01-01T00:00:00Z', '2023-01-02T23:59:59Z'],
+        ['2023-01-04T00:00:00Z', '2023-01-06T23:59:59Z'],
+        ['2023-01-07T00:00:00Z', '2023-01-07T23:59:59Z']]
+
+def test_normalize_range_converts_to_utc():
+    planner = RequestPlanner()
+    assert planner.normalize_range('2023-01-01T01:30:00-03:00', '2023-01-02') == \
+        ['2023-01-01T04:30:00Z', '2023-01-02T00:00:00Z']
+
+def test_plan_uses_largest_window_aligned_on_days():
+    planner = RequestPlanner()
+    plan = planner.plan('wlo', ['2023-01-01T06:30:00Z', '2023-01-10T12:00:00Z'])
+    assert plan.time_ranges == [['2023-01-01T06:30:00Z', '2023-01-07T23:59:59Z'],
+                                ['2023-01-08T00:00:00Z', '2023-01-10T12:00:00Z']]
+
+def test_plan_whole_days_and_skipped_days():
+    planner = RequestPlanner(series_window_days={'wlf': 2})
+    time_range = ['2023-01-01T06:30:00Z', '2023-01-05T12:00:00Z']
+    plan = planner.plan('wlf', time_range, skip_days=[datetime.date(2023, 1, 3)], whole_days=True)
+    assert plan.time_ranges == [['2023-01-01T00:00:00Z', '2023-01-02T23:59:59Z'],
+                                ['2023-01-04T00:00:00Z', '2023-01-05T23:59:59Z']]
+    assert plan.skipped_days == [datetime.date(2023, 1, 3)]
+    assert plan.report() == ('wlf 2023-01-01T06:30:00Z/2023-01-05T12:00:00Z: '
+                             '2 requests of up to 2 days covering 4 days, 1 days skipped')
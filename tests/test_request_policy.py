@@ -0,0 +1,154 @@
+import time
+import threading
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from pytest import fixture
+
+from provider_iwls.iwls_stand_in import IwlsStandIn, SyntheticFixtures
+from provider_iwls.api_connector.iwls_api_config import IwlsApiConfig
+from provider_iwls.api_connector.iwls_api_connector_waterlevels import IwlsApiConnectorWaterLevels
+from provider_iwls.api_connector.iwls_api_connector_async import AsyncIwlsApiConnectorWaterLevels
+from provider_iwls.api_connector.iwls_http_session import IwlsHttpSession
+from provider_iwls.api_connector.iwls_request_policy import RetryPolicy, LatencyTracker
+
+@fixture(scope='module')
+def stand_in():
+    with IwlsStandIn(SyntheticFixtures(n_stations=2), seed=0) as stand_in:
+        yield stand_in
+
+def test_retry_statuses():
+    policy = RetryPolicy(max_retries=2)
+    assert policy.should_retry(1)
+    assert policy.should_retry(1, 503)
+    assert policy.should_retry(2, 429)
+    assert not policy.should_retry(1, 404)
+    assert not policy.should_retry(3, 503)
+
+def test_wait_time():
+    policy = RetryPolicy(backoff=0.5, backoff_max=2.0)
+    assert 0 <= policy.wait_time(1) <= 0.5
+    assert 0 <= policy.wait_time(10) <= 2.0
+    # Retry-After is honoured up to the longest wait
+    assert policy.wait_time(1, '1.5') == 1.5
+    assert policy.wait_time(1, '120') == 2.0
+
+def test_hedge_delay():
+    tracker = LatencyTracker(quantile=0.9, min_samples=10, min_delay=0.01)
+    for i in range(9):
+        tracker.record(0.1)
+    assert tracker.hedge_delay() is None
+    tracker.record(1.0)
+    assert 0.1 < tracker.hedge_delay() < 1.0
+
+def test_retry_until_success(stand_in):
+    session = IwlsHttpSession(retry_policy=RetryPolicy(max_retries=20, backoff=0.0))
+    stand_in.error_rate = 0.5
+    try:
+        r = session.get(f'{stand_in.base_url}v1/stations/')
+    finally:
+        stand_in.error_rate = 0.0
+    assert r.status_code == 200
+
+def test_retries_exhausted(stand_in):
+    session = IwlsHttpSession(retry_policy=RetryPolicy(max_retries=2, backoff=0.0))
+    errors_before = stand_in.counts['error']
+    stand_in.error_rate = 1.0
+    try:
+        r = session.get(f'{stand_in.base_url}v1/stations/')
+    finally:
+        stand_in.error_rate = 0.0
+    assert r.status_code == 503
+    assert stand_in.counts['error'] - errors_before == 3
+
+class Delays():
+    """
+    Jitter of the stand-in, in order of the requests received.
+    """
+    def __init__(self, *delays):
+        self.delays = list(delays)
+
+    def uniform(self, a, b):
+        return self.delays.pop(0)
+
+def test_hedged_call(start_stand_in, monkeypatch):
+    closed = []
+    close = requests.Response.close
+    monkeypatch.setattr(requests.Response, 'close', lambda r: closed.append(r) or close(r))
+
+    tracker = LatencyTracker(min_samples=1, min_delay=0.1)
+    tracker.record(0.01)
+    session = IwlsHttpSession(latency_tracker=tracker)
+    stand_in = start_stand_in(2, jitter=1.0)
+    # The first call is slow, its duplicate is sent after 0.1 s and answered at once
+    stand_in.random = Delays(0.6, 0.0)
+    t_start = time.monotonic()
+    r = session.get(f'{stand_in.base_url}v1/stations/', hedge=True)
+    assert time.monotonic() - t_start < 0.5
+    assert r.status_code == 200 and len(r.json()) == 2
+    assert stand_in.counts['stations'] == 2
+
+    # The response of the slower call is closed once received
+    time.sleep(0.8)
+    assert len(closed) == 1 and closed[0] is not r
+
+def test_hedged_call_async(start_stand_in, monkeypatch, capsys):
+    stand_in = start_stand_in(2, jitter=1.0)
+    config = IwlsApiConfig(base_url=stand_in.base_url, timeseries_cache_path=None, max_retries=0,
+                           hedge=True, hedge_min_delay=0.1)
+    api = AsyncIwlsApiConnectorWaterLevels(config)
+    url = f'{config.base_url}v1/stations/{api._id_from_station_code("00001")}/data'
+    time_range = ['2023-01-01T00:00:00Z', '2023-01-01T06:00:00Z']
+    for i in range(api.session.latency_tracker.min_samples):
+        api.session.latency_tracker.record(0.01)
+
+    cancelled = []
+    send_async = api._send_async
+    async def spy(*args):
+        try:
+            return await send_async(*args)
+        except BaseException as e:
+            cancelled.append(e)
+            raise
+    monkeypatch.setattr(api, '_send_async', spy)
+
+    stand_in.random = Delays(0.6, 0.0)
+    t_start = time.monotonic()
+    times, values = api.runtime.run(api._fetch_chunk_async(url, 'wlo', time_range))
+    assert time.monotonic() - t_start < 0.5
+    assert stand_in.counts['data'] == 2
+    # The slower call is cancelled
+    assert len(cancelled) == 1 and isinstance(cancelled[0], asyncio.CancelledError)
+
+    stand_in.jitter = 0.0
+    expected = IwlsApiConnectorWaterLevels(config)._fetch_chunk(url, 'wlo', time_range)
+    assert np.array_equal(times, expected[0]) and np.array_equal(values, expected[1])
+
+    # The stand-in answers the cancelled call on a closed connection without error
+    time.sleep(0.8)
+    assert 'Traceback' not in capsys.readouterr().err
+
+def test_hedge_threads_saturated(start_stand_in, monkeypatch):
+    # A single free thread, taken by the first call
+    monkeypatch.setattr(IwlsHttpSession, '_hedge_slots', threading.BoundedSemaphore(1))
+
+    tracker = LatencyTracker(min_samples=1, min_delay=0.1)
+    tracker.record(0.01)
+    session = IwlsHttpSession(latency_tracker=tracker)
+    stand_in = start_stand_in(2, jitter=1.0)
+    url = f'{stand_in.base_url}v1/stations/'
+    stand_in.random = Delays(0.5, 0.3)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(session.get, url, hedge=True)
+        time.sleep(0.05)
+        # The second call is sent at once without a duplicate, its latency excludes any wait for a thread
+        second = executor.submit(session.get, url, hedge=True)
+        assert second.result().status_code == 200
+        assert 0.3 <= tracker.latencies[-1] < 0.45
+        assert first.result().status_code == 200
+    assert stand_in.counts['stations'] == 2
+
+    # Threads are given back once the calls complete
+    assert IwlsHttpSession._hedge_slots.acquire(blocking=False)
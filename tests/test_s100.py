@@ -0,0 +1,24 @@
+import json
+
+from provider_iwls.s100_processing.s104 import S104Def
+from provider_iwls.s100_processing.s100 import S100GeneratorDCF8
+
+FEATURES = {
+    'type': 'FeatureCollection',
+    'features': [
+        {'type': 'Feature', 'id': '00001',
+         'geometry': {'type': 'Point', 'coordinates': [-123.5, 49.5]},
+         'properties': {'metadata': {'longitude': -123.5, 'latitude': 49.5}}}
+    ]
+}
+
+def test_features_from_dict(tmp_path):
+    # The processor hands over the collection it fetched, nothing is read from disk
+    generator = S100GeneratorDCF8(FEATURES, tmp_path, tmp_path.joinpath('template.h5'), S104Def)
+    assert generator._load_features() is FEATURES['features']
+
+def test_features_from_path(tmp_path):
+    json_path = tmp_path.joinpath('features.json')
+    json_path.write_text(json.dumps(FEATURES))
+    generator = S100GeneratorDCF8(str(json_path), tmp_path, tmp_path.joinpath('template.h5'), S104Def)
+    assert generator._load_features() == FEATURES['features']
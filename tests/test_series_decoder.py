@@ -0,0 +1,30 @@
+import json
+
+import numpy as np
+
+from provider_iwls.api_connector.iwls_series_decoder import decode_records, parse_event_dates
+
+RECORDS = [{'eventDate': '2023-01-01T00:00:00Z', 'qcFlagCode': '1', 'value': 1.25, 'timeSeriesId': 'a'},
+           {'eventDate': '2023-01-01T00:01:00Z', 'qcFlagCode': '1', 'value': None, 'timeSeriesId': 'a'},
+           {'eventDate': '2023-01-01T00:02:00Z', 'qcFlagCode': '1', 'value': -3e-05, 'timeSeriesId': 'a'}]
+
+def test_decode_records():
+    for body in (json.dumps(RECORDS), json.dumps(RECORDS, separators=(',', ':'))):
+        times, values = decode_records(body.encode())
+        assert times.tolist() == parse_event_dates([i['eventDate'] for i in RECORDS]).tolist()
+        assert np.array_equal(values, [1.25, np.nan, -3e-05], equal_nan=True)
+
+def test_decode_fallback():
+    # Missing value and fractional seconds are decoded by the json module
+    records = [{'eventDate': '2023-01-01T00:00:00.500Z'}, {'value': 2.0, 'eventDate': '2023-01-01T00:01:00Z'}]
+    times, values = decode_records(json.dumps(records).encode())
+    assert times.tolist() == parse_event_dates(['2023-01-01T00:00:00.500Z', '2023-01-01T00:01:00Z']).tolist()
+    assert np.array_equal(values, [np.nan, 2.0], equal_nan=True)
+
+def test_decode_empty():
+    times, values = decode_records(b'[]')
+    assert len(times) == 0 and len(values) == 0
+
+def test_parse_event_dates():
+    times = parse_event_dates(['2024-02-29T23:59:59Z', '1999-12-31T00:00:00Z'])
+    assert times.tolist() == np.array(['2024-02-29T23:59:59', '1999-12-31T00:00:00'], dtype='datetime64[ns]').tolist()
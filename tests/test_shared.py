@@ -0,0 +1,56 @@
+import time
+import threading
+
+import pandas as pd
+
+from pytest import raises
+
+from provider_iwls.api_connector.iwls_shared import Shared
+from provider_iwls.api_connector.iwls_request_policy import LatencyTracker
+from provider_iwls.api_connector.iwls_metadata_cache import MetadataCache
+from provider_iwls.api_connector.iwls_latest_values import LatestValues
+from provider_iwls.api_connector.iwls_station_index import StationRegistry
+
+def test_settings_are_part_of_the_key():
+    tracker = LatencyTracker.shared('shared-api', quantile=0.9)
+    assert LatencyTracker.shared('shared-api', quantile=0.9) is tracker
+    # A provider with other settings does not get the first provider's instance
+    assert LatencyTracker.shared('shared-api', quantile=0.5).quantile == 0.5
+    assert MetadataCache.shared('shared-api', ttl=60).ttl == 60
+    assert MetadataCache.shared('shared-api', ttl=120).ttl == 120
+
+class Slow(Shared):
+    created = 0
+
+    def __init__(self, fail: bool = False):
+        time.sleep(0.2)
+        Slow.created += 1
+        if fail:
+            raise ValueError('creation failed')
+
+def test_creation_outside_global_lock():
+    slow = threading.Thread(target=Slow._shared, args=('slow', Slow), daemon=True)
+    slow.start()
+    time.sleep(0.05)
+    # Other keys are not blocked by a slow creation, callers of the same key wait for it
+    t_start = time.monotonic()
+    LatencyTracker.shared('other-api')
+    assert time.monotonic() - t_start < 0.1
+    instance = Slow._shared('slow', Slow)
+    slow.join()
+    assert Slow.created == 1 and Slow._shared('slow', Slow) is instance
+
+def test_failed_creation_is_retried():
+    with raises(ValueError):
+        Slow._shared('failing', lambda: Slow(fail=True))
+    assert isinstance(Slow._shared('failing', Slow), Slow)
+
+def test_reset_closes_instances():
+    latest = LatestValues.shared('reset-api', lambda previous: {}, interval=0.05)
+    registry = StationRegistry.shared('reset-api', lambda: pd.DataFrame(columns=['id', 'code']), ttl=0.05)
+    tracker = LatencyTracker.shared('reset-api')
+    Shared.reset()
+
+    # Background threads are stopped, the next callers get new instances
+    assert not latest._poller.is_alive() and not registry._refresher.is_alive()
+    assert LatencyTracker.shared('reset-api') is not tracker
@@ -0,0 +1,119 @@
+import os
+import time
+import asyncio
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pytest import raises
+
+from provider_iwls.api_connector.iwls_api_config import IwlsApiConfig
+from provider_iwls.api_connector.iwls_api_connector_waterlevels import IwlsApiConnectorWaterLevels
+from provider_iwls.api_connector.iwls_api_connector_async import AsyncIwlsApiConnectorWaterLevels
+from provider_iwls.api_connector.iwls_single_flight import SingleFlight
+
+START_TIME = '2023-01-01T00:00:00Z'
+END_TIME = '2023-01-03T00:00:00Z'
+
+def concurrently(func, n: int = 8) -> list:
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        return list(executor.map(lambda i: func(), range(n)))
+
+def test_identical_calls_share_result():
+    group = SingleFlight()
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def call():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'result'
+
+    def client():
+        barrier.wait()
+        return group.do('key', call)
+
+    assert concurrently(client) == ['result'] * 8
+    assert len(calls) == 1
+    assert (group.calls, group.shared_calls) == (1, 7)
+
+def test_errors_are_shared():
+    group = SingleFlight()
+
+    def call():
+        raise ValueError('upstream error')
+
+    with raises(ValueError):
+        group.do('key', call)
+    # Failed calls are not kept
+    assert group.do('key', lambda: 'retried') == 'retried'
+
+def test_concurrent_station_requests(start_stand_in):
+    stand_in = start_stand_in(4, latency=0.2)
+    config = IwlsApiConfig(base_url=stand_in.base_url, timeseries_cache_path=None)
+    api = IwlsApiConnectorWaterLevels(config)
+    api._get_station_metadata('00001')
+
+    features = concurrently(lambda: api._get_station_data('00001', START_TIME, END_TIME))
+    # One request per series, whatever the number of clients
+    assert stand_in.counts['data'] == len(api.series_codes)
+    assert all(len(i['properties']['wlo']) == 2 * 1440 + 1 for i in features)
+
+def test_lock_reads_store(start_stand_in, tmp_path):
+    stand_in = start_stand_in(4, latency=0.2)
+    # Without in-process coalescing, every thread behaves as a separate worker process
+    config = IwlsApiConfig(base_url=stand_in.base_url, single_flight=False,
+                           timeseries_cache_path=str(tmp_path / 'timeseries.sqlite'),
+                           single_flight_lock_dir=str(tmp_path / 'locks'))
+    api = IwlsApiConnectorWaterLevels(config)
+    api._get_station_metadata('00001')
+
+    features = concurrently(lambda: api._get_station_data('00001', START_TIME, END_TIME), n=4)
+    assert stand_in.counts['data'] == len(api.series_codes)
+    assert all(len(i['properties']['wlo']) == 2 * 1440 + 1 for i in features)
+
+def test_cancelled_wait_releases_lock(start_stand_in, tmp_path, monkeypatch):
+    stand_in = start_stand_in(1)
+    config = IwlsApiConfig(base_url=stand_in.base_url, timeseries_cache_path=str(tmp_path / 'timeseries.sqlite'),
+                           single_flight_lock_dir=str(tmp_path / 'locks'))
+    api = AsyncIwlsApiConnectorWaterLevels(config)
+    url, chunk_range = f'{config.base_url}v1/stations/unknown/data', [START_TIME, END_TIME]
+    # Closing a lock file releases its lock, keep every lock open until the end of the test
+    locks = []
+    chunk_lock = api._chunk_lock
+    monkeypatch.setattr(api, '_chunk_lock', lambda *args: locks.append(chunk_lock(*args)) or locks[-1])
+
+    # Another worker process holds the lock while the call waits for it
+    holder = api._chunk_lock(url, 'wlo', chunk_range)
+    holder.acquire()
+    call = asyncio.run_coroutine_threadsafe(
+        api._fetch_chunk_stored_async(url, 'wlo', chunk_range, [datetime.date(2023, 1, 1)]), api.runtime.loop)
+    time.sleep(0.2)
+    call.cancel()
+    time.sleep(0.1)
+    holder.release()
+    time.sleep(0.2)
+
+    # The lock acquired after the cancellation is released
+    waiter = threading.Thread(target=lambda: api._chunk_lock(url, 'wlo', chunk_range).acquire(), daemon=True)
+    waiter.start()
+    waiter.join(5)
+    assert not waiter.is_alive()
+    assert stand_in.counts['data'] == 0
+
+def test_async_store_with_lock_dir(start_stand_in, tmp_path):
+    stand_in = start_stand_in(60, latency=0.2)
+    config = IwlsApiConfig(base_url=stand_in.base_url, timeseries_cache_path=str(tmp_path / 'timeseries.sqlite'),
+                           single_flight_lock_dir=str(tmp_path / 'locks'))
+    api = AsyncIwlsApiConnectorWaterLevels(config)
+
+    # Chunks waiting for their lock must not starve those holding one
+    result = []
+    query = threading.Thread(target=lambda: result.append(api._get_timeseries_by_boundary(
+        START_TIME, END_TIME, [-180, -90, 180, 90], 60, 0)), daemon=True)
+    query.start()
+    query.join(60)
+    assert not query.is_alive()
+    assert len(result[0]['features']) == 60
+    # Lock files are deleted by their holder
+    assert os.listdir(tmp_path / 'locks') == []
@@ -0,0 +1,36 @@
+import requests
+from pytest import fixture
+
+from provider_iwls.iwls_stand_in import IwlsStandIn, SyntheticFixtures
+from provider_iwls.api_connector.iwls_api_config import IwlsApiConfig
+from provider_iwls.api_connector.iwls_api_connector_waterlevels import IwlsApiConnectorWaterLevels
+from provider_iwls.api_connector.iwls_api_connector_currents import IwlsApiConnectorCurrents
+
+@fixture(scope='module')
+def stand_in():
+    with IwlsStandIn(SyntheticFixtures(n_stations=8)) as stand_in:
+        yield stand_in
+
+@fixture
+def config(stand_in, workdir):
+    return IwlsApiConfig(base_url=stand_in.base_url, timeseries_cache_path=str(workdir / 'timeseries.sqlite'))
+
+def test_station_data(config):
+    api = IwlsApiConnectorWaterLevels(config)
+    feature = api._get_station_data('00001', '2023-01-01T00:00:00Z', '2023-01-10T00:00:00Z')
+    assert feature['id'] == '00001'
+    # One value per minute, requests longer than 7 days would be refused by the stand-in
+    assert len(feature['properties']['wlo']) == 9 * 1440 + 1
+
+def test_bbox_only_returns_current_stations(config):
+    api = IwlsApiConnectorCurrents(config)
+    result = api._get_timeseries_by_boundary('2023-01-01T00:00:00Z', '2023-01-01T01:00:00Z', [-180, -90, 180, 90])
+    assert [feature['id'] for feature in result['features']] == ['00004', '00008']
+
+def test_injected_errors(stand_in):
+    stand_in.error_rate = 1.0
+    try:
+        r = requests.get(f'{stand_in.base_url}v1/stations/')
+        assert r.status_code == 503
+    finally:
+        stand_in.error_rate = 0.0
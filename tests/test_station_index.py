@@ -0,0 +1,104 @@
+import time
+import threading
+
+import pytest
+import pandas as pd
+from pytest import fixture
+
+from provider_iwls.api_connector.iwls_station_index import StationIndex, StationNotFoundError, StationRegistry
+
+@fixture(scope='module')
+def index():
+    info = pd.DataFrame({
+        'id': ['id-a', 'id-b', 'id-c'],
+        'code': ['07120', '07795', '07795'],
+        'officialName': ['Victoria Harbour', 'Point Atkinson', 'Duplicate'],
+        'latitude': [48.424, 49.337, 49.0],
+        'longitude': [-123.371, -123.253, -123.0],
+    })
+    return StationIndex(info)
+
+def test_id_from_code(index):
+    assert index.id_from_code('07120') == 'id-a'
+
+def test_id_from_code_keeps_first_duplicate(index):
+    assert index.id_from_code('07795') == 'id-b'
+
+def test_id_from_name(index):
+    assert index.id_from_name('Point Atkinson') == 'id-b'
+
+def test_name_from_id(index):
+    assert index.name_from_id('id-c') == 'Duplicate'
+
+def test_unknown_station(index):
+    with pytest.raises(StationNotFoundError):
+        index.id_from_code('00000')
+    with pytest.raises(StationNotFoundError):
+        index.name_from_id('unknown')
+
+def test_stations_in_bbox(index):
+    stations = index.stations_in_bbox([-123.3, 48.9, -123.0, 49.5])
+    assert list(stations.code) == ['07795', '07795']
+
+def test_stations_in_bbox_boundary_inclusive(index):
+    stations = index.stations_in_bbox([-123.371, 48.424, -123.371, 48.424])
+    assert list(stations.id) == ['id-a']
+
+def test_stations_in_bbox_antimeridian():
+    info = pd.DataFrame({'id': ['east', 'west', 'middle'], 'code': ['1', '2', '3'],
+                         'officialName': ['e', 'w', 'm'],
+                         'latitude': [50.0, 50.0, 50.0], 'longitude': [179.5, -179.5, 0.0]})
+    stations = StationIndex(info).stations_in_bbox([179.0, 49.0, -179.0, 51.0])
+    assert list(stations.id) == ['east', 'west']
+
+def test_published_series():
+    info = pd.DataFrame({'id': ['a', 'b', 'c'], 'code': ['1', '2', '3'],
+                         'officialName': ['a', 'b', 'c'],
+                         'latitude': [50.0, 50.0, 50.0], 'longitude': [0.0, 0.0, 0.0],
+                         'timeSeries': [[{'code': 'wlo'}, {'code': 'wcs1'}], [{'code': 'wlp'}], None]})
+    index = StationIndex(info)
+    assert index.published_series('1') == {'wlo', 'wcs1'}
+    assert index.published_series('3') is None
+    stations = index.stations_in_bbox([-1.0, 49.0, 1.0, 51.0], 'wcs1')
+    assert list(stations.id) == ['a']
+
+def test_registry_loaded_outside_global_lock(index):
+    loaded = threading.Event()
+
+    def slow_loader():
+        loaded.wait(5)
+        return index.info
+
+    slow = threading.Thread(target=StationRegistry.shared, args=('slow-api', slow_loader), daemon=True)
+    slow.start()
+    time.sleep(0.1)
+    # Another IWLS API is not blocked by the slow one
+    registry = StationRegistry.shared('other-api', lambda: index.info)
+    assert registry.index.id_from_code('07120') == 'id-a'
+    assert slow.is_alive()
+    loaded.set()
+    slow.join(5)
+
+    # Same key shares a registry, a different refresh interval gets its own
+    assert StationRegistry.shared('other-api', None) is registry
+    refreshed = StationRegistry.shared('other-api', lambda: index.info, ttl=3600)
+    assert refreshed is not registry
+    refreshed.close()
+
+def test_registry_refresh(index):
+    summaries = iter([index.info, index.info.iloc[:1]])
+
+    def loader():
+        # The third load fails, the previous index is kept
+        return next(summaries)
+
+    registry = StationRegistry(loader, ttl=0.1)
+    assert len(registry.index.info) == 3
+    time.sleep(0.35)
+    assert len(registry.index.info) == 1
+    loaded_at = registry.loaded_at
+    time.sleep(0.15)
+    assert (len(registry.index.info), registry.loaded_at) == (1, loaded_at)
+
+    registry.close()
+    assert not registry._refresher.is_alive()
@@ -0,0 +1,58 @@
+import numpy as np
+from pytest import raises
+
+from provider_iwls.api_connector.iwls_station_series import (
+    StationSeries, SeriesAccumulator, parse_interval, render_feature)
+
+def test_from_records_sorts_and_keeps_first_duplicate():
+    series = StationSeries.from_records(
+        ['2023-01-01T00:01:00Z', '2023-01-01T00:00:00Z', '2023-01-01T00:01:00Z'], [1.5, 2.0, 3.0])
+    assert series.times.dtype == np.dtype('datetime64[ns]')
+    assert series.values.tolist() == [2.0, 1.5]
+
+def test_to_dict_matches_geojson_properties():
+    series = StationSeries.from_records(['2023-01-01T00:00:00Z', '2023-01-01T00:01:00Z'], [None, -0.0])
+    assert series.to_dict() == {'2023-01-01T00:00:00.000Z': None, '2023-01-01T00:01:00.000Z': 0.0}
+    assert not np.signbit(series.values[1])
+
+def test_empty_series():
+    assert not StationSeries.empty()
+    assert StationSeries.from_records([], []) == StationSeries.empty()
+    assert StationSeries.empty().to_dict() == {}
+
+def test_render_feature():
+    series = StationSeries.from_records(['2023-01-01T00:00:00Z'], [1.0])
+    feature = {'type': 'Feature', 'properties': {'metadata': {'code': '07120'}, 'wlo': series}}
+    rendered = render_feature(feature)
+    assert rendered['properties'] == {'metadata': {'code': '07120'}, 'wlo': {'2023-01-01T00:00:00.000Z': 1.0}}
+    assert feature['properties']['wlo'] is series
+
+def test_accumulator_merges_chunk_boundaries():
+    accumulator = SeriesAccumulator()
+    accumulator.add_records([{'eventDate': '2023-01-01T00:00:00Z', 'value': 1.0},
+                             {'eventDate': '2023-01-01T00:01:00Z', 'value': 2.0}])
+    accumulator.add_records([{'eventDate': '2023-01-01T00:01:00Z', 'value': 2.0},
+                             {'eventDate': '2023-01-01T00:02:00Z'}])
+    series = accumulator.build()
+    assert len(series) == 3
+    assert series.to_dict()['2023-01-01T00:02:00.000Z'] is None
+
+def test_resample():
+    series = StationSeries.from_records(
+        ['2023-01-01T00:00:00Z', '2023-01-01T00:30:00Z', '2023-01-01T00:59:00Z',
+         '2023-01-01T01:00:00Z', '2023-01-01T02:10:00Z', '2023-01-01T02:20:00Z'],
+        [1.0, 2.0, 6.0, None, 4.0, None])
+    hourly = parse_interval('1h')
+    assert series.resample(hourly, 'mean').to_dict() == {'2023-01-01T00:00:00.000Z': 3.0,
+                                                         '2023-01-01T02:00:00.000Z': 4.0}
+    assert series.resample(hourly, 'min').values.tolist() == [1.0, 4.0]
+    assert series.resample(hourly, 'max').values.tolist() == [6.0, 4.0]
+    assert series.resample(parse_interval('PT2H'), 'last').values.tolist() == [6.0, 4.0]
+    assert StationSeries.empty().resample(hourly) == StationSeries.empty()
+
+def test_resample_errors():
+    for interval in ['abc', '0h', '-1h']:
+        with raises(ValueError):
+            parse_interval(interval)
+    with raises(ValueError):
+        StationSeries.empty().resample(parse_interval('1h'), 'median')
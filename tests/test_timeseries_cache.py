@@ -0,0 +1,53 @@
+import datetime
+
+import numpy as np
+
+from provider_iwls.api_connector.iwls_timeseries_cache import TimeSeriesCache
+
+def test_past_buckets_are_immutable(tmp_path):
+    cache = TimeSeriesCache(str(tmp_path / 'cache.sqlite'), recent_ttl=0)
+    day = datetime.date(2020, 1, 1)
+    times = np.array(['2020-01-01T00:00:00'], dtype='datetime64[ns]')
+    values = np.array([1.5])
+    cache.put('url', 'wlo', {day: (times, values)})
+    cache.put('url', 'wlf', {day: (times, values)})
+
+    cached_times, cached_values = cache.get('url', 'wlo', [day])[day]
+    assert np.array_equal(cached_times, times) and np.array_equal(cached_values, values)
+    # Forecasts always expire, a zero ttl expires them immediately
+    assert cache.get('url', 'wlf', [day]) == {}
+
+def test_recent_buckets_expire(tmp_path):
+    cache = TimeSeriesCache(str(tmp_path / 'cache.sqlite'), recent_ttl=0)
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    cache.put('url', 'wlo', {today: (np.empty(0, dtype='datetime64[ns]'), np.empty(0))})
+
+    assert cache.get('url', 'wlo', [today]) == {}
+
+def test_purge(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    cache = TimeSeriesCache(str(path), recent_ttl=0, retention_days=30, max_buckets=2, purge_interval=3600)
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    times = np.arange('2020-01-01', '2020-01-02', dtype='datetime64[m]').astype('datetime64[ns]')
+    values = np.zeros(len(times))
+    old_days = {datetime.date(2020, 1, 1) + datetime.timedelta(days=i): (times, values) for i in range(100)}
+    cache.put('url', 'wlo', old_days)
+    recent_days = {today - datetime.timedelta(days=i): (times, values) for i in range(2, 6)}
+    cache.put('url', 'wlo', recent_days)
+    # Forecasts expire immediately with a zero ttl
+    cache.put('url', 'wlf', {today: (times, values)})
+    cache._connection().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    size = path.stat().st_size
+
+    # Old and expired buckets, then the oldest recent days above max_buckets
+    assert cache.purge() == 100 + 1 + 2
+    assert sorted(cache.get('url', 'wlo', sorted(recent_days))) == [today - datetime.timedelta(days=i) for i in (3, 2)]
+    # Freed pages are given back to the file system
+    cache._connection().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    assert path.stat().st_size < size / 10
+
+def test_put_purges_periodically(tmp_path):
+    cache = TimeSeriesCache(str(tmp_path / 'cache.sqlite'), retention_days=1, purge_interval=0)
+    day = datetime.date(2020, 1, 1)
+    cache.put('url', 'wlo', {day: (np.empty(0, dtype='datetime64[ns]'), np.empty(0))})
+    assert len(cache) == 0
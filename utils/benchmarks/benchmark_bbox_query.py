@@ -0,0 +1,57 @@
+####
+# Time a bounding box query through the whole connector stack (station index, request
+# planner, HTTP session, time series store) against the local IWLS stand-in, for the
+# sync and async connectors, with a cold and a warm time series store.
+# Usage: python benchmark_bbox_query.py [latency_seconds] [error_rate]
+####
+
+# Standard library imports
+import os
+import sys
+import tempfile
+from timeit import default_timer as timer
+
+# Local imports
+from provider_iwls.iwls_stand_in import IwlsStandIn, SyntheticFixtures
+from provider_iwls.api_connector.iwls_api_config import IwlsApiConfig
+from provider_iwls.api_connector.iwls_api_connector_waterlevels import IwlsApiConnectorWaterLevels
+from provider_iwls.api_connector.iwls_api_connector_async import AsyncIwlsApiConnectorWaterLevels
+
+START_TIME = '2023-01-01T00:00:00Z'
+END_TIME = '2023-01-15T00:00:00Z'
+BBOX = [-180, -90, 180, 90]
+LIMIT = 20
+
+def time_query(connector, stand_in: IwlsStandIn) -> tuple:
+    """
+    Time a single bounding box query.
+
+    :param connector: IWLS connector (IwlsApiConnector)
+    :param stand_in: running stand-in, to count the requests received (IwlsStandIn)
+    :returns: seconds elapsed, number of features and number of data requests (tuple)
+    """
+    data_requests = stand_in.counts['data']
+    t_start = timer()
+    result = connector._get_timeseries_by_boundary(START_TIME, END_TIME, BBOX, LIMIT, 0)
+
+    return timer() - t_start, len(result['features']), stand_in.counts['data'] - data_requests
+
+def main(latency: float = 0.05, error_rate: float = 0.0):
+    with tempfile.TemporaryDirectory() as folder, \
+            IwlsStandIn(SyntheticFixtures(n_stations=100), latency=latency, error_rate=error_rate) as stand_in:
+        # requests_cache files are written in the working folder
+        os.chdir(folder)
+
+        for name, connector_class in (('sync', IwlsApiConnectorWaterLevels),
+                                      ('async', AsyncIwlsApiConnectorWaterLevels)):
+            config = IwlsApiConfig(base_url=stand_in.base_url,
+                                   timeseries_cache_path=os.path.join(folder, f'{name}.sqlite'))
+            connector = connector_class(config)
+
+            for run in ('cold store', 'warm store'):
+                seconds, features, requests = time_query(connector, stand_in)
+                print(f'{name:>5}, {run}: {seconds:6.2f} s for {features} stations, '
+                      f'{requests} data requests ({latency * 1000:.0f} ms latency)')
+
+if __name__ == '__main__':
+    main(*[float(i) for i in sys.argv[1:3]])
@@ -0,0 +1,77 @@
+####
+# Compare merging the chunks of a time series with a pd.concat inside the chunk loop
+# (as _get_timeseries used to) against the SeriesAccumulator, for 30, 60 and 90 day windows
+# of one minute observations split in five day chunks, as returned by the IWLS API.
+# Usage: python benchmark_chunk_merge.py
+####
+
+# Standard library imports
+import datetime
+from timeit import timeit
+
+# Packages imports
+import numpy as np
+import pandas as pd
+
+# Local imports
+from provider_iwls.api_connector.iwls_station_series import SeriesAccumulator
+
+def synthetic_chunks(days: int, chunk_days: int = 5) -> list:
+    """
+    Build the records returned by the IWLS API for a one minute series, split in chunks.
+    Consecutive chunks share their boundary timestamp.
+
+    :param days: length of the time series in days (int)
+    :param chunk_days: length of a chunk in days (int)
+    :returns: records of every chunk (list of list of dict)
+    """
+    start = datetime.datetime(2023, 1, 1)
+    chunks = []
+    for chunk_start in range(0, days, chunk_days):
+        minutes = range(chunk_start * 1440, min(chunk_start + chunk_days, days) * 1440 + 1)
+        chunks.append([{
+            'eventDate': (start + datetime.timedelta(minutes=i)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'qcFlagCode': '1',
+            'value': round(float(np.sin(i / 60)), 3),
+            'timeSeriesId': '5cebf1e23d0f4a073c4bc0f6'} for i in minutes])
+    return chunks
+
+def concat_in_loop(chunks: list) -> pd.core.frame.DataFrame:
+    """
+    Previous implementation: grow a DataFrame one chunk at a time.
+    """
+    series_data = pd.DataFrame()
+    for chunk in chunks:
+        series_data = pd.concat([series_data, pd.DataFrame.from_dict(chunk)])
+
+    series_data['eventDate'] = pd.to_datetime(series_data['eventDate'])
+    series_data = series_data.drop_duplicates('eventDate')
+    return series_data.set_index('eventDate').sort_index()[['value']]
+
+def accumulate(chunks: list):
+    """
+    Current implementation: collect raw records, build the arrays once.
+    """
+    accumulator = SeriesAccumulator()
+    for chunk in chunks:
+        accumulator.add_records(chunk)
+    return accumulator.build()
+
+def main(repeat: int = 5):
+    for days in (30, 60, 90):
+        chunks = synthetic_chunks(days)
+
+        # Both implementations must return the same series
+        expected = concat_in_loop(chunks)['value']
+        series = accumulate(chunks).to_series()
+        assert np.array_equal(expected.values, series.values)
+        assert np.array_equal(expected.index.values, series.index.values)
+
+        loop_ms = timeit(lambda: concat_in_loop(chunks), number=repeat) / repeat * 1e3
+        accumulator_ms = timeit(lambda: accumulate(chunks), number=repeat) / repeat * 1e3
+
+        print(f'{days:>3} days ({len(chunks):>2} chunks, {len(series):>6} values): '
+              f'concat in loop {loop_ms:8.1f} ms, accumulator {accumulator_ms:8.1f} ms')
+
+if __name__ == '__main__':
+    main()
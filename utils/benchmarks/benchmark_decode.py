@@ -0,0 +1,82 @@
+####
+# Compare decoding the /data responses of a one minute series with r.json() and the
+# SeriesAccumulator records path against decode_records, which reads the eventDate and
+# value of every record straight from the response body into numpy arrays.
+# Usage: python benchmark_decode.py
+####
+
+# Standard library imports
+import json
+import datetime
+import tracemalloc
+from timeit import timeit
+
+# Local imports
+from provider_iwls.iwls_stand_in import SyntheticFixtures
+from provider_iwls.api_connector.iwls_request_planner import RequestPlanner, TIME_FORMAT
+from provider_iwls.api_connector.iwls_series_decoder import decode_records
+from provider_iwls.api_connector.iwls_station_series import SeriesAccumulator
+
+def response_bodies(days: int) -> list:
+    """
+    Build the bodies of the /data responses of a one minute series, as planned by the request planner.
+
+    :param days: length of the time series in days (int)
+    :returns: response bodies (list of bytes)
+    """
+    fixtures = SyntheticFixtures(n_stations=1)
+    station_id = fixtures.stations[0]['id']
+    start = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+    end = start + datetime.timedelta(days=days)
+    plan = RequestPlanner().plan('wlo', [start.strftime(TIME_FORMAT), end.strftime(TIME_FORMAT)])
+
+    def parse(time: str) -> datetime.datetime:
+        return datetime.datetime.strptime(time, TIME_FORMAT).replace(tzinfo=datetime.timezone.utc)
+
+    return [json.dumps(fixtures.data(station_id, 'wlo', parse(chunk_start), parse(chunk_end))).encode()
+            for chunk_start, chunk_end in plan.time_ranges]
+
+def json_records(bodies: list):
+    """
+    Previous implementation: a dict per record, timestamps parsed by pandas.
+    """
+    accumulator = SeriesAccumulator()
+    for body in bodies:
+        accumulator.add_records(json.loads(body))
+    return accumulator.build()
+
+def decoded_arrays(bodies: list):
+    """
+    Current implementation: arrays decoded from the response bodies.
+    """
+    accumulator = SeriesAccumulator()
+    for body in bodies:
+        accumulator.add_arrays(*decode_records(body))
+    return accumulator.build()
+
+def peak_memory(func, bodies: list) -> float:
+    """
+    Return the peak memory allocated by a call, in MB.
+    """
+    tracemalloc.start()
+    func(bodies)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+def main(repeat: int = 5):
+    for days in (7, 30, 60):
+        bodies = response_bodies(days)
+
+        # Both implementations must return the same series
+        assert json_records(bodies) == decoded_arrays(bodies)
+
+        json_ms = timeit(lambda: json_records(bodies), number=repeat) / repeat * 1e3
+        arrays_ms = timeit(lambda: decoded_arrays(bodies), number=repeat) / repeat * 1e3
+
+        print(f'{days:>3} days ({len(bodies):>2} responses, {sum(map(len, bodies)) / 1e6:5.1f} MB): '
+              f'json records {json_ms:7.1f} ms ({peak_memory(json_records, bodies):5.1f} MB peak), '
+              f'decoded arrays {arrays_ms:7.1f} ms ({peak_memory(decoded_arrays, bodies):5.1f} MB peak)')
+
+if __name__ == '__main__':
+    main()
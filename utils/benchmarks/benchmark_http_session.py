@@ -0,0 +1,57 @@
+####
+# Compare per-request latency of bare requests.get calls against the pooled
+# keep-alive IwlsHttpSession, using the local IWLS stand-in /data endpoint.
+# Usage: python benchmark_http_session.py [number_of_requests]
+####
+
+# Standard library imports
+import sys
+import statistics
+from timeit import default_timer as timer
+
+# Packages imports
+import requests
+
+# Local imports
+from provider_iwls.api_connector.iwls_http_session import IwlsHttpSession
+from provider_iwls.iwls_stand_in import IwlsStandIn, SyntheticFixtures
+
+# One hour of 1-minute observations, similar to an IWLS /data response
+PARAMS = {'time-series-code': 'wlo', 'from': '2021-12-06T00:00:00Z', 'to': '2021-12-06T00:59:00Z'}
+
+def time_requests(get, url: str, n: int) -> list:
+    """
+    Time n sequential GET requests.
+
+    :param get: callable sending a GET request (function)
+    :param url: url used for queries (string)
+    :param n: number of requests (int)
+    :returns: latency of every request in milliseconds (list)
+    """
+    latencies = []
+    for _ in range(n):
+        t_start = timer()
+        r = get(url=url, params=PARAMS)
+        r.raise_for_status()
+        latencies.append((timer() - t_start) * 1000)
+    return latencies
+
+def main(n: int = 500):
+    fixtures = SyntheticFixtures(n_stations=1)
+    with IwlsStandIn(fixtures) as stand_in:
+        url = f'{stand_in.base_url}v1/stations/{fixtures.stations[0]["id"]}/data'
+
+        session = IwlsHttpSession(pool_size=10)
+        results = {
+            'requests.get': time_requests(requests.get, url, n),
+            'IwlsHttpSession': time_requests(session.get, url, n),
+        }
+
+        for name, latencies in results.items():
+            print(f'{name:>16}: mean {statistics.mean(latencies):.3f} ms, '
+                  f'median {statistics.median(latencies):.3f} ms over {n} requests')
+
+        session.close()
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
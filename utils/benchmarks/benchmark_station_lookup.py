@@ -0,0 +1,43 @@
+####
+# Compare station code lookups with a boolean mask scan of the station summary
+# against the StationIndex hash indexes, for growing numbers of stations.
+# Usage: python benchmark_station_lookup.py
+####
+
+# Standard library imports
+from timeit import timeit
+
+# Packages imports
+import pandas as pd
+
+# Local imports
+from provider_iwls.api_connector.iwls_station_index import StationIndex
+
+def synthetic_summary(n: int) -> pd.core.frame.DataFrame:
+    """
+    Build a station summary similar to the IWLS /stations response.
+
+    :param n: number of stations (int)
+    :returns: summary information for all stations (pd.DataFrame)
+    """
+    return pd.DataFrame({
+        'id': [f'5cebf1de3d0f4a073c4b{i:04x}' for i in range(n)],
+        'code': [f'{i:05d}' for i in range(n)],
+        'officialName': [f'Station {i}' for i in range(n)],
+        'latitude': [45.0] * n,
+        'longitude': [-65.0] * n,
+    })
+
+def main(repeat: int = 2000):
+    for n in (100, 1000, 10000, 100000):
+        info = synthetic_summary(n)
+        index = StationIndex(info)
+        code = f'{n - 1:05d}'
+
+        mask_us = timeit(lambda: info.loc[info.code==code].id.values[0], number=repeat) / repeat * 1e6
+        hash_us = timeit(lambda: index.id_from_code(code), number=repeat) / repeat * 1e6
+
+        print(f'{n:>7} stations: mask scan {mask_us:10.2f} us, hash index {hash_us:6.3f} us')
+
+if __name__ == '__main__':
+    main()